@@ -307,7 +307,8 @@ class JoystickOSC:
         for event in events:
             if event and hasattr(event, 'instance_id'):
                 if event.instance_id == 0:
-                    logger.log(raw_logger(), f"pygame event: {event}")
+                    if logger.isEnabledFor(raw_logger()):
+                        logger.log(raw_logger(), "pygame event: %s", event)
                     if event.type == _AXIS:
                         self._handleAxes(event.axis, event.value)
                     elif event.type == _BUTTONDOWN:
@@ -510,11 +511,12 @@ class JoystickOSC:
     def _sendAxis(self,
                 axis,
                 ticks,
-                send_interval=0.05):
+                send_interval='adaptive'):
         """
         Send Axis values to defined ETC OSC Wheel parameter.
         Send_interval is time between axis sends, can prevent console
-        lag, set to 0.0 to disable
+        lag, set to 0.0 to disable. 'adaptive' lets etcosc follow the
+        console latency, see etcosc.eos_send_wheel
         """
         coarse_fine = self.wheel_fine
         # Which axis parameter should be sent
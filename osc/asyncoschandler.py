@@ -0,0 +1,313 @@
+"""
+This script was created with the help of AI.
+asyncio version of OSCHandler. Sending and receiving run on one event
+loop through asyncio.DatagramProtocol, so several consoles and the
+joystick loop can share a thread with no per message threads or timers.
+"""
+
+import asyncio
+import logging
+from osc.logging_config import setup_logging, osc_logger
+from osc.oschandler import OSC_MESSAGE_LOGGING, OSC_TRAFFIC_LOG_INTERVAL
+from osc.oscmatch import AddressIndex, SubstringIndex
+from osc.oscpacket import (BUNDLE_TAG, ParseError, PreparedMessage,
+                           decode_args, encode_message, iter_bundle,
+                           parse_address)
+from osc.oscstats import TrafficStats
+from osc.ratelimit import AsyncRateLimitedSender
+
+# Logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class _OSCProtocol(asyncio.DatagramProtocol):
+    """
+    Hands every received datagram to the owning handler
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    def datagram_received(self, data, addr):
+        self.handler._handle_datagram(data, addr)
+
+    def error_received(self, exc):
+        logger.error(f"OSC socket error: {exc}")
+
+
+class AsyncOSCHandler:
+    """
+    Same public surface as OSCHandler, driven by an asyncio event loop.
+    The sockets are opened by awaiting start(), example:
+        myosc = AsyncOSCHandler(mode='txrx', tx_udp_ip='10.101.100.101',
+            tx_port=8000, rx_port=8001)
+        await myosc.start()
+        myosc.send_message('/eos/chan/1/at', [50])
+    send_message, prepared senders and listeners must be used from the
+    event loop thread.
+    """
+
+    def __init__(self,
+        mode='txrx',
+        tx_udp_ip=None,
+        tx_port=None,
+        rx_udp_ip='0.0.0.0',
+        rx_port=None
+        ):
+        """
+        Arguments are the same as OSCHandler. Nothing is opened until
+        start() is awaited.
+        """
+        self.mode = mode
+        self.tx_udp_ip = tx_udp_ip
+        self.tx_port = tx_port
+        self.rx_udp_ip = rx_udp_ip
+        self.rx_port = rx_port
+        self.min_send_interval = 0.00
+        self.rate_limit_mode = 'buffer'
+        self.rate_limiter = None
+        self.substring_index = SubstringIndex()
+        self._tx_transport = None
+        self._rx_transport = None
+        self.traffic = TrafficStats('AsyncOSCHandler',
+                                    OSC_TRAFFIC_LOG_INTERVAL)
+        self.message_logging = OSC_MESSAGE_LOGGING
+        self.address_index = AddressIndex()
+        if self.mode not in ['tx', 'rx', 'txrx']:
+            raise ValueError("mode must be: 'tx', 'rx', or 'txrx'")
+        error_list = []
+        if 'tx' in self.mode and (self.tx_udp_ip is None or
+                                  self.tx_port is None):
+            error_list.append("tx_udp_ip='x.x.x.x' and tx_port=#### must "
+                              "be set for transmitting")
+        if 'rx' in self.mode and self.rx_port is None:
+            error_list.append("rx_port=#### must be set for receiving")
+        if error_list:
+            error_string = "\n".join(error_list)
+            logger.error(error_string)
+            raise ValueError(error_string)
+        logger.info(
+            f"AsyncOSCHandler initialized with mode='{self.mode}' "
+            f"tx_udp_ip='{self.tx_udp_ip}' tx_port={self.tx_port} "
+            f"rx_port={self.rx_port}"
+        )
+
+    async def start(self):
+        """
+        Open the tx socket and start receiving as set by mode.
+        """
+        loop = asyncio.get_running_loop()
+        self.traffic.start()
+        if 'tx' in self.mode and self._tx_transport is None:
+            self._tx_transport, _ = await loop.create_datagram_endpoint(
+                lambda: _OSCProtocol(self),
+                remote_addr=(self.tx_udp_ip, self.tx_port),
+                allow_broadcast=True
+            )
+        if 'rx' in self.mode:
+            await self.start_receiving()
+
+    async def start_receiving(self):
+        """
+        Start receiving OSC messages if mode set to rx or txrx.
+        """
+        if 'rx' not in self.mode:
+            logger.error(
+                "AsyncOSCHandler is not set to receive, cannot start server."
+            )
+            return
+        if self._rx_transport is None:
+            loop = asyncio.get_running_loop()
+            self._rx_transport, _ = await loop.create_datagram_endpoint(
+                lambda: _OSCProtocol(self),
+                local_addr=(self.rx_udp_ip, self.rx_port)
+            )
+            logger.info("Async OSC server started.")
+
+    def stop_receiving(self):
+        """Stops receiving OSC messages."""
+        if self._rx_transport:
+            self._rx_transport.close()
+            self._rx_transport = None
+            logger.info("Async OSC server stopped.")
+
+    def close(self):
+        """Closes both sockets and discards any rate limited messages."""
+        self.stop_receiving()
+        if self.rate_limiter:
+            self.rate_limiter.stop()
+            self.rate_limiter = None
+        if self._tx_transport:
+            self._tx_transport.close()
+            self._tx_transport = None
+        self.traffic.stop()
+
+    def set_tx_rate_limit(self,
+        min_send_interval=0.00,
+        rate_limit_mode='buffer',
+        buffer_max_size=50,
+        burst=1
+        ):
+        """
+        Same options as OSCHandler.set_tx_rate_limit. Waiting messages
+        are sent by an event loop callback rather than a thread.
+        """
+        self.min_send_interval = min_send_interval
+        self.rate_limit_mode = rate_limit_mode
+        if self.rate_limiter:
+            self.rate_limiter.stop()
+            self.rate_limiter = None
+        if min_send_interval > 0:
+            self.rate_limiter = AsyncRateLimitedSender(
+                self._send_message,
+                rate=1.0 / min_send_interval,
+                burst=burst,
+                mode=rate_limit_mode,
+                max_size=buffer_max_size
+            )
+
+    def get_tx_stats(self):
+        """
+        Returns the rate limiter counters, see OSCHandler.get_tx_stats
+        """
+        if not self.rate_limiter:
+            return {'accepted': 0, 'delayed': 0, 'dropped': 0,
+                    'coalesced': 0, 'queued': 0}
+        return self.rate_limiter.stats()
+
+    def send_message(self, osc_address, osc_args=None):
+        """
+        Send an osc command, same argument handling as
+        OSCHandler.send_message. Does not block, the datagram is queued
+        on the event loop transport.
+        """
+        if 'tx' not in self.mode:
+            logger.error("AsyncOSCHandler is not set to transmit, cannot "
+                "send message."
+            )
+            return
+        if osc_args is None:
+            osc_args = []
+        elif isinstance(osc_args, (list, tuple)):
+            osc_args = list(osc_args)
+        else:
+            osc_args = [osc_args]
+        if self.rate_limiter:
+            # Encode up front so bad args raise on the caller thread,
+            # the limiter only ever holds ready datagrams
+            encoded = (osc_args, encode_message(osc_address, osc_args))
+            self.rate_limiter.submit(osc_address, encoded,
+                                     send=self._send_encoded)
+        else:
+            self._send_message(osc_address, osc_args)
+
+    def prepare(self, osc_address, typetags=''):
+        """
+        Prepare a reusable sender, see OSCHandler.prepare
+        """
+        if 'tx' not in self.mode:
+            logger.error("AsyncOSCHandler is not set to transmit, cannot "
+                "prepare message."
+            )
+            raise ValueError("AsyncOSCHandler mode must include 'tx' to "
+                             "prepare")
+        return PreparedMessage(osc_address, typetags, self._transmit)
+
+    def _send_message(self, osc_address, osc_args):
+        self._send_encoded(osc_address,
+                           (osc_args, encode_message(osc_address, osc_args)))
+
+    def _send_encoded(self, osc_address, encoded):
+        """
+        Transmit an (osc_args, datagram) pair, the rate limiter calls
+        this once a token is free
+        """
+        osc_args, dgram = encoded
+        self._transmit(dgram)
+        self.traffic.record('tx', osc_address, len(dgram))
+        if self.message_logging:
+            logger.log(
+                osc_logger(),
+                "Sent OSC: '%s', '%s' to %s:%s", osc_address, osc_args,
+                self.tx_udp_ip, self.tx_port
+            )
+
+    def set_message_logging(self, enabled=True):
+        """
+        Log every sent message, see OSCHandler.set_message_logging
+        """
+        self.message_logging = enabled
+
+    def get_traffic_stats(self):
+        """
+        Returns per address tx and rx counters, see
+        OSCHandler.get_traffic_stats
+        """
+        return self.traffic.snapshot()
+
+    def _transmit(self, dgram):
+        """
+        Write an encoded datagram to the tx transport. The transport
+        copies the data, so reused prepared buffers are safe.
+        """
+        if self._tx_transport is None:
+            logger.error("AsyncOSCHandler not started, await start() first")
+            return
+        self._tx_transport.sendto(bytes(dgram))
+
+    def _handle_datagram(self, data, addr):
+        """
+        Dispatch a received datagram on the event loop thread
+        """
+        try:
+            if data.startswith(BUNDLE_TAG):
+                for start, end in iter_bundle(data, 0, len(data)):
+                    self._dispatch_message(data, start, end)
+            elif data[:1] == b'/':
+                self._dispatch_message(data, 0, len(data))
+        except ParseError as e:
+            logger.warning(f"Dropped malformed OSC packet from {addr}: {e}")
+
+    def _dispatch_message(self, data, start, end):
+        """
+        Parse the address, arguments are only decoded if a listener or
+        substring listener wants them
+        """
+        address, typetag_start = parse_address(data, start, end)
+        self.traffic.record('rx', address, end - start)
+        handlers = self.address_index.match(address)
+        if handlers:
+            args = decode_args(data, typetag_start, end)
+            for handler in handlers:
+                handler(address, *args)
+        elif self.substring_index.match(address):
+            self.default_handler(address, *decode_args(data, typetag_start,
+                                                       end))
+
+    def default_handler(self, address, *args):
+        """
+        Called for messages with no registered listener, checks the
+        substring listeners.
+        """
+        for handler in self.substring_index.match(address):
+            handler(address, *args)
+
+    def register_osc_listener(self, address, handler):
+        """
+        Register a handler for an OSC address, wildcards are supported.
+        See OSCHandler.register_osc_listener. Handlers run on the event
+        loop thread and must not block.
+        """
+        self.address_index.add(address, handler)
+        logger.info("Registered rx address '%s' with handler %s", address,
+                    getattr(handler, '__name__', repr(handler)))
+
+    def register_osc_substring(self, substring, handler):
+        """
+        Register a handler for all addresses containing substring, see
+        OSCHandler.register_osc_substring.
+        """
+        self.substring_index.add(substring, handler)
+        logger.info("Registered rx address substring '%s' with handler '%s'",
+                    substring, getattr(handler, '__name__', repr(handler)))
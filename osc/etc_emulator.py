@@ -0,0 +1,580 @@
+"""
+This script was created with the help of AI.
+A stand in for an ETC EOS console, for load and latency testing
+without a console. It answers over UDP, and optionally TCP, from a
+synthetic show:
+    /eos/ping                        /eos/out/ping with the same args
+    /eos/get/version                 /eos/out/get/version
+    /eos/get/<type>/count            /eos/out/get/<type>/count
+    /eos/get/<type>/index/<N>        /eos/out/get/<type>/<num>/list/...,
+                                     color palettes also send channels
+                                     and byType like the console does
+    /eos/(active/)wheel/...          /eos/out/active/wheel/<n> and
+                                     /eos/out/color/hs
+    .../cmd/chan/<N>, .../cmd/color_palette/<N>, .../cmd/select_active
+                                     /eos/out/active/chan, the active
+                                     wheels and /eos/out/color/hs
+Every reply can be delayed (latency plus random jitter) or lost, and
+the console only handles rate requests per second, the rest wait in a
+bounded queue like a busy console.
+use command:
+python -m osc.etc_emulator
+python -m osc.etc_emulator --port 8000 --reply-port 8001 --palettes 200
+python -m osc.etc_emulator --latency 0.005 --jitter 0.002 --loss 0.01 --rate 500 --tcp
+"""
+
+import argparse
+import heapq
+import logging
+import random
+import socket
+import threading
+import time
+from collections import deque
+from osc.logging_config import setup_logging
+from osc.oscpacket import (BUNDLE_TAG, ParseError, decode_args,
+                           encode_message, iter_bundle, parse_address)
+from osc.osctcp import (LengthDecoder, SlipDecoder, TCP_FRAMINGS,
+                        TCP_RECV_SIZE, length_encode, slip_encode)
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+EMULATOR_VERSION = '3.2.10.35'
+# Show targets with their default sizes, cp is built out in detail
+SHOW_COUNTS = {
+    'patch': 0, 'cuelist': 4, 'group': 20, 'macro': 50, 'sub': 20,
+    'preset': 30, 'ip': 10, 'fp': 20, 'cp': 40, 'bp': 10, 'curve': 5,
+    'fx': 10, 'snap': 5, 'pixmap': 0, 'ms': 5,
+}
+# Color wheels reported for a selection: wheel number, label, start value
+COLOR_WHEELS = ((1, 'Intens', 100.0), (2, 'Red', 100.0), (3, 'Green', 100.0),
+                (4, 'Blue', 100.0), (5, 'Hue', 0.0), (6, 'Saturatn', 0.0))
+# Parameter class the console reports for color wheels
+COLOR_CATEGORY = 3
+FIXTURE_MODELS = (('ETC_Fixtures', 'Vivid_R_11'), ('ETC', 'ColorSource_PAR'),
+                  ('Chauvet_Professional', 'Ovation_E-910FC'))
+RX_SIZE = 65536
+
+
+class EmulatedShow:
+    """
+    A synthetic show file: channels patched in blocks of one fixture
+    model, color palettes over a few of those blocks, and counts for
+    the other targets.
+    """
+
+    def __init__(self, palettes=SHOW_COUNTS['cp'], channels=500,
+                 block_size=16, seed=0):
+        """
+        palettes: number of color palettes
+        channels: number of patched channels
+        block_size: channels per fixture block
+        seed: makes the generated show repeatable
+        """
+        rng = random.Random(seed)
+        self.counts = dict(SHOW_COUNTS, cp=palettes, patch=channels)
+        self.blocks = []        # (first chan, last chan, manufacturer, model)
+        for first in range(1, channels + 1, block_size):
+            last = min(channels, first + block_size - 1)
+            self.blocks.append((first, last) + FIXTURE_MODELS[
+                len(self.blocks) % len(FIXTURE_MODELS)])
+        self.palettes = []
+        for index in range(palettes):
+            used = sorted(rng.sample(self.blocks, min(len(self.blocks),
+                                                      rng.randint(1, 5))))
+            self.palettes.append({
+                'index': index,
+                'number': index + 1,
+                'uid': self._uid(rng),
+                'label': f'Color {index + 1}',
+                'ranges': [f'{first}-{last}' if last > first else str(first)
+                           for first, last, _man, _model in used],
+                'by_type': [first for first, _last, _man, _model in used],
+                'hue': round(rng.uniform(0, 360), 3),
+                'saturation': round(rng.uniform(0, 100), 3),
+            })
+        self.uids = {target: [self._uid(rng) for _ in range(count)]
+                     for target, count in self.counts.items()
+                     if target != 'cp'}
+
+    @staticmethod
+    def _uid(rng):
+        digits = f'{rng.getrandbits(128):032X}'
+        return (f'{digits[:8]}-{digits[8:12]}-{digits[12:16]}-'
+                f'{digits[16:20]}-{digits[20:]}')
+
+    def block_for(self, chan):
+        """
+        Returns the fixture block a channel is patched in, or None
+        """
+        for block in self.blocks:
+            if block[0] <= chan <= block[1]:
+                return block
+        return None
+
+    def index_replies(self, target, index):
+        """
+        Returns the (address, args) replies to /eos/get/<target>/index/N,
+        empty if the index is out of range
+        """
+        if not 0 <= index < self.counts.get(target, 0):
+            return []
+        if target != 'cp':
+            uid = self.uids[target][index]
+            return [(f'/eos/out/get/{target}/{index + 1}/list/0/3',
+                     [index, uid, f'{target} {index + 1}'])]
+        cp = self.palettes[index]
+        prefix = f"/eos/out/get/cp/{cp['number']}"
+        head = [cp['index'], cp['uid']]
+        return [
+            (f'{prefix}/list/0/6', head + [cp['label'], False, False, 0]),
+            (f"{prefix}/channels/list/0/{len(cp['ranges']) + 2}",
+             head + cp['ranges']),
+            (f"{prefix}/byType/list/0/{len(cp['by_type']) + 2}",
+             head + cp['by_type']),
+        ]
+
+
+class ConsoleEmulator:
+    """
+    Serves an EmulatedShow over UDP and optionally TCP. Requests go
+    through one processing thread limited to rate per second, replies
+    are scheduled on a heap and sent by a second thread when due.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8000, reply_port=None,
+                 show=None, latency=0.0, jitter=0.0, loss=0.0, rate=None,
+                 queue_size=1000, tcp=False, tcp_framing='slip', seed=None):
+        """
+        host, port: where the console listens, TCP uses the same port
+        reply_port: UDP port replies go to on the sender's host, like
+            the console's OSC UDP TX port. None replies to the sender's
+            own port.
+        show: EmulatedShow, None builds the default show
+        latency: seconds added to every reply
+        jitter: up to this many extra seconds per reply, uniform
+        loss: chance 0 to 1 that a reply datagram is dropped
+        rate: requests handled per second, None for no limit
+        queue_size: requests waiting for processing before new ones are
+            dropped
+        tcp: also accept TCP connections, tcp_framing 'slip' or 'length'
+        seed: makes jitter and loss repeatable
+        """
+        if tcp_framing not in TCP_FRAMINGS:
+            raise ValueError(f"tcp_framing must be one of {TCP_FRAMINGS}")
+        if not 0.0 <= loss <= 1.0:
+            raise ValueError("loss must be between 0 and 1")
+        self.host = host
+        self.port = port
+        self.reply_port = reply_port
+        self.show = show or EmulatedShow()
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rate = rate
+        self.queue_size = queue_size
+        self.tcp = tcp
+        self.tcp_framing = tcp_framing
+        self._random = random.Random(seed)
+        # Selection state for command line requests
+        self.selection = []
+        self.wheels = {number: value for number, _label, value in COLOR_WHEELS}
+        self.hue_sat = [0.0, 0.0]
+        self.requests = deque()     # (address, args, reply function)
+        self._replies = []          # heap of (due, sequence, packet, reply)
+        self._sequence = 0
+        self._request_cond = threading.Condition()
+        self._reply_cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self.udp_socket = None
+        self.tcp_socket = None
+        self._tcp_clients = []
+        self.counters = {'received': 0, 'handled': 0, 'unknown': 0,
+                         'replies': 0, 'lost': 0, 'overflow': 0}
+
+    def start(self):
+        """
+        Bind the sockets and start the worker threads
+        """
+        self._stop.clear()
+        self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp_socket.bind((self.host, self.port))
+        self.udp_socket.settimeout(0.25)
+        # Port 0 asks the OS for a free port
+        self.port = self.udp_socket.getsockname()[1]
+        targets = [(self._udp_loop, 'emulator-udp'),
+                   (self._process_loop, 'emulator-process'),
+                   (self._reply_loop, 'emulator-reply')]
+        if self.tcp:
+            self.tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.tcp_socket.setsockopt(socket.SOL_SOCKET,
+                                       socket.SO_REUSEADDR, 1)
+            self.tcp_socket.bind((self.host, self.port))
+            self.tcp_socket.listen()
+            self.tcp_socket.settimeout(0.25)
+            targets.append((self._accept_loop, 'emulator-tcp'))
+        for target, name in targets:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Console emulator on {self.host}:{self.port} "
+                    f"{'udp+tcp' if self.tcp else 'udp'}, "
+                    f"{self.show.counts['cp']} palettes, "
+                    f"latency={self.latency} jitter={self.jitter} "
+                    f"loss={self.loss} rate={self.rate}")
+        return self
+
+    def stop(self):
+        """
+        Stop the threads and close the sockets
+        """
+        self._stop.set()
+        with self._request_cond:
+            self._request_cond.notify_all()
+        with self._reply_cond:
+            self._reply_cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+        for sock in [self.udp_socket, self.tcp_socket] + self._tcp_clients:
+            if sock:
+                sock.close()
+        self._tcp_clients = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        """
+        Returns request and reply counters and the current queue depths
+        """
+        return dict(self.counters, queued=len(self.requests),
+                    scheduled=len(self._replies))
+
+    # Transport
+    def _udp_loop(self):
+        buf = bytearray(RX_SIZE)
+        while not self._stop.is_set():
+            try:
+                size, client = self.udp_socket.recvfrom_into(buf)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            if self.reply_port:
+                client = (client[0], self.reply_port)
+            self._receive(bytes(buf[:size]),
+                          lambda packet, client=client:
+                          self.udp_socket.sendto(packet, client))
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn, client = self.tcp_socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            conn.settimeout(None)
+            self._tcp_clients.append(conn)
+            threading.Thread(target=self._tcp_read, args=(conn, client),
+                             name='emulator-tcp-client', daemon=True).start()
+
+    def _tcp_read(self, conn, client):
+        slip = self.tcp_framing == 'slip'
+        decoder = SlipDecoder() if slip else LengthDecoder()
+        encode = slip_encode if slip else length_encode
+        lock = threading.Lock()
+        def reply(packet):
+            with lock:
+                conn.sendall(encode(packet))
+        logger.info(f"Emulator TCP client {client[0]}:{client[1]} connected")
+        while not self._stop.is_set():
+            try:
+                data = conn.recv(TCP_RECV_SIZE)
+            except OSError:
+                break
+            if not data:
+                break
+            for packet in decoder.feed(data):
+                self._receive(packet, reply)
+        if conn in self._tcp_clients:
+            self._tcp_clients.remove(conn)
+        conn.close()
+
+    def _receive(self, packet, reply):
+        """
+        Split a packet into messages and queue them for processing
+        """
+        try:
+            if packet.startswith(BUNDLE_TAG):
+                spans = list(iter_bundle(packet, 0, len(packet)))
+            else:
+                spans = [(0, len(packet))]
+            messages = []
+            for start, end in spans:
+                address, offset = parse_address(packet, start, end)
+                messages.append((address, decode_args(packet, offset, end),
+                                 reply))
+        except ParseError as e:
+            logger.warning(f"Emulator dropped a malformed packet: {e}")
+            return
+        with self._request_cond:
+            for message in messages:
+                self.counters['received'] += 1
+                if len(self.requests) >= self.queue_size:
+                    self.counters['overflow'] += 1
+                    continue
+                self.requests.append(message)
+            self._request_cond.notify()
+
+    def _process_loop(self):
+        """
+        Handle queued requests, at most rate per second
+        """
+        next_slot = time.monotonic()
+        while not self._stop.is_set():
+            with self._request_cond:
+                while not self.requests and not self._stop.is_set():
+                    self._request_cond.wait()
+                if self._stop.is_set():
+                    return
+                address, args, reply = self.requests.popleft()
+            if self.rate:
+                # Fixed slots, a late request does not push the rest back
+                wait = next_slot - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                next_slot = max(next_slot, time.monotonic() - 1.0) + \
+                    1.0 / self.rate
+            try:
+                replies = self.handle(address, args)
+            except Exception:
+                logger.exception(f"Emulator failed on {address} {args}")
+                continue
+            self._schedule(replies, reply)
+
+    def _schedule(self, replies, reply):
+        now = time.monotonic()
+        with self._reply_cond:
+            for address, args in replies:
+                if self.loss and self._random.random() < self.loss:
+                    self.counters['lost'] += 1
+                    continue
+                due = now + self.latency
+                if self.jitter:
+                    due += self._random.uniform(0.0, self.jitter)
+                self._sequence += 1
+                heapq.heappush(self._replies, (due, self._sequence,
+                                               encode_message(address, args),
+                                               reply))
+            self._reply_cond.notify()
+
+    def _reply_loop(self):
+        """
+        Send each scheduled reply when it is due
+        """
+        while not self._stop.is_set():
+            with self._reply_cond:
+                if not self._replies:
+                    self._reply_cond.wait(0.25)
+                    continue
+                wait = self._replies[0][0] - time.monotonic()
+                if wait > 0:
+                    self._reply_cond.wait(wait)
+                    continue
+                _due, _sequence, packet, reply = heapq.heappop(self._replies)
+            try:
+                reply(packet)
+                self.counters['replies'] += 1
+            except OSError as e:
+                logger.warning(f"Emulator reply failed: {e}")
+
+    # Console behaviour
+    def handle(self, address, args):
+        """
+        Returns the (address, args) replies the console sends for one
+        request
+        """
+        self.counters['handled'] += 1
+        parts = address.strip('/').split('/')
+        if not parts or parts[0] != 'eos':
+            self.counters['unknown'] += 1
+            return []
+        parts = parts[1:]
+        # Requests may name a user, /eos/user/<n>/...
+        if len(parts) > 2 and parts[0] == 'user':
+            parts = parts[2:]
+        if parts == ['ping']:
+            return [('/eos/out/ping', list(args))]
+        if parts[:1] == ['get']:
+            return self._get(parts[1:])
+        if parts[:1] == ['wheel'] or parts[:2] == ['active', 'wheel']:
+            return self._wheel(parts, args)
+        if parts[:1] == ['cmd'] or parts[:1] == ['newcmd']:
+            return self._command(parts[1:], args)
+        self.counters['unknown'] += 1
+        return []
+
+    def _get(self, parts):
+        if parts == ['version']:
+            return [('/eos/out/get/version', [EMULATOR_VERSION])]
+        if len(parts) == 2 and parts[1] == 'count':
+            return [(f'/eos/out/get/{parts[0]}/count',
+                     [self.show.counts.get(parts[0], 0)])]
+        if len(parts) == 3 and parts[1] == 'index':
+            try:
+                index = int(parts[2])
+            except ValueError:
+                return []
+            return self.show.index_replies(parts[0], index)
+        self.counters['unknown'] += 1
+        return []
+
+    def _wheel(self, parts, args):
+        if not args:
+            return []
+        try:
+            ticks = float(args[0])
+        except (TypeError, ValueError):
+            return []
+        name = parts[-1]
+        fine = 'fine' in parts
+        number = None
+        for wheel, label, _value in COLOR_WHEELS:
+            if name == str(wheel) or name.lower() == label.lower():
+                number = wheel
+        if number is None:
+            return []
+        step = 0.1 if fine else 1.0
+        self.wheels[number] = min(100.0, max(0.0, self.wheels[number] +
+                                             ticks * step))
+        return [self._wheel_reply(number)] + [self._hue_sat_reply()]
+
+    def _command(self, parts, args):
+        """
+        The small part of the command line the palette tools use
+        """
+        words = [part for part in parts if part != '#']
+        if len(words) >= 2 and words[0] == 'chan':
+            try:
+                self.selection = [int(words[1])]
+            except ValueError:
+                return []
+            return self._active_replies()
+        if len(words) >= 2 and words[0] == 'color_palette':
+            try:
+                cp = self.show.palettes[int(words[1]) - 1]
+            except (ValueError, IndexError):
+                return []
+            self.selection = self._channels(cp['ranges'])
+            self.hue_sat = [cp['hue'], cp['saturation']]
+            return []
+        if words[:1] == ['select_active']:
+            return self._active_replies()
+        return [('/eos/out/cmd', [' '.join(words + [str(a) for a in args])])]
+
+    @staticmethod
+    def _channels(ranges):
+        channels = []
+        for item in ranges:
+            first, _sep, last = item.partition('-')
+            channels.extend(range(int(first), int(last or first) + 1))
+        return channels
+
+    def _active_replies(self):
+        """
+        /eos/out/active/chan for the selection, then every color wheel
+        and the hue and saturation
+        """
+        if not self.selection:
+            return [('/eos/out/active/chan', [''])]
+        block = self.show.block_for(self.selection[0])
+        if block is None:
+            return [('/eos/out/active/chan', [''])]
+        first, _last, manufacturer, model = block
+        dmx = (self.selection[0] - 1) * 4 + 1
+        chan_text = self._range_text(self.selection)
+        replies = [('/eos/out/active/chan',
+                    [f'{chan_text}  [{int(self.wheels[1])}] '
+                     f'{manufacturer} {model} @ {dmx}'])]
+        replies.extend(self._wheel_reply(number) for number, _l, _v
+                       in COLOR_WHEELS)
+        replies.append(self._hue_sat_reply())
+        return replies
+
+    @staticmethod
+    def _range_text(channels):
+        ranges = []
+        start = previous = channels[0]
+        for chan in channels[1:] + [None]:
+            if chan is not None and chan == previous + 1:
+                previous = chan
+                continue
+            ranges.append(f'{start}-{previous}' if previous > start
+                          else str(start))
+            if chan is not None:
+                start = previous = chan
+        return ','.join(ranges)
+
+    def _wheel_reply(self, number):
+        label = COLOR_WHEELS[number - 1][1]
+        value = self.wheels[number]
+        return (f'/eos/out/active/wheel/{number}',
+                [f'{label}  [{round(value)}]', COLOR_CATEGORY, value])
+
+    def _hue_sat_reply(self):
+        return ('/eos/out/color/hs', [float(self.hue_sat[0]),
+                                      float(self.hue_sat[1])])
+
+
+def main(argv=None):
+    """
+    Command line entry, see the module docstring
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m osc.etc_emulator',
+        description='Run a stand in ETC EOS console for load testing.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000,
+                        help='console OSC UDP RX port, TCP uses it too')
+    parser.add_argument('--reply-port', type=int, default=8001,
+                        help='OSC UDP TX port, 0 replies to the sender port')
+    parser.add_argument('--palettes', type=int, default=SHOW_COUNTS['cp'])
+    parser.add_argument('--channels', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added to every reply')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='up to this many extra seconds per reply')
+    parser.add_argument('--loss', type=float, default=0.0,
+                        help='chance a reply is dropped, 0 to 1')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='requests handled per second')
+    parser.add_argument('--tcp', action='store_true')
+    parser.add_argument('--tcp-framing', choices=TCP_FRAMINGS, default='slip')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+    show = EmulatedShow(palettes=args.palettes, channels=args.channels)
+    emulator = ConsoleEmulator(
+        host=args.host, port=args.port, reply_port=args.reply_port or None,
+        show=show, latency=args.latency, jitter=args.jitter, loss=args.loss,
+        rate=args.rate, tcp=args.tcp, tcp_framing=args.tcp_framing,
+        seed=args.seed)
+    emulator.start()
+    try:
+        while True:
+            time.sleep(10.0)
+            logger.info(f"Emulator stats {emulator.stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+
+
+if __name__ == "__main__":
+    main()
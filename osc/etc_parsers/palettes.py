@@ -4,6 +4,10 @@ Provide methods for ETC object management
 """
 
 import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
 from osc.logging_config import setup_logging, raw_logger
 
@@ -59,4 +63,201 @@ class palette_osc:
             (replace 'group' with target):
         /group/<group #>/list/<list index>/<list count>
         """
-        return #placeholder
\ No newline at end of file
+        return #placeholder
+
+# Color palette replies all start with this, see parse_cp_reply
+# Example replies to /eos/get/cp/index/1, list count seems to be the
+# number of args. The last int of the list reply is not documented.
+# /eos/out/get/cp/2/list/0/6, 1(i), 4992522F-2884-4DF1-BFF2-C72FC3CDDD16(s), Blue(s), False(F), False(F), 0(i)
+# /eos/out/get/cp/2/channels/list/0/7, 1(i), 4992522F-2884-4DF1-BFF2-C72FC3CDDD16(s), 31-47(s), 151-166(s), 201-204(s), 211-212(s), 401-423(s)
+# /eos/out/get/cp/2/byType/list/0/7, 1(i), 4992522F-2884-4DF1-BFF2-C72FC3CDDD16(s), 31(i), 151(i), 201(i), 211(i), 401(i)
+CP_OUT_PREFIX = "/eos/out/get/cp/"
+
+
+def parse_cp_reply(address, args):
+    """
+    Parse one reply to /eos/get/cp/index/<index #>. EOS answers each
+    request with three messages, after /eos/out/get/cp/:
+        <cp#>/list/<listIndex>/<listCount>
+            args: index, UID, label, absolute, locked, undefined int
+        <cp#>/channels/list/<listIndex>/<listCount>
+            args: index, UID, channel ranges as strings (or int for a
+            single channel)
+        <cp#>/byType/list/<listIndex>/<listCount>
+            args: index, UID, by type channels
+    Returns (uid, fields) where fields is the dict of palette details
+    the message carries, empty for other reply types. Returns None if
+    address is not a color palette reply.
+    """
+    start = address.find(CP_OUT_PREFIX)
+    if start < 0:
+        return None
+    cp_address = address[start + len(CP_OUT_PREFIX):].split("/")
+    if len(cp_address) < 2:
+        return None
+    cp, response_type = cp_address[0], cp_address[1]
+    cp_index = args[0]
+    cp_uid = args[1]
+    eos_out = f"{address}: {args}"
+    if response_type == "list":
+        return cp_uid, {
+            "eos_out": eos_out,
+            "palette_num": cp,
+            "cp_label": args[2],
+            "cp_index": cp_index,
+            "cp_list_listIndex": cp_address[2],
+            "cp_list_num_args": cp_address[3],
+            "cp_type_absolute": args[3],
+            "cp_locked": args[4],
+            "cp_undefined_int": args[5]
+        }
+    if response_type == "channels":
+        # List count minus the index and UID is how many channel ranges.
+        # EOS sends a single channel as an int, keep them all strings
+        chan_ranges = [str(item) for item in args[2:int(cp_address[4])]]
+        return cp_uid, {
+            "eos_out": eos_out,
+            "palette_num": cp,
+            "cp_index": cp_index,
+            "cp_channels_listIndex": cp_address[3],
+            "cp_chan_num_args": cp_address[4],
+            "chan_ranges": chan_ranges
+        }
+    if response_type == "byType":
+        byType_channels = [str(item) for item in args[2:int(cp_address[4])]]
+        return cp_uid, {
+            "eos_out": eos_out,
+            "palette_num": cp,
+            "cp_index": cp_index,
+            "cp_byType_listIndex": cp_address[3],
+            "cp_byType_num_args": cp_address[4],
+            "byType_channels": byType_channels
+        }
+    return cp_uid, {}
+
+
+# Color palette export defaults, see PaletteExporter
+PALETTE_EXPORT_WINDOW = 16
+PALETTE_REQUEST_TIMEOUT = 1.0
+PALETTE_EXPORT_RETRIES = 3
+# Reply types that complete one /eos/get/cp/index/N request
+CP_REPLY_TYPES = frozenset(("list", "channels", "byType"))
+
+
+def _cp_reply_complete(replies):
+    """
+    True once list, channels and byType replies have all arrived
+    """
+    seen = set()
+    for address, _args in replies:
+        parts = address[address.find(CP_OUT_PREFIX) +
+                         len(CP_OUT_PREFIX):].split("/")
+        if len(parts) > 1:
+            seen.add(parts[1])
+    return CP_REPLY_TYPES <= seen
+
+
+class PaletteExporter:
+    """
+    Reads every color palette with up to window /eos/get/cp/index/N
+    requests in flight at once, so export time is about count / window
+    round trips instead of one round trip per palette. Replies are
+    matched to their request by index and merged per palette UID. Any
+    index that times out is asked again, up to retries times.
+    example:
+        exporter = PaletteExporter(myosc, window=32)
+        palettes = exporter.export()
+        logger.info(exporter.report())
+    """
+
+    def __init__(self, osc, window=PALETTE_EXPORT_WINDOW,
+                 timeout=PALETTE_REQUEST_TIMEOUT,
+                 retries=PALETTE_EXPORT_RETRIES):
+        """
+        osc: etcosc in txrx mode, requests go through osc.request
+        window: index requests outstanding at once
+        timeout: seconds to wait for all three replies of one index
+        retries: extra attempts for an index that timed out
+        """
+        self.osc = osc
+        self.window = max(1, int(window))
+        self.timeout = timeout
+        self.retries = retries
+        self.palettes = {}
+        self.stats = {}
+
+    def _request_index(self, index):
+        return self.osc.request(
+            f"/eos/get/cp/index/{index}", reply_prefix=CP_OUT_PREFIX,
+            expect=_cp_reply_complete,
+            match=lambda address, args: bool(args) and args[0] == index,
+            timeout=self.timeout)
+
+    def export(self, count=None):
+        """
+        Fetch count palettes, None asks the console for the count.
+        Returns {UID: palette fields}, the fields parse_cp_reply gives
+        for list, channels and byType merged into one dict. Indexes
+        that still failed after the retries are listed in
+        stats['failed']. Raises concurrent.futures.TimeoutError if the
+        console does not answer the count.
+        """
+        start = time.monotonic()
+        if count is None:
+            replies = self.osc.request("/eos/get/cp/count",
+                                       timeout=self.timeout).result()
+            count = int(replies[0][1][0])
+        waiting = deque(range(count))
+        attempts = {}
+        in_flight = {}
+        failed = []
+        retried = 0
+        self.palettes = {}
+        while waiting or in_flight:
+            while waiting and len(in_flight) < self.window:
+                index = waiting.popleft()
+                attempts[index] = attempts.get(index, 0) + 1
+                in_flight[self._request_index(index)] = index
+            done, _pending = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                try:
+                    replies = future.result()
+                except FutureTimeoutError:
+                    if attempts[index] <= self.retries:
+                        retried += 1
+                        waiting.append(index)
+                    else:
+                        failed.append(index)
+                        logger.warning("Color palette index %s failed after "
+                                       "%s attempts", index, attempts[index])
+                    continue
+                for address, args in replies:
+                    parsed = parse_cp_reply(address, args)
+                    if parsed:
+                        uid, fields = parsed
+                        self.palettes.setdefault(uid, {}).update(fields)
+        seconds = time.monotonic() - start
+        self.stats = {
+            "count": count,
+            "exported": len(self.palettes),
+            "requests": sum(attempts.values()),
+            "retried": retried,
+            "failed": sorted(failed),
+            "seconds": seconds,
+            "palettes_per_sec": len(self.palettes) / seconds if seconds else 0.0,
+            "window": self.window,
+        }
+        return self.palettes
+
+    def report(self):
+        """
+        One line summary of the last export
+        """
+        stats = self.stats
+        if not stats:
+            return "No color palette export run yet"
+        return (f"Exported {stats['exported']}/{stats['count']} color palettes "
+                f"in {stats['seconds']:.2f}s "
+                f"({stats['palettes_per_sec']:.1f}/s, window {stats['window']}, "
+                f"{stats['retried']} retries, {len(stats['failed'])} failed)")
@@ -0,0 +1,330 @@
+"""
+This script was created with the help of AI.
+Confirms sent commands by the /eos/out messages the console echoes.
+A tracked command waits for a reply address pattern or address
+prefix. Pending commands sit in a deadline heap drained by one reaper
+thread, so any number of commands can be pipelined and their failures
+reported through callbacks instead of sleeping after each send.
+"""
+
+import functools
+import heapq
+import itertools
+import logging
+import threading
+import time
+from osc.linkstats import LinkStats
+from osc.logging_config import setup_logging
+from osc.oscmatch import AddressIndex
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for a confirming reply
+CONFIRM_TIMEOUT = 1.0
+# Confirmations per command type the latency stats cover
+CONFIRM_STATS_WINDOW = 200
+CONFIRM_STATES = ('pending', 'confirmed', 'timeout', 'cancelled')
+
+
+class PendingConfirmation:
+    """
+    One tracked command. replies holds the (address, args) that
+    matched, latency is the seconds from tracking to the last reply
+    needed.
+    """
+    __slots__ = ('command_type', 'pattern', 'prefix', 'match', 'expect',
+                 'replies',
+                 'sent', 'deadline', 'state', 'latency', 'callback',
+                 '_event')
+
+    def __init__(self, command_type, pattern, prefix, match, expect,
+                 timeout, callback):
+        self.command_type = command_type
+        self.pattern = pattern
+        self.prefix = prefix
+        self.match = match
+        self.expect = expect
+        self.replies = []
+        self.sent = time.monotonic()
+        self.deadline = self.sent + timeout
+        self.state = 'pending'
+        self.latency = None
+        self.callback = callback
+        self._event = threading.Event()
+
+    @property
+    def confirmed(self):
+        return self.state == 'confirmed'
+
+    def done(self):
+        """
+        True once confirmed, timed out or cancelled
+        """
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Block until the command is resolved, returns True if confirmed
+        """
+        self._event.wait(timeout)
+        return self.state == 'confirmed'
+
+
+class ConfirmationTracker:
+    """
+    Matches received messages against tracked commands. The tracker
+    sees every received message through one OSCHandler rx hook, so
+    replies reach it whatever listeners are registered on the same
+    addresses. A reply goes to the oldest pending command for each
+    reply pattern or prefix it matches whose match accepts it. Patterns
+    are only routed while commands are pending on them, the hook is
+    removed when nothing is. Confirmation latency and timeouts are kept
+    per command type.
+    """
+
+    def __init__(self, osc_handler, timeout=CONFIRM_TIMEOUT,
+                 stats_window=CONFIRM_STATS_WINDOW):
+        """
+        osc_handler: OSCHandler the replies arrive on
+        timeout: default seconds to wait for a reply
+        stats_window: confirmations per command type the latency stats
+            cover
+        """
+        self.osc_handler = osc_handler
+        self.timeout = timeout
+        self.stats_window = stats_window
+        # (reply pattern or prefix, is prefix): [PendingConfirmation]
+        self._pending = {}
+        # (AddressIndex of pattern keys, tuple of prefixes), rebuilt
+        # when a key comes or goes, read unlocked by the receive thread
+        self._routes = (AddressIndex(), ())
+        self._hooked = False
+        self._deadlines = []    # heap of (deadline, sequence, entry)
+        self._sequence = itertools.count()
+        self._stats = {}        # command type: LinkStats
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def track(self, command_type, pattern, match=None, expect=1,
+              timeout=None, callback=None, prefix=False):
+        """
+        Start waiting for the reply to a command, call before sending
+        it so a fast reply cannot be missed.
+        command_type: name the latency stats are kept under, for
+            example 'cmd' or 'wheel'
+        pattern: reply address or OSC address pattern, for example
+            '/eos/out/user/*/cmd'
+        match: optional callable(address, args) returning True if the
+            reply belongs to this command
+        expect: replies needed to confirm, or a callable(replies)
+            returning True once the replies so far are complete
+        timeout: seconds, default the tracker timeout
+        callback: optional callable(entry) run once resolved, on the
+            receive thread when confirmed or on the reaper thread on
+            timeout
+        prefix: pattern is a plain address prefix, every address
+            starting with it is a candidate reply
+        Returns the PendingConfirmation.
+        """
+        if not callable(expect):
+            expect = max(1, int(expect))
+        entry = PendingConfirmation(
+            command_type, pattern, prefix, match, expect,
+            self.timeout if timeout is None else timeout, callback)
+        key = (pattern, prefix)
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("ConfirmationTracker is stopped")
+            waiting = self._pending.get(key)
+            if waiting is None:
+                waiting = self._pending[key] = []
+                self._rebuild_routes()
+            waiting.append(entry)
+            heapq.heappush(self._deadlines,
+                           (entry.deadline, next(self._sequence), entry))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._reap, name='osc-confirm', daemon=True)
+                self._thread.start()
+            elif self._deadlines[0][2] is entry:
+                # New earliest deadline, wake the reaper
+                self._cond.notify()
+        return entry
+
+    def _rebuild_routes(self):
+        """
+        Route replies for the keys now pending, adds or removes the rx
+        hook as needed. Call with the lock held.
+        """
+        index = AddressIndex()
+        prefixes = []
+        for key in self._pending:
+            pattern, prefix = key
+            if prefix:
+                prefixes.append(pattern)
+            else:
+                index.add(pattern, key)
+        self._routes = (index, tuple(prefixes))
+        if self._pending and not self._hooked:
+            self.osc_handler.add_rx_hook(self._route)
+            self._hooked = True
+        elif not self._pending and self._hooked:
+            self.osc_handler.remove_rx_hook(self._route)
+            self._hooked = False
+
+    def _release(self, key, entry):
+        """
+        Take a resolved entry off its key, the key stops being routed
+        once nothing waits on it. Call with the lock held.
+        """
+        waiting = self._pending[key]
+        waiting.remove(entry)
+        if not waiting:
+            del self._pending[key]
+            self._rebuild_routes()
+
+    def _route(self, address):
+        """
+        rx hook, returns a callable delivering the message to every
+        key it matches, None if it matches none
+        """
+        index, prefixes = self._routes
+        keys = index.match(address)
+        if prefixes and address.startswith(prefixes):
+            keys += tuple((prefix, True) for prefix in prefixes
+                          if address.startswith(prefix))
+        if not keys:
+            return None
+        return functools.partial(self._deliver, keys)
+
+    def _deliver(self, keys, address, *args):
+        for key in keys:
+            self._on_reply(key, address, args)
+
+    def _on_reply(self, key, address, args):
+        now = time.monotonic()
+        with self._cond:
+            waiting = self._pending.get(key)
+            if not waiting:
+                return
+            for entry in waiting:
+                if entry.match is None or entry.match(address, args):
+                    break
+            else:
+                return
+            entry.replies.append((address, args))
+            if callable(entry.expect):
+                if not entry.expect(entry.replies):
+                    return
+            elif len(entry.replies) < entry.expect:
+                return
+            self._release(key, entry)
+            entry.state = 'confirmed'
+            entry.latency = now - entry.sent
+            self._stats_for(entry.command_type).record_rtt(entry.latency)
+        self._resolve(entry)
+
+    def _reap(self):
+        """
+        Reaper thread, times out entries as their deadlines pass.
+        Confirmed entries stay in the heap until their deadline and are
+        skipped then.
+        """
+        while True:
+            expired = []
+            with self._cond:
+                while not self._stopped:
+                    if not self._deadlines:
+                        self._cond.wait()
+                        continue
+                    wait = self._deadlines[0][0] - time.monotonic()
+                    if wait > 0:
+                        self._cond.wait(wait)
+                        continue
+                    break
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    entry = heapq.heappop(self._deadlines)[2]
+                    if entry.state != 'pending':
+                        continue
+                    self._release((entry.pattern, entry.prefix), entry)
+                    entry.state = 'timeout'
+                    self._stats_for(entry.command_type).record_loss()
+                    expired.append(entry)
+            for entry in expired:
+                # A callback owner reports the failure itself
+                level = logging.DEBUG if entry.callback else logging.WARNING
+                logger.log(level, "No confirmation for %s on %s after %.3fs",
+                           entry.command_type, entry.pattern,
+                           now - entry.sent)
+                self._resolve(entry)
+
+    def _resolve(self, entry):
+        entry._event.set()
+        if entry.callback:
+            try:
+                entry.callback(entry)
+            except Exception:
+                logger.exception("Confirmation callback failed")
+
+    def _stats_for(self, command_type):
+        """
+        Call with the lock held
+        """
+        stats = self._stats.get(command_type)
+        if stats is None:
+            stats = self._stats[command_type] = LinkStats(
+                name=command_type, window=self.stats_window, interval=None)
+        return stats
+
+    def pending(self):
+        """
+        Number of commands waiting for a reply
+        """
+        with self._cond:
+            return sum(len(waiting) for waiting in self._pending.values())
+
+    def stats(self):
+        """
+        Returns per command type: confirmed and timed_out counts,
+        timeout_rate over the stats window and the confirmation latency
+        p50, p90, p99, max and mean in seconds
+        """
+        with self._cond:
+            snapshots = {command_type: stats.snapshot()
+                         for command_type, stats in self._stats.items()}
+        return {
+            command_type: {
+                'confirmed': snapshot['received'],
+                'timed_out': snapshot['lost'],
+                'timeout_rate': snapshot['loss_rate'],
+                'p50': snapshot['p50'],
+                'p90': snapshot['p90'],
+                'p99': snapshot['p99'],
+                'max': snapshot['max'],
+                'mean': snapshot['mean'],
+            }
+            for command_type, snapshot in snapshots.items()
+        }
+
+    def stop(self):
+        """
+        Stop the reaper, pending commands are resolved as cancelled
+        """
+        with self._cond:
+            self._stopped = True
+            cancelled = [entry for waiting in self._pending.values()
+                         for entry in waiting]
+            self._pending.clear()
+            self._rebuild_routes()
+            self._deadlines.clear()
+            self._cond.notify_all()
+        for entry in cancelled:
+            entry.state = 'cancelled'
+            self._resolve(entry)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
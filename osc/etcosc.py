@@ -18,16 +18,34 @@ Non-numeric arguments are treated as strings
 #       - determine differences in the different console OSC address
 #           formats
 
+import asyncio
 import logging
 import threading
 import time
-from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from osc.etc_tracker import CONFIRM_TIMEOUT, ConfirmationTracker
+from osc.linkstats import LINK_STATS_LOG_INTERVAL, LINK_STATS_WINDOW, LinkStats
 from osc.logging_config import setup_logging
-from osc.oschandler import OSCHandler
+from osc.oschandler import OSC_RX_QUEUE_SIZE, OSCHandler
+from osc.ratelimit import AIMDController
 
 
 # How often to send ping command to the console
 PING_FREQUENCY = 1.0
+# Seconds without a reply before a ping counts as lost
+PING_TIMEOUT = 2.0
+# Ping sequence ids wrap here, keeps them a compact int32
+PING_SEQUENCE_LIMIT = 2**31
+# Seconds request() waits for all replies
+REQUEST_TIMEOUT = 2.0
+# Wheel integrator defaults, see eos_send_wheel
+WHEEL_SEND_INTERVAL = 0.05
+WHEEL_MAX_TICKS = None
+WHEEL_STALE_INTERVAL = 0.75
+# Bounds of send_interval='adaptive', it starts at WHEEL_SEND_INTERVAL
+ADAPTIVE_MIN_INTERVAL = 0.01
+ADAPTIVE_MAX_INTERVAL = 0.25
 
 # Logger
 setup_logging()
@@ -46,7 +64,12 @@ class etcosc:
         rx_udp_ip='0.0.0.0',
         rx_port=None,
         ping=True,
-        ping_frequency=PING_FREQUENCY
+        ping_frequency=PING_FREQUENCY,
+        ping_timeout=PING_TIMEOUT,
+        link_stats_window=LINK_STATS_WINDOW,
+        link_stats_interval=LINK_STATS_LOG_INTERVAL,
+        adaptive_min_interval=ADAPTIVE_MIN_INTERVAL,
+        adaptive_max_interval=ADAPTIVE_MAX_INTERVAL
     ):
         """
         When initialized, set following:
@@ -71,6 +94,12 @@ class etcosc:
         ping argument requires txrx, it will send ping command every 
         ping_frequency seconds and calculate latency. Shouldn't need to
         disable for most cases. Calling script can receive latency.
+        A ping not answered within ping_timeout seconds counts as lost.
+        link_stats_window sets how many recent pings get_link_stats
+        covers, a summary line is logged every link_stats_interval
+        seconds (0 to disable).
+        adaptive_min_interval and adaptive_max_interval bound the send
+        interval used by send_interval='adaptive', see eos_send_wheel.
         """
         self.mode=mode
         self.tx_udp_ip=tx_udp_ip
@@ -81,13 +110,35 @@ class etcosc:
         self.user=None # see change_user method
         self.base_address=f"/{self.console}"
         self.last_send_interval = -1.0
-        self.ping_queue = deque(maxlen=10)
         self.ping_latency = 0
         # How often we should send a ping message
         self.ping_timer = ping_frequency
+        self.ping_timeout = ping_timeout
         self.ping_started = False
-        self.wheel_tracker = {}
-        self.wheel_deque = deque(maxlen=50)
+        # sequence id: time.monotonic() when sent, oldest first
+        self._ping_outstanding = {}
+        self._ping_sequence = 0
+        self._ping_lock = threading.Lock()
+        self._ping_stop = threading.Event()
+        self._ping_send_thread = None
+        # Ping reply addresses listened on, AddressIndex has no remove
+        # so each is registered once across stop_ping and start_ping
+        self._ping_listening = set()
+        # Rolling ping round trip stats, see get_link_stats
+        self.link_stats = LinkStats(name=f"{self.console}-link",
+                                    window=link_stats_window,
+                                    interval=link_stats_interval)
+        # Send interval for send_interval='adaptive', fed by ping
+        self.send_control = AIMDController(
+            min_interval=adaptive_min_interval,
+            max_interval=adaptive_max_interval,
+            initial_interval=min(max(WHEEL_SEND_INTERVAL,
+                                     adaptive_min_interval),
+                                 adaptive_max_interval))
+        self.wheel_integrator = None
+        # Created on first send_confirmed or request
+        self.confirmations = None
+        self._tracker_lock = threading.Lock()
 
         self.osc_handler = OSCHandler(
             mode=self.mode,
@@ -104,8 +155,7 @@ class etcosc:
             f"rx_port={self.rx_port} "
         )
         if self.mode == "txrx" and ping and self.ping_timer > 0:
-            self._start_ping()
-        self._ping_thread = None
+            self.start_ping()
 
     # Send message directly to oschandler
     def osc_send_raw(self, address, *args, send_interval=0.0):
@@ -118,16 +168,125 @@ class etcosc:
                                                rate_limit_mode='buffer')
             self.last_send_interval = send_interval
         self.osc_handler.send_message(address, args)
-        logger.info(f"sent {address} {args}")
+        logger.info("sent %s %s", address, args)
     
-    def osc_receiver_raw(self, address, handler, partial_string=False):
+    def send_confirmed(self, address, *args, reply, command_type=None,
+                       match=None, expect=1, timeout=CONFIRM_TIMEOUT,
+                       callback=None):
+        """
+        Send a message and track the console reply that confirms it.
+        Needs mode='txrx', raises ValueError otherwise. Returns a
+        PendingConfirmation at once, call its wait() to block, or pass
+        callback to be told later, so many commands can be in flight.
+        reply: address or pattern of the confirming message, for
+            example '/eos/out/user/*/cmd' after a command line send
+        command_type: name the confirmation latency is kept under,
+            default the reply pattern
+        match: optional callable(address, args), True if the reply
+            belongs to this command
+        expect: replies needed, timeout: seconds to wait for them
+        callback: callable(entry), entry.confirmed tells the outcome
+        example:
+            done = myosc.send_confirmed('/eos/get/cp/count',
+                                        reply='/eos/out/get/cp/count')
+            if done.wait():
+                count = done.replies[0][1][0]
+        See get_confirmation_stats.
+        """
+        entry = self._tracker('send_confirmed').track(
+            command_type or reply, reply, match=match, expect=expect,
+            timeout=timeout, callback=callback)
+        self.osc_handler.send_message(address, list(args))
+        return entry
+
+    def request(self, address, args=(), reply_prefix=None, expect=1,
+                match=None, timeout=REQUEST_TIMEOUT):
+        """
+        Send a query and return a concurrent.futures.Future of its
+        replies, a list of (address, args). Needs mode='txrx', raises
+        ValueError otherwise. Any number of requests can be in flight,
+        each caller only waits on its own future.
+        reply_prefix: replies start with this address prefix, default
+            the address with /eos/ swapped for /eos/out/
+        expect: replies that complete the request, or a
+            callable(replies) returning True once complete
+        match: optional callable(address, args), True if the reply
+            belongs to this request. Needed when several requests share
+            a prefix and their replies can't be told apart by order.
+        timeout: seconds, then the future fails with TimeoutError
+        example:
+            count = myosc.request('/eos/get/cp/count').result()[0][1][0]
+            index = myosc.request(
+                '/eos/get/cp/index/0', reply_prefix='/eos/out/get/cp/',
+                expect=3, match=lambda address, args: args[0] == 0)
+        """
+        if reply_prefix is None:
+            reply_prefix = address.replace('/eos/', '/eos/out/', 1)
+        future = Future()
+        def resolve(entry):
+            try:
+                if entry.confirmed:
+                    future.set_result(entry.replies)
+                else:
+                    future.set_exception(FutureTimeoutError(
+                        f"{address}: {entry.state} with "
+                        f"{len(entry.replies)} replies"))
+            except InvalidStateError:
+                pass
+        self._tracker('request').track(
+            reply_prefix, reply_prefix, match=match, expect=expect,
+            timeout=timeout, callback=resolve, prefix=True)
+        self.osc_handler.send_message(address, list(args))
+        return future
+
+    async def request_async(self, address, args=(), reply_prefix=None,
+                            expect=1, match=None, timeout=REQUEST_TIMEOUT):
+        """
+        Awaitable request(), same arguments, returns the replies
+        """
+        return await asyncio.wrap_future(self.request(
+            address, args, reply_prefix, expect=expect, match=match,
+            timeout=timeout))
+
+    def _tracker(self, caller):
+        """
+        The confirmation tracker, created on first use
+        """
+        if self.mode != 'txrx':
+            raise ValueError(f"{caller} needs mode='txrx', etcosc has "
+                             f"mode='{self.mode}'")
+        with self._tracker_lock:
+            if self.confirmations is None:
+                self.confirmations = ConfirmationTracker(self.osc_handler)
+        return self.confirmations
+
+    def get_confirmation_stats(self):
+        """
+        Returns per command type confirmed and timed_out counts,
+        timeout_rate and confirmation latency p50, p90, p99, max and
+        mean in seconds
+        """
+        if self.confirmations is None:
+            return {}
+        return self.confirmations.stats()
+
+    def osc_receiver_raw(self, address, handler, partial_string=False,
+                         executor='inline', queue_size=OSC_RX_QUEUE_SIZE,
+                         overflow='drop_oldest'):
         """
         Simple receive OSC raw method
+        executor, queue_size and overflow are passed on, see
+        OSCHandler.register_osc_listener. Use executor='dedicated' for
+        handlers that do file or network work.
         """
         if partial_string:
-            self.osc_handler.register_osc_substring(address, handler)
+            self.osc_handler.register_osc_substring(
+                address, handler, executor=executor, queue_size=queue_size,
+                overflow=overflow)
         else:
-            self.osc_handler.register_osc_listener(address, handler)
+            self.osc_handler.register_osc_listener(
+                address, handler, executor=executor, queue_size=queue_size,
+                overflow=overflow)
 
     def define_console(self, console='eos'):
         """
@@ -213,7 +372,7 @@ class etcosc:
             self.last_send_interval = send_interval
         command_string = '/'.join(self.base_address,args)
         self.osc_handler.send_message(command_string, '')
-        logger.info(f"sent: {command_string})")
+        logger.info("sent: %s", command_string)
 
     # eos out wheel
     def eos_send_wheel(self,
@@ -223,8 +382,9 @@ class etcosc:
         ticks=0.0,
         fine=False,
         coarse_explicit=False,
-        send_interval=0.05,
-        stale_interval=0.75
+        send_interval=WHEEL_SEND_INTERVAL,
+        stale_interval=WHEEL_STALE_INTERVAL,
+        max_ticks=WHEEL_MAX_TICKS
     ):
         """
         Sends the OSC Wheel command.
@@ -245,7 +405,18 @@ class etcosc:
         index: /eos/active/wheel/(coarse|fine/)<index> <(float)>
         param: /eos/wheel/(coarse|fine/)<param> <(float)>
         send_interval: sets number of seconds between packets,
-            prevents console lag. set to 0 to disable.
+            prevents console lag. set to 0 to disable. Ticks sent
+            between packets are summed per wheel and sent as one delta
+            at the next slot, so no motion is lost.
+            'adaptive' follows the console: the interval shrinks while
+            ping round trips stay flat and grows when they rise or
+            pings are lost, see get_send_rate. Needs ping (txrx),
+            without it the interval stays at WHEEL_SEND_INTERVAL.
+        stale_interval: summed ticks not sent within this many seconds
+            are discarded, stops a held backlog moving the fixture
+            after the stick is released.
+        max_ticks: largest delta sent in one packet, None for no limit.
+            Anything over the limit carries into the next slot.
         returns: /eos/out/active/wheel/2 "Red  [78]"(s), 3(i), 77.900(f) 
             "Red [78]" param name and rounded value
             3(int) = I believe this is param class - color is 3
@@ -259,17 +430,8 @@ class etcosc:
         except ValueError:
             logger.error(f"ticks={ticks} must be a number")
             return
-        # We will use the current time to remove stale data in case of
-        # long call periods between this method
-        current_time = time.time()
-        wheel_dict = {
-            'address': '',
-            'ticks': ticks,
-            'age': current_time
-        }
         _wheel_address = self.base_address
         _mode = ''
-        param_key = param
         if fine:
             _mode = '/fine'
         elif coarse_explicit:
@@ -279,44 +441,32 @@ class etcosc:
                 logger.error("wheel_type='param' requires param='parameter'")
                 return
             else:
-                wheel_dict['address'] = f"{_wheel_address}/wheel{_mode}/{param}"
+                send_address = f"{_wheel_address}/wheel{_mode}/{param}"
         elif wheel_type.lower() == 'index':
             try:
                 _index = int(index)
-                wheel_dict['address'] = (
+                send_address = (
                     f"{_wheel_address}/active/wheel{_mode}/{_index}")
-                param_key = f"{index}"
             except ValueError:
                 logger.error(f"index={index} not a valid number")
                 return
         else:
             logger.error(f"wheel_type={wheel_type} not recognized")
             return
-        # Check if item already exists in dictionary. if so update dictionary
-        # item, if not add it and add to deque
-        if param_key not in self.wheel_tracker:
-            self.wheel_deque.append(param_key)
-        self.wheel_tracker[param_key] = wheel_dict
-        # We will pop from the deque and make sure the data is fresh enough
-        fresh_data = False
-        to_output = {}
-        while self.wheel_deque and not fresh_data:
-            deque_key = self.wheel_deque.popleft()
-            to_output = self.wheel_tracker.pop(deque_key)
-            age_check = to_output['age']
-            if current_time < age_check + stale_interval:
-                fresh_data = True
-        # Send value out
-        if fresh_data:
-            if send_interval != self.last_send_interval:
-                self.osc_handler.set_tx_rate_limit(
-                    min_send_interval=send_interval,
-                    rate_limit_mode='drop'
-                )
-                self.last_send_interval = send_interval
-            send_address = to_output['address']
-            send_ticks = to_output['ticks']
-            self.osc_handler.send_message(send_address, send_ticks)
+        if send_interval == 'adaptive':
+            send_interval = self.send_control.get_interval
+        elif send_interval <= 0:
+            self.osc_handler.send_message(send_address, round(_ticks, 3))
+            return
+        if not self.wheel_integrator:
+            self.wheel_integrator = WheelIntegrator(self.osc_handler)
+        self.wheel_integrator.add(
+            send_address,
+            _ticks,
+            send_interval=send_interval,
+            stale_interval=stale_interval,
+            max_ticks=max_ticks
+        )
 
     def osc_settings_reset(self):
         """
@@ -361,47 +511,113 @@ class etcosc:
         """
         return self.ping_latency
 
+    def get_link_stats(self):
+        """
+        Returns the ping statistics over the last link_stats_window
+        pings, times in seconds: p50, p90, p99, max, mean and jitter of
+        the round trip, loss_rate, and received and lost counts since
+        start. See LinkStats.snapshot.
+        """
+        return self.link_stats.snapshot()
+
+    def get_send_rate(self):
+        """
+        Returns the adaptive send control state: rate (messages per
+        second per wheel), interval (seconds), srtt and base_rtt (the
+        smoothed and lowest ping round trips it works from) and how
+        many increases and decreases it made.
+        """
+        return self.send_control.stats()
+
     def stop(self):
         """Stops the OSC server thread."""
+        self.stop_ping()
+        self.link_stats.stop()
+        if self.confirmations:
+            self.confirmations.stop()
+        if self.wheel_integrator:
+            self.wheel_integrator.stop()
         if hasattr(self.osc_handler, 'stop_receiving'):
             self.osc_handler.stop_receiving()
-            if self._ping_thread and self._ping_thread.is_alive():
-                # In a real implementation, you'd use an event to signal the thread to stop
-                logger.info("Ping thread will stop on its own as it is a daemon.")
 
-    def _start_ping(self):
+    def start_ping(self):
         """
-        Will start the ping process in a thread
+        Register the ping reply listener if not yet done, then start
+        the ping thread.
+        Started on init in txrx mode unless ping=False.
         """
         if not self.ping_started:
+            self._ping_receive()
+            self._ping_stop.clear()
             self._ping_send_thread = threading.Thread(
-                target=self._ping_send, daemon=True
+                target=self._ping_send, name='etcosc-ping', daemon=True
             )
             self._ping_send_thread.start()
-            self._ping_receive_thread = threading.Thread(
-                target=self._ping_receive, daemon=True
-            )
-            self._ping_receive_thread.start()
+            self.link_stats.start()
             logger.info("ping started")
             self.ping_started = True
 
-    def _ping_send(self):
+    def stop_ping(self):
         """
-        Sends a ping as with time as an arg. Uses
-        response to determine latency. Should return an error if no
-        response.
-        Timecode float must be sent as a string, EOS cannot handle 
-        floats that large, and returns the wrong args
+        Stop the ping thread, outstanding pings are forgotten and the
+        link stats are kept
         """
-        ping_base = f"/{self.console}"
-        ping_address = f"{ping_base}/ping"
-        while True:
-            ping_time = str(time.time())
-            self.ping_queue.append(ping_time)
-            self.osc_handler.send_message(ping_address, ping_time)
-            time.sleep(self.ping_timer)
-            # Next will be receiving ping time
+        self._ping_stop.set()
+        if self._ping_send_thread and self._ping_send_thread.is_alive():
+            self._ping_send_thread.join(timeout=1.0)
+        with self._ping_lock:
+            self._ping_outstanding.clear()
+        self.ping_started = False
 
+    def _ping_send(self):
+        """
+        Ping thread. Sends a sequence id as the ping argument every
+        ping_timer seconds and expires pings older than ping_timeout.
+        Send times are kept here with time.monotonic(), the console
+        only echoes the small int back.
+        Sends are scheduled on a fixed grid, a late wake up does not
+        push later pings back, missed slots are skipped.
+        """
+        ping_address = f"/{self.console}/ping"
+        ping = self.osc_handler.prepare(ping_address, 'i')
+        next_due = time.monotonic()
+        while not self._ping_stop.is_set():
+            now = time.monotonic()
+            with self._ping_lock:
+                sequence = self._ping_sequence
+                self._ping_sequence = (sequence + 1) % PING_SEQUENCE_LIMIT
+                self._ping_outstanding[sequence] = now
+            try:
+                ping.send(sequence)
+            except OSError as e:
+                logger.warning("Ping send failed: %s", e)
+            self._expire_pings(now)
+            next_due += self.ping_timer
+            if next_due < now:
+                next_due = now + self.ping_timer
+            self._ping_stop.wait(next_due - time.monotonic())
+
+    def _expire_pings(self, now):
+        """
+        Count pings sent more than ping_timeout ago as lost
+        """
+        deadline = now - self.ping_timeout
+        expired = []
+        with self._ping_lock:
+            # The dict keeps send order, stop at the first live ping
+            for sequence, sent in self._ping_outstanding.items():
+                if sent > deadline:
+                    break
+                expired.append(sequence)
+            for sequence in expired:
+                del self._ping_outstanding[sequence]
+        if expired:
+            # We can't have a latency if we don't receive a response
+            self.ping_latency = -1
+            self.link_stats.record_loss(len(expired))
+            self.send_control.on_loss(len(expired))
+            logger.info("Ping lost: %s no reply within %ss", expired,
+                        self.ping_timeout)
 
     def _ping_receive(self):
         """
@@ -410,39 +626,35 @@ class etcosc:
         """
         ping_base = f"/{self.console}"
         ping_address = f"{ping_base}/out/ping"
+        if ping_address in self._ping_listening:
+            return
+        self._ping_listening.add(ping_address)
         self.osc_handler.register_osc_listener(ping_address,
                                                self._ping_handler)
 
     def _ping_handler(self, address, *args):
         """
         When console returns a ping (/eos/out/ping args) it gets passed
-        here. Checks for lost pings and calculates the latency from
-        the sent timestamp to the current time when console returns
-        that same timestamp
+        here. The echoed sequence id is looked up in the outstanding
+        pings, so replies may arrive in any order. A reply after its
+        ping expired is ignored, it was already counted as lost.
         """
+        now = time.monotonic()
         try:
-            ping_return = float(args[0])
-        except Exception:
-            logger.warning(f"Could not parse ping_return: {args[0]}")
+            sequence = int(args[0])
+        except (IndexError, TypeError, ValueError):
+            logger.warning("Could not parse ping return: %s", args)
             return
-        # Search through queue for ping match
-        matched = False
-        while self.ping_queue:
-            ping_sent = float(self.ping_queue.popleft())
-            if ping_return == ping_sent:
-                matched = True
-                self.ping_latency = round(time.time() - ping_return, 6)
-                logger.info(
-                    f"Rx: {address} {ping_return} Latency:{self.ping_latency}"
-                )
-                break
-            else:
-                logger.info(f"Ping Lost: sent {ping_sent} return {ping_return}")
-                # We can't have a latency if we don't receive a response
-                self.ping_latency = -1
-        # If no match in the ping queue
-        if not matched:
-            logger.warning(f"Returned ping {ping_return} had no match in queue")
+        with self._ping_lock:
+            sent = self._ping_outstanding.pop(sequence, None)
+        if sent is None:
+            logger.debug("Ping %s returned late or unknown", sequence)
+            return
+        self.ping_latency = round(now - sent, 6)
+        self.link_stats.record_rtt(now - sent)
+        self.send_control.on_rtt(now - sent)
+        logger.debug("Rx: %s %s Latency:%s", address, sequence,
+                     self.ping_latency)
 
 
 
@@ -502,9 +714,129 @@ class etcosc:
     # get patch
 
     # FIGURE OUT WHICH TYPES OF TX MESSAGES HAVE A RETURN MESSAGE
-    # THAT CAN BE USED TO VERIFY SEND
+    # THAT CAN BE USED TO VERIFY SEND, then check them with send_confirmed
     # /eos/chan/1/at 75 does not seem to return, but I may have done the string wrong the first time
     # that command also doesn't set the channel as active, so that is probably why it didn't return values
     # MAY NEED TO PROVIDE ABILITY TO CHOOSE BETWEEN SENDING ACTIVE CHANNEL DATA AND BACKGROUND DATA
 
-    # Later: Add some magic sheet functions
\ No newline at end of file
+    # Later: Add some magic sheet functions
+
+
+class WheelIntegrator:
+    """
+    Sums relative wheel ticks per OSC address between send slots and
+    sends the accumulated delta once per slot from a single thread.
+    Console traffic stays bounded by the send interval and ticks that
+    arrive between slots are not lost.
+    """
+
+    def __init__(self, osc_handler):
+        """
+        osc_handler: OSCHandler used to send, one prepared sender is
+            kept per wheel address
+        """
+        self.osc_handler = osc_handler
+        self.send_interval = WHEEL_SEND_INTERVAL
+        self.stale_interval = WHEEL_STALE_INTERVAL
+        self.max_ticks = WHEEL_MAX_TICKS
+        # address: [summed ticks, time of last add]
+        self._pending = {}
+        self._senders = {}
+        self._next_slot = 0.0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def add(self,
+        address,
+        ticks,
+        send_interval=WHEEL_SEND_INTERVAL,
+        stale_interval=WHEEL_STALE_INTERVAL,
+        max_ticks=WHEEL_MAX_TICKS
+    ):
+        """
+        Add relative ticks for a wheel address, they are sent at the
+        next slot together with anything else pending for the address.
+        send_interval may be a callable returning the interval, it is
+        asked again at every slot.
+        """
+        with self._cond:
+            self.send_interval = send_interval
+            self.stale_interval = stale_interval
+            self.max_ticks = max_ticks
+            entry = self._pending.get(address)
+            if entry:
+                entry[0] += ticks
+                entry[1] = time.monotonic()
+            else:
+                self._pending[address] = [ticks, time.monotonic()]
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='eos-wheel', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        """
+        Flush thread, sleeps while nothing is pending, otherwise sends
+        once per send_interval.
+        """
+        with self._cond:
+            while not self._stopped:
+                if not self._pending:
+                    self._cond.wait()
+                    continue
+                delay = self._next_slot - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                interval = self.send_interval
+                if callable(interval):
+                    interval = interval()
+                self._next_slot = time.monotonic() + interval
+                self._flush()
+
+    def _flush(self):
+        """
+        Send the summed delta for each pending wheel, clamped to
+        max_ticks with any excess carried to the next slot. Caller must
+        hold the condition lock.
+        """
+        now = time.monotonic()
+        for address in list(self._pending):
+            ticks, updated = self._pending[address]
+            if now - updated > self.stale_interval:
+                logger.info("Discarded stale wheel ticks %s %s", address,
+                            ticks)
+                del self._pending[address]
+                continue
+            delta = ticks
+            if self.max_ticks is not None:
+                delta = max(-self.max_ticks, min(self.max_ticks, ticks))
+            remainder = round(ticks - delta, 3)
+            if remainder:
+                self._pending[address][0] = remainder
+            else:
+                del self._pending[address]
+            delta = round(delta, 3)
+            if not delta:
+                continue
+            sender = self._senders.get(address)
+            if sender is None:
+                sender = self.osc_handler.prepare(address, 'f')
+                self._senders[address] = sender
+            try:
+                sender.send(delta)
+            except OSError as e:
+                logger.error("Wheel send %s failed: %s", address, e)
+
+    def stop(self):
+        """
+        Stop the flush thread, pending ticks are discarded.
+        """
+        with self._cond:
+            self._stopped = True
+            self._pending.clear()
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
@@ -0,0 +1,220 @@
+"""
+This script was created with the help of AI.
+Rolling round trip statistics for a console link. Every ping result is
+written into preallocated rings and a fixed set of histogram buckets,
+recording a sample allocates nothing, and the latency percentiles are
+read from the bucket counts instead of sorting samples.
+"""
+
+import bisect
+import logging
+import threading
+from array import array
+from osc.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Ping results the rolling window covers
+LINK_STATS_WINDOW = 100
+# Seconds between summary log lines
+LINK_STATS_LOG_INTERVAL = 10.0
+# Histogram bucket upper edges in seconds, 100 us to about 10 s in
+# steps of 20 percent. Percentiles are reported as a bucket edge.
+HISTOGRAM_EDGES = tuple(0.0001 * 1.2 ** step for step in range(64))
+# RFC 3550 style jitter smoothing, each sample moves it 1/16 of the way
+JITTER_GAIN = 1.0 / 16
+
+
+class LinkStats:
+    """
+    Latency percentiles, max, mean and jitter over the last window
+    replies, and the loss rate over the last window pings. record_rtt
+    and record_loss may be called from any thread.
+    """
+
+    def __init__(self, name='link', window=LINK_STATS_WINDOW,
+                 interval=LINK_STATS_LOG_INTERVAL):
+        """
+        name: used in the summary log line and the thread name
+        window: how many recent replies (and pings, for loss) the stats
+            cover
+        interval: seconds between summary lines, 0 or None keeps the
+            stats without a log thread
+        """
+        self.name = name
+        self.window = max(1, int(window))
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._samples = array('d', bytes(8 * self.window))
+        self._sample_buckets = array('H', bytes(2 * self.window))
+        self._buckets = array('I', bytes(4 * (len(HISTOGRAM_EDGES) + 1)))
+        self._next_sample = 0
+        self._sample_count = 0
+        self._sample_sum = 0.0
+        self._outcomes = bytearray(self.window)  # 1 lost, 0 answered
+        self._next_outcome = 0
+        self._outcome_count = 0
+        self._window_lost = 0
+        self._last_rtt = None
+        self.jitter = 0.0
+        self.received = 0
+        self.lost = 0
+        self.max_ever = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record_rtt(self, rtt):
+        """
+        Add one round trip time in seconds
+        """
+        bucket = bisect.bisect_left(HISTOGRAM_EDGES, rtt)
+        with self._lock:
+            slot = self._next_sample
+            if self._sample_count == self.window:
+                # Evict the oldest sample from the rolling histogram
+                self._buckets[self._sample_buckets[slot]] -= 1
+                self._sample_sum -= self._samples[slot]
+            else:
+                self._sample_count += 1
+            self._samples[slot] = rtt
+            self._sample_buckets[slot] = bucket
+            self._buckets[bucket] += 1
+            self._sample_sum += rtt
+            self._next_sample = (slot + 1) % self.window
+            if self._last_rtt is not None:
+                self.jitter += (abs(rtt - self._last_rtt) - self.jitter) * \
+                    JITTER_GAIN
+            self._last_rtt = rtt
+            self.received += 1
+            if rtt > self.max_ever:
+                self.max_ever = rtt
+            self._add_outcome(0)
+
+    def record_loss(self, count=1):
+        """
+        Count pings that were never answered
+        """
+        with self._lock:
+            self.lost += count
+            for _ in range(count):
+                self._add_outcome(1)
+
+    def _add_outcome(self, lost):
+        """
+        Call with the lock held
+        """
+        slot = self._next_outcome
+        if self._outcome_count == self.window:
+            self._window_lost -= self._outcomes[slot]
+        else:
+            self._outcome_count += 1
+        self._outcomes[slot] = lost
+        self._window_lost += lost
+        self._next_outcome = (slot + 1) % self.window
+
+    def _percentile(self, fraction):
+        """
+        Bucket edge below which fraction of the window falls, call with
+        the lock held
+        """
+        target = max(1, int(self._sample_count * fraction + 0.999999))
+        seen = 0
+        for bucket, count in enumerate(self._buckets):
+            seen += count
+            if seen >= target:
+                if bucket < len(HISTOGRAM_EDGES):
+                    return HISTOGRAM_EDGES[bucket]
+                break
+        return self._window_max()
+
+    def _window_max(self):
+        return max(self._samples[:self._sample_count])
+
+    def snapshot(self):
+        """
+        Returns the link stats, times in seconds. p50, p90, p99, max and
+        mean cover the last window replies and are None before the
+        first one. loss_rate is lost / sent over the last window pings,
+        received and lost count since start.
+        """
+        with self._lock:
+            stats = {
+                'samples': self._sample_count,
+                'p50': None, 'p90': None, 'p99': None, 'max': None,
+                'mean': None,
+                'jitter': self.jitter,
+                'loss_rate': (self._window_lost / self._outcome_count
+                              if self._outcome_count else 0.0),
+                'received': self.received,
+                'lost': self.lost,
+                'max_ever': self.max_ever,
+            }
+            if self._sample_count:
+                window_max = self._window_max()
+                # A bucket edge can sit above the largest real sample
+                for key, fraction in (('p50', 0.5), ('p90', 0.9),
+                                      ('p99', 0.99)):
+                    stats[key] = min(self._percentile(fraction), window_max)
+                stats['max'] = window_max
+                stats['mean'] = self._sample_sum / self._sample_count
+        return stats
+
+    def summary(self):
+        """
+        One line summary of snapshot(), None before any ping result
+        """
+        stats = self.snapshot()
+        if not stats['samples'] and not stats['lost']:
+            return None
+        if not stats['samples']:
+            return (f"{self.name} no replies, "
+                    f"loss {stats['loss_rate'] * 100:.1f}%")
+        return (f"{self.name} rtt p50 {stats['p50'] * 1000:.2f} ms "
+                f"p90 {stats['p90'] * 1000:.2f} ms "
+                f"p99 {stats['p99'] * 1000:.2f} ms "
+                f"max {stats['max'] * 1000:.2f} ms "
+                f"jitter {stats['jitter'] * 1000:.2f} ms "
+                f"loss {stats['loss_rate'] * 100:.1f}% "
+                f"({stats['samples']} samples)")
+
+    def start(self):
+        """
+        Start the summary log thread if an interval is set
+        """
+        if not self.interval or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name=f'{self.name}-linkstats',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the summary log thread, the stats are kept
+        """
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            line = self.summary()
+            if line:
+                logger.info(line)
+
+    def reset(self):
+        """
+        Forget all samples
+        """
+        with self._lock:
+            for bucket in range(len(self._buckets)):
+                self._buckets[bucket] = 0
+            self._next_sample = self._sample_count = 0
+            self._sample_sum = 0.0
+            self._next_outcome = self._outcome_count = self._window_lost = 0
+            self._last_rtt = None
+            self.jitter = 0.0
+            self.received = self.lost = 0
+            self.max_ever = 0.0
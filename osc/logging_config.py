@@ -6,12 +6,21 @@ Needs to be imported into each apps level file
 Windows: C:\Users\<user>\appdata\local\DavidOSmith
 macOS: ~/Library/Logs/DavidOSmith
 Linux: ~/.local/share/DavidOsmith
+Callers only merge the message arguments and put the record on a
+queue. The handler filters, the formatters (time stamps, tracebacks)
+and the file and console writes run on one background QueueListener
+thread. Use %-style arguments on hot paths, logger.info("sent %s",
+address), so nothing is formatted for a level that is filtered out.
 """
 
+import atexit
+import copy
 import logging
 import os
+import queue
 from logging.handlers import TimedRotatingFileHandler
 from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener
 from platformdirs import user_log_dir
 from platformdirs import user_cache_dir
 
@@ -25,17 +34,22 @@ ALT_LOGGER_DIR = user_cache_dir(APP_NAME, APP_AUTHOR)
 RAW_LOGGER_NAME = "raw_output"
 RAW_LOGGER_LEVEL = 25
 RAW_LOGGER_DIR = ALT_LOGGER_DIR
-RAW_LOGGER_MAXBYTES = 1000000
+RAW_LOGGER_MAXBYTES = 10000000
 # Output OSC Messages to check for issues
 OSC_LOGGER_NAME = "osc_output"
 OSC_LOGGER_LEVEL = 26
 OSC_LOGGER_DIR = ALT_LOGGER_DIR
-OSC_LOGGER_MAXBYTES = 1000000
+OSC_LOGGER_MAXBYTES = 10000000
 # Helper logger, for logging ay other info to user_cache_dir
 HELPER_LOGGER_NAME = "helper_output"
 HELPER_LOGGER_LEVEL = 27
 HELPER_LOGGER_DIR = ALT_LOGGER_DIR
-HELPER_LOGGER_MAXBYTES = 1000000
+HELPER_LOGGER_MAXBYTES = 10000000
+# Rotated files kept for the raw, osc and helper logs
+ROTATING_BACKUP_COUNT = 3
+
+# Background thread writing the handlers, set by setup_logging
+_queue_listener = None
 
 def raw_logger():
     """
@@ -58,6 +72,45 @@ def helper_logger():
     """
     return HELPER_LOGGER_LEVEL
 
+class _LevelRoutingListener(QueueListener):
+    """
+    QueueListener that hands each record only to the handlers whose
+    filters accept its level. The handler filters here only look at the
+    level, so the choice is worked out once per level and reused.
+    """
+
+    def __init__(self, log_queue, *handlers):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self._routes = {}
+
+    def handle(self, record):
+        record = self.prepare(record)
+        handlers = self._routes.get(record.levelno)
+        if handlers is None:
+            handlers = [handler for handler in self.handlers
+                        if record.levelno >= handler.level
+                        and handler.filter(record)]
+            self._routes[record.levelno] = handlers
+        for handler in handlers:
+            handler.handle(record)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread. The
+    stock prepare() runs the formatter on the caller thread, here only
+    msg % args is merged, so later changes to mutable args can not
+    change the logged message, and exc_info is passed on for the
+    listener's formatters to render.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
 # Setup logging if not already started
 def setup_logging():
     """
@@ -99,7 +152,7 @@ def setup_logging():
         raw_handler = RotatingFileHandler(
             filename=raw_file,
             maxBytes=RAW_LOGGER_MAXBYTES,
-            backupCount=1,
+            backupCount=ROTATING_BACKUP_COUNT,
             encoding='utf-8'
         )
         raw_handler.setFormatter(default_formatter)
@@ -113,7 +166,7 @@ def setup_logging():
         osc_handler = RotatingFileHandler(
             filename=osc_file,
             maxBytes=OSC_LOGGER_MAXBYTES,
-            backupCount=1,
+            backupCount=ROTATING_BACKUP_COUNT,
             encoding='utf-8'
         )
         osc_handler.setFormatter(default_formatter)
@@ -127,7 +180,7 @@ def setup_logging():
         helper_handler = RotatingFileHandler(
             filename=helper_file,
             maxBytes=HELPER_LOGGER_MAXBYTES,
-            backupCount=1,
+            backupCount=ROTATING_BACKUP_COUNT,
             encoding='utf-8'
         )
         helper_handler.setFormatter(default_formatter)
@@ -138,10 +191,32 @@ def setup_logging():
         console_handler.setFormatter(console_formatter)
         console_handler.addFilter(lambda record: (record.levelno % 10) == 0)
 
+        # The root logger only merges args and queues records, the
+        # listener thread runs the filters, formatting and file writes
+        global _queue_listener
+        log_queue = queue.SimpleQueue()
+        _queue_listener = _LevelRoutingListener(
+            log_queue,
+            main_handler,
+            raw_handler,
+            osc_handler,
+            helper_handler,
+            console_handler
+        )
+        _queue_listener.start()
+        atexit.register(stop_logging)
+
         root_logger = logging.getLogger('')
         root_logger.setLevel(logging.INFO)
-        root_logger.addHandler(main_handler)
-        root_logger.addHandler(raw_handler)
-        root_logger.addHandler(osc_handler)
-        root_logger.addHandler(helper_handler)
-        root_logger.addHandler(console_handler)
+        root_logger.addHandler(_DeferredQueueHandler(log_queue))
+
+
+def stop_logging():
+    """
+    Write out everything still queued and stop the listener thread.
+    Runs at interpreter exit, call it sooner to flush the log files.
+    """
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
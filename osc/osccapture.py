@@ -0,0 +1,253 @@
+"""
+This script was created with the help of AI.
+Binary capture and timed replay of OSC traffic. OSCHandler.start_capture
+writes every raw tx and rx datagram with a monotonic timestamp to an
+append only file, the replay tool memory maps it and sends the traffic
+again at the original, an accelerated or the maximum speed.
+File layout, little endian:
+    header  b'OSCCAP01', float64 wall clock start, float64 monotonic start
+    record  float64 seconds since start, uint8 direction (0 tx, 1 rx),
+            uint32 length, then length bytes of datagram
+use command:
+python -m osc.osccapture info capture.osccap
+python -m osc.osccapture replay capture.osccap --port 8001 --speed 4
+"""
+
+import argparse
+import logging
+import mmap
+import socket
+import struct
+import threading
+import time
+from osc.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+CAPTURE_MAGIC = b'OSCCAP01'
+CAPTURE_TX = 0
+CAPTURE_RX = 1
+CAPTURE_DIRECTIONS = {'tx': (CAPTURE_TX,), 'rx': (CAPTURE_RX,),
+                      'both': (CAPTURE_TX, CAPTURE_RX)}
+_HEADER = struct.Struct('<8sdd')
+_RECORD = struct.Struct('<dBI')
+# Gaps shorter than this are sent back to back instead of sleeping
+REPLAY_MIN_SLEEP = 0.0005
+
+
+class CaptureWriter:
+    """
+    Appends datagrams to a new capture file. write() may be called from
+    the send and receive threads at the same time.
+    """
+
+    def __init__(self, path):
+        """
+        path: file to create, an existing file is overwritten
+        """
+        self.path = path
+        self.start = time.monotonic()
+        self.packets = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(CAPTURE_MAGIC, time.time(), self.start))
+
+    def write(self, direction, dgram):
+        """
+        Record one datagram, direction CAPTURE_TX or CAPTURE_RX. dgram
+        may be bytes, a bytearray or a memoryview.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(_RECORD.pack(now - self.start, direction,
+                                          len(dgram)))
+            self._file.write(dgram)
+            self.packets += 1
+            self.bytes += len(dgram)
+
+    def close(self):
+        """
+        Flush and close the file, later writes are ignored
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class CaptureReader:
+    """
+    Reads a capture file through mmap, records are memoryview slices of
+    the mapping so nothing is copied until they are sent.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped
+            self._file.close()
+            raise ValueError(f"{path} is not an OSC capture file")
+        if len(self._map) >= _HEADER.size:
+            magic, self.wall_start, self.monotonic_start = \
+                _HEADER.unpack_from(self._map, 0)
+        else:
+            magic = None
+        if magic != CAPTURE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an OSC capture file")
+        self._view = memoryview(self._map)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def records(self, directions=(CAPTURE_TX, CAPTURE_RX)):
+        """
+        Yield (seconds, direction, datagram memoryview) in file order.
+        A record cut short by a crash ends the iteration.
+        """
+        offset = _HEADER.size
+        size = len(self._map)
+        while offset + _RECORD.size <= size:
+            seconds, direction, length = _RECORD.unpack_from(self._map, offset)
+            offset += _RECORD.size
+            if offset + length > size:
+                logger.warning(f"Capture {self.path} ends mid record")
+                return
+            if direction in directions:
+                yield seconds, direction, self._view[offset:offset + length]
+            offset += length
+
+    def summary(self):
+        """
+        Returns packet and byte counts per direction and the duration
+        """
+        counts = {'tx': [0, 0], 'rx': [0, 0]}
+        duration = 0.0
+        for seconds, direction, dgram in self.records():
+            entry = counts['tx' if direction == CAPTURE_TX else 'rx']
+            entry[0] += 1
+            entry[1] += len(dgram)
+            duration = seconds
+        return {
+            'wall_start': self.wall_start,
+            'duration': duration,
+            'tx_packets': counts['tx'][0],
+            'tx_bytes': counts['tx'][1],
+            'rx_packets': counts['rx'][0],
+            'rx_bytes': counts['rx'][1],
+        }
+
+    def close(self):
+        """
+        Unmap the file. If record views are still held elsewhere the
+        mapping is left for the garbage collector.
+        """
+        if getattr(self, '_view', None) is not None:
+            self._view.release()
+            self._view = None
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+
+def replay(path, host='127.0.0.1', port=8001, speed=1.0, direction='rx',
+           sock=None):
+    """
+    Send the datagrams of a capture to host:port.
+    speed: 1.0 original timing, 4.0 four times faster, 0 or None as
+        fast as possible
+    direction: 'rx' (console output, to load a receive path), 'tx' or
+        'both'
+    sock: optional UDP socket to send from
+    Timing follows the capture clock, a late send does not push the
+    rest of the replay back.
+    Returns a dict: packets, bytes, seconds, packets_per_sec, and
+    max_late, the latest a packet left compared to its schedule.
+    """
+    if direction not in CAPTURE_DIRECTIONS:
+        raise ValueError(f"direction must be one of {tuple(CAPTURE_DIRECTIONS)}")
+    own_sock = sock is None
+    if own_sock:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    stats = {'packets': 0, 'bytes': 0, 'seconds': 0.0,
+             'packets_per_sec': 0.0, 'max_late': 0.0}
+    destination = (host, port)
+    try:
+        with CaptureReader(path) as reader:
+            start = time.monotonic()
+            first = None
+            for seconds, _direction, dgram in reader.records(
+                    CAPTURE_DIRECTIONS[direction]):
+                if speed:
+                    if first is None:
+                        first = seconds
+                    due = start + (seconds - first) / speed
+                    wait = due - time.monotonic()
+                    if wait > REPLAY_MIN_SLEEP:
+                        time.sleep(wait)
+                    stats['max_late'] = max(stats['max_late'],
+                                            time.monotonic() - due)
+                sock.sendto(dgram, destination)
+                stats['packets'] += 1
+                stats['bytes'] += len(dgram)
+                del dgram
+            stats['seconds'] = time.monotonic() - start
+    finally:
+        if own_sock:
+            sock.close()
+    if stats['seconds'] > 0:
+        stats['packets_per_sec'] = stats['packets'] / stats['seconds']
+    return stats
+
+
+def main(argv=None):
+    """
+    Command line entry, see the module docstring
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m osc.osccapture',
+        description='Inspect or replay an OSCHandler capture file.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    info = commands.add_parser('info', help='print packet counts')
+    info.add_argument('path')
+    play = commands.add_parser('replay', help='send the captured traffic')
+    play.add_argument('path')
+    play.add_argument('--host', default='127.0.0.1')
+    play.add_argument('--port', type=int, default=8001)
+    play.add_argument('--direction', choices=tuple(CAPTURE_DIRECTIONS),
+                      default='rx')
+    speed = play.add_mutually_exclusive_group()
+    speed.add_argument('--speed', type=float, default=1.0,
+                       help='1 original timing, 4 four times faster')
+    speed.add_argument('--max', action='store_const', const=0,
+                       dest='speed', help='send as fast as possible')
+    args = parser.parse_args(argv)
+    if args.command == 'info':
+        with CaptureReader(args.path) as reader:
+            summary = reader.summary()
+        print(f"{args.path}: {summary['duration']:.3f}s  "
+              f"tx {summary['tx_packets']} packets {summary['tx_bytes']} B  "
+              f"rx {summary['rx_packets']} packets {summary['rx_bytes']} B")
+    else:
+        stats = replay(args.path, args.host, args.port, speed=args.speed,
+                       direction=args.direction)
+        print(f"replayed {stats['packets']} packets {stats['bytes']} B in "
+              f"{stats['seconds']:.3f}s ({stats['packets_per_sec']:.0f}/s, "
+              f"max late {stats['max_late'] * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
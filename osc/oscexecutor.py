@@ -0,0 +1,201 @@
+"""
+This script was created with the help of AI.
+Runs OSC listener callbacks off the receive thread. A slow handler,
+for example one writing a JSON file, would otherwise stall the socket
+until the kernel starts dropping datagrams. Every queued listener has
+its own bounded queue and overflow policy, and is drained either by a
+dedicated worker thread or by a thread pool shared with other
+listeners.
+"""
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from osc.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ('inline', 'pool', 'dedicated')
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest', 'coalesce')
+
+
+def new_listener_pool(workers):
+    """
+    Thread pool for executor='pool' listeners
+    """
+    return ThreadPoolExecutor(max_workers=workers,
+                              thread_name_prefix='osc-rx-pool')
+
+
+class QueuedListener:
+    """
+    Wraps a listener so calling it queues the message instead of running
+    the handler. Messages for one listener always run in order, one at a
+    time, even on the shared pool.
+    Overflow policies when queue_size messages are waiting:
+        'block' the receive thread waits for room, nothing is lost
+        'drop_oldest' the oldest waiting message is discarded
+        'drop_newest' the new message is discarded
+        'coalesce' a waiting message for the same address is replaced
+            with the new args and keeps its place, use it for absolute
+            values such as /eos/out/active/wheel/N. Falls back to
+            drop_oldest when the queue is full of other addresses.
+    """
+
+    def __init__(self, handler, queue_size=100, overflow='drop_oldest',
+                 pool=None, name=None):
+        """
+        handler: callable(address, *args)
+        queue_size: most messages waiting, at least 1
+        overflow: see class docstring
+        pool: a shared ThreadPoolExecutor, None starts a dedicated
+            worker thread
+        name: used for the worker thread and in stats
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.handler = handler
+        self.queue_size = max(1, int(queue_size))
+        self.overflow = overflow
+        self.pool = pool
+        self.name = name or getattr(handler, '__name__', repr(handler))
+        self.queue = deque()    # addresses in arrival order
+        self.pending = {}       # coalesce only, address: latest args
+        self._cond = threading.Condition()
+        self._scheduled = False
+        self._stopped = False
+        self.max_depth = 0
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        if pool is None:
+            self._thread = threading.Thread(target=self._run,
+                                            name=f'osc-rx-{self.name}',
+                                            daemon=True)
+            self._thread.start()
+
+    def __call__(self, address, *args):
+        self.submit(address, args)
+
+    def submit(self, address, args):
+        """
+        Queue one message, returns False if it was dropped
+        """
+        with self._cond:
+            self.submitted += 1
+            if self.overflow == 'coalesce' and address in self.pending:
+                self.pending[address] = args
+                self.coalesced += 1
+                return True
+            if len(self.queue) >= self.queue_size:
+                if self.overflow == 'block':
+                    while (len(self.queue) >= self.queue_size
+                           and not self._stopped):
+                        self._cond.wait()
+                elif self.overflow == 'drop_newest':
+                    self.dropped += 1
+                    return False
+                else:
+                    oldest = self.queue.popleft()
+                    if self.overflow == 'coalesce':
+                        del self.pending[oldest[0]]
+                    self.dropped += 1
+            if self._stopped:
+                return False
+            if self.overflow == 'coalesce':
+                self.pending[address] = args
+                self.queue.append((address, None))
+            else:
+                self.queue.append((address, args))
+            self.max_depth = max(self.max_depth, len(self.queue))
+            if self.pool is None:
+                self._cond.notify_all()
+            elif not self._scheduled:
+                self._scheduled = True
+                self.pool.submit(self._drain)
+        return True
+
+    def _take(self):
+        """
+        Pop the next message, call with the condition held
+        """
+        address, args = self.queue.popleft()
+        if self.overflow == 'coalesce':
+            args = self.pending.pop(address)
+        # Wake a blocked submit
+        self._cond.notify_all()
+        return address, args
+
+    def _call(self, address, args):
+        try:
+            self.handler(address, *args)
+        except Exception:
+            self.errors += 1
+            logger.exception(f"OSC listener {self.name} failed on {address}")
+        self.processed += 1
+
+    def _run(self):
+        """
+        Dedicated worker thread
+        """
+        while True:
+            with self._cond:
+                while not self.queue and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                address, args = self._take()
+            self._call(address, args)
+
+    def _drain(self):
+        """
+        Pool task, runs until the queue is empty so only one pool thread
+        works on this listener at a time
+        """
+        while True:
+            with self._cond:
+                if not self.queue or self._stopped:
+                    self._scheduled = False
+                    return
+                address, args = self._take()
+            self._call(address, args)
+
+    def depth(self):
+        """
+        Messages waiting right now
+        """
+        return len(self.queue)
+
+    def stats(self):
+        """
+        Returns queue depth and message counters
+        """
+        with self._cond:
+            return {
+                'name': self.name,
+                'executor': 'dedicated' if self.pool is None else 'pool',
+                'overflow': self.overflow,
+                'depth': len(self.queue),
+                'max_depth': self.max_depth,
+                'queue_size': self.queue_size,
+                'submitted': self.submitted,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'coalesced': self.coalesced,
+                'errors': self.errors,
+            }
+
+    def stop(self):
+        """
+        Discard waiting messages and end the worker, blocked submits
+        return False
+        """
+        with self._cond:
+            self._stopped = True
+            self.queue.clear()
+            self.pending.clear()
+            self._cond.notify_all()
@@ -17,27 +17,59 @@ This script was created with the help of AI.
 # pip install python-osc
 
 import logging
+import socket
 import time
 import threading
-from collections import deque
-from pythonosc.dispatcher import Dispatcher
-from pythonosc.udp_client import SimpleUDPClient
-from pythonosc.osc_server import BlockingOSCUDPServer
 from osc.logging_config import setup_logging, osc_logger
+from osc.oscpacket import (BUNDLE_TAG, BundleBuilder, ParseError,
+                           PreparedMessage, RxBufferPool, decode_args,
+                           encode_message, iter_bundle, osc_string,
+                           parse_address)
+from osc.ratelimit import RateLimitedSender
+from osc.osccapture import CAPTURE_RX, CAPTURE_TX, CaptureWriter
+from osc.oscexecutor import (EXECUTOR_MODES, QueuedListener,
+                             new_listener_pool)
+from osc.oscmatch import AddressIndex, SubstringIndex
+from osc.oscstats import TrafficStats
+from osc.osctcp import TCPTransport
 
 # Constants
 """
-Declutter: If set true, when osc message is received, any messages
-within declutter time will count num messages. Log will print the first
-message and show a count of total
+Traffic stats: sent and received messages are counted per address and
+summarized in one log line every OSC_TRAFFIC_LOG_INTERVAL seconds, see
+get_traffic_stats(). Per message logging to the osc_output log is off
+unless OSC_MESSAGE_LOGGING or set_message_logging() turns it on.
 """
-OSC_RECEIVE_DECLUTTER_TIME = 0.5
-OSC_RECEIVE_DECLUTTER = True
+OSC_TRAFFIC_LOG_INTERVAL = 10.0
+OSC_MESSAGE_LOGGING = False
+"""
+Batching: When enabled with set_tx_batching(), messages sent within the
+window are packed into one OSC bundle datagram no larger than the MTU.
+1472 is the UDP payload that fits a standard 1500 byte ethernet frame.
+"""
+OSC_BATCH_WINDOW = 0.005
+OSC_BATCH_MTU = 1472
+"""
+Receive buffers: datagrams are read with recv_into into a pool of
+preallocated buffers. The receive thread polls its stop flag every
+OSC_RX_POLL_TIME seconds.
+"""
+OSC_RX_BUFFERS = 8
+OSC_RX_BUFFER_SIZE = 65536
+OSC_RX_POLL_TIME = 0.25
+"""
+Listener executors: handlers registered with executor='pool' share
+OSC_RX_POOL_WORKERS threads. Queued listeners hold at most
+OSC_RX_QUEUE_SIZE messages by default, see register_osc_listener.
+"""
+OSC_RX_POOL_WORKERS = 4
+OSC_RX_QUEUE_SIZE = 100
 
 # Logger
 setup_logging()
 logger = logging.getLogger(__name__)
 
+
 class OSCHandler:
     """
     Handles sending and receiving OSC messages. Can be configured for
@@ -52,7 +84,10 @@ class OSCHandler:
         tx_port=None,
         rx_udp_ip='0.0.0.0',
         rx_port=None,
-        rx_autostart=True
+        rx_autostart=True,
+        transport='udp',
+        tcp_framing='slip',
+        tx_destinations=None
         ):
         """
         When initialized, set following:
@@ -74,22 +109,59 @@ class OSCHandler:
         The OSC start_receiving() will automatically begin on init if 'rx' is part of
         the mode string. If you set rx_autostart to False you will need to call
         start_receiving() manually.
+        transport is 'udp' (default) or 'tcp'. With 'tcp' one persistent
+        connection is opened to tx_udp_ip:tx_port (EOS listens on 3032)
+        and replies arrive on the same connection, so rx_port is not
+        needed. tcp_framing is 'slip' (OSC 1.1, default) or 'length'
+        (OSC 1.0 size prefix), match the console's OSC TCP format.
+            myosc = OSCHandler(mode='txrx', tx_udp_ip='10.101.100.101',
+            tx_port=3032, transport='tcp')
+        tx_destinations is an optional list of (ip, port) tuples to send
+        every message to, e.g. a primary and backup console plus a
+        monitoring PC. Each message is encoded once and written to all
+        enabled destinations from one socket. tx_udp_ip/tx_port may be
+        omitted, they default to the first destination. UDP only.
+            myosc = OSCHandler(mode='tx', tx_destinations=[
+                ('10.101.100.101', 8000), ('10.101.100.102', 8000)])
         """
         self.mode = mode
+        if tx_destinations and tx_udp_ip is None and tx_port is None:
+            tx_udp_ip, tx_port = tx_destinations[0]
         self.tx_udp_ip = tx_udp_ip
         self.tx_port = tx_port
+        # (ip, port): per destination enable flag and counters
+        self.destinations = {}
+        if 'tx' in mode:
+            for ip, port in (tx_destinations or [(tx_udp_ip, tx_port)]):
+                self._new_destination(ip, port)
+        # UDP send socket, shared by every destination
+        self.tx_socket = None
         self.rx_udp_ip = rx_udp_ip
         self.rx_port = rx_port
+        self.transport = transport
+        self.tcp_framing = tcp_framing
+        self.tcp = None
         self.min_send_interval = 0.00
         self.rate_limit_mode = 'buffer'
-        self.message_queue = deque(maxlen=50)
-        self.last_send_time = 0
-        self._osc_address = None
-        self._osc_args = None
-        # OSC Message Batch Logging vars, see declutter constants:
-        self.batch = None
-        self.batch_timer = None
-        self.tx_buffer_timer = None
+        # Token bucket limiter, None while rate limiting is disabled
+        self.rate_limiter = None
+        # Per address tx/rx counters, see traffic stats constants
+        # Its flush thread starts once the arguments are validated
+        self.traffic = TrafficStats('OSCHandler', OSC_TRAFFIC_LOG_INTERVAL)
+        self.message_logging = OSC_MESSAGE_LOGGING
+        # Raw datagram capture file, see start_capture
+        self.capture = None
+        # TX bundle batching, see set_tx_batching
+        self.batching = False
+        self.batch_window = OSC_BATCH_WINDOW
+        self.batch_max_messages = None
+        self._bundle = BundleBuilder(OSC_BATCH_MTU)
+        # Guards the bundle, the deadline thread waits on it for the
+        # window of the oldest pending message to close
+        self._bundle_cond = threading.Condition()
+        self._bundle_deadline = None
+        self._bundle_thread = None
+        self._bundle_stopped = False
         # Get this thing started:
         logger.info(
             f"OSChandler initialized with mode='{self.mode}' "
@@ -99,13 +171,40 @@ class OSCHandler:
         
         # Initialize Dispatcher to handle OSC inputs OSC UDP client and
         # server as necessary
-        self.dispatcher = Dispatcher()
-        self.dispatcher.set_default_handler(self.default_handler)
+        # Registered listeners, received packets are parsed by
+        # _handle_packet so arguments are decoded lazily
+        self.address_index = AddressIndex()
+        self.substring_index = SubstringIndex()
+        self.rx_socket = None
+        self._rx_buffers = RxBufferPool(OSC_RX_BUFFERS, OSC_RX_BUFFER_SIZE)
+        self._rx_stop = threading.Event()
+        # Listeners run off the receive thread, see register_osc_listener
+        self.rx_queues = []
+        self._rx_pool = None
+        # Raw packet forwarding, see add_route
+        self.routes = []
+        # Called for every received message, see add_rx_hook. A tuple
+        # replaced on change so the receive thread reads it unlocked
+        self._rx_hooks = ()
+        self._rx_hooks_lock = threading.Lock()
+        self._route_sock = None
         
         # This segment checks that the necessary parameters are set and
         # will send an error message about what needs fixing
         if(self.mode not in ['tx', 'rx', 'txrx']):
             raise ValueError("mode must be: 'tx', 'rx', or 'txrx'")
+        elif self.transport not in ['udp', 'tcp']:
+            raise ValueError("transport must be: 'udp' or 'tcp'")
+        elif self.transport == 'tcp':
+            self.error_list = []
+            if tx_destinations and len(tx_destinations) > 1:
+                self.error_list.append("tx_destinations fan-out is only "
+                    "supported with transport='udp'"
+                )
+            if self.tx_udp_ip is None or self.tx_port is None:
+                self.error_list.append("tx_udp_ip='x.x.x.x' and "
+                    "tx_port=#### must be set for tcp"
+                )
         else:
             self.error_list = []
             if 'tx' in self.mode:
@@ -118,8 +217,6 @@ class OSCHandler:
                     self.error_list.append("rx_port=#### must be set for "
                         "receiving"
                     )
-                elif rx_autostart:
-                    self.start_receiving()
         if self.error_list:
             error_string = ""
             for error in self.error_list:
@@ -127,17 +224,35 @@ class OSCHandler:
             logger.error(error_string.strip())
             raise ValueError(error_string)
 
+        # TCP carries both directions over one connection, received
+        # packets are only dispatched when receiving is part of mode
+        if self.transport == 'tcp':
+            self.tcp = TCPTransport(
+                self.tx_udp_ip,
+                self.tx_port,
+                framing=self.tcp_framing,
+                on_packet=(self._handle_tcp_packet
+                           if 'rx' in self.mode else None)
+            )
         # Initialize UDP client for sending OSC messages if mode is set
         # to transmit or txrx
-        if 'tx' in self.mode:
-            self.udp_client = SimpleUDPClient(self.tx_udp_ip, self.tx_port)
+        elif 'tx' in self.mode:
+            self.tx_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.tx_socket.setblocking(False)
+            # tx_udp_ip may be a broadcast address
+            self.tx_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST,
+                                      1)
+        self.traffic.start()
+        if 'rx' in self.mode and self.transport == 'udp' and rx_autostart:
+            self.start_receiving()
 
     # set up or change the rate limit handling in case the receiving
     # device cannot keep up with data stream
     def set_tx_rate_limit(self,
         min_send_interval=0.00,
         rate_limit_mode='buffer',
-        buffer_max_size=50
+        buffer_max_size=50,
+        burst=1
         ):
         """
         The min_send_interval sets the required time between tx
@@ -147,19 +262,82 @@ class OSCHandler:
         min_send_interval # default is 0.00. Seconds between messages,
             set this if issues sending messages faster than receiver
             can handle. 0.00 is the same as disabled.
-        rate_limit_mode # 'buffer' or 'drop' default is 'buffer'. When
-            rate is limited do you want to buffer messages, or drop any
-            messages that are sent faster than min_send_interval.
+        rate_limit_mode # 'buffer', 'drop' or 'coalesce' default is
+            'buffer'. When rate is limited do you want to buffer
+            messages, or drop any messages that are sent faster than
+            min_send_interval. 'coalesce' keeps only the newest args for
+            each address, use it for absolute values such as
+            /eos/chan/N/at or /eos/fader/1/3 so the final value always
+            arrives without sending the stale ones in between.
         buffer_max_size # default is 50. When buffer is used, how many
             messages to store. If the buffer gets full the oldest
             messages will be dropped to make room for new messages.
+        burst # default is 1. How many messages may go out back to back
+            after an idle period before min_send_interval applies.
+        Queued messages are sent by one long lived sender thread, see
+        get_tx_stats() for accepted, delayed and dropped counters.
         """
         self.min_send_interval = min_send_interval
         self.rate_limit_mode = rate_limit_mode
-        if(min_send_interval == 0.00):
-            self.message_queue.clear()
-        else:
-            self.message_queue = deque(maxlen=buffer_max_size)
+        if self.rate_limiter:
+            self.rate_limiter.stop()
+            self.rate_limiter = None
+        if min_send_interval > 0:
+            self.rate_limiter = RateLimitedSender(
+                self._send_message,
+                rate=1.0 / min_send_interval,
+                burst=burst,
+                mode=rate_limit_mode,
+                max_size=buffer_max_size
+            )
+
+    def get_tx_stats(self):
+        """
+        Returns the rate limiter counters as a dict with keys accepted,
+        delayed, dropped, coalesced and queued. All zero when rate
+        limiting is off.
+        """
+        if not self.rate_limiter:
+            return {'accepted': 0, 'delayed': 0, 'dropped': 0,
+                    'coalesced': 0, 'queued': 0}
+        return self.rate_limiter.stats()
+
+    def set_tx_batching(self,
+        enabled=True,
+        window=OSC_BATCH_WINDOW,
+        max_messages=None,
+        mtu=OSC_BATCH_MTU
+        ):
+        """
+        Opt in to packing bursts of messages into OSC bundles, cuts the
+        number of datagrams sent to the console.
+        enabled # default True. False flushes anything pending and goes
+            back to one datagram per message.
+        window # default 0.005. Seconds a message may wait for others
+            to share its datagram before the bundle is sent.
+        max_messages # default None (no cap). Send the bundle once it
+            holds this many messages.
+        mtu # default 1472. Largest datagram in bytes a bundle may grow
+            to. A message bigger than this is sent on its own.
+        Pending messages can be sent right away with flush().
+        """
+        self.flush()
+        with self._bundle_cond:
+            self.batching = enabled
+            self.batch_window = window
+            self.batch_max_messages = max_messages
+            self._bundle = BundleBuilder(mtu)
+        logger.info(
+            f"TX batching enabled={enabled} window={window} "
+            f"max_messages={max_messages} mtu={mtu}"
+        )
+
+    def flush(self):
+        """
+        Send any messages waiting in the batching bundle.
+        """
+        with self._bundle_cond:
+            self._send_bundle()
 
     # Send OSC Message
     def send_message(self, osc_address, osc_args=None):
@@ -181,111 +359,501 @@ class OSCHandler:
         else:
             # the following converts inputs to a list, to be a little
             # more flexible and robust
-            self._osc_address = osc_address
             if osc_args is None:
-                self._osc_args = []
+                osc_args = []
             elif isinstance(osc_args, (list, tuple)):
-                self._osc_args = list(osc_args)
+                osc_args = list(osc_args)
             else:
-                self._osc_args = [osc_args]
-            # if rate limiting is set we will manage queue and wait time
-            if self.min_send_interval > 0:
-                if(self.rate_limit_mode == 'buffer'):
-                    self.message_queue.append([osc_address, osc_args])
-                current_time = time.time()
-                if current_time - self.last_send_time < self.min_send_interval:
-                    if (not self.tx_buffer_timer and 
-                        self.rate_limit_mode == 'buffer'
-                    ):
-                        self._start_tx_timer()
-                    self._osc_address = None
-                    return
-                else:
-                    self.last_send_time = current_time
-            self._send_message()
-
-    # This message wil be called from either send message, or when the
-    # rate limiter times out
-    def _send_message(self):
-        if (self.min_send_interval > 0 and self.rate_limit_mode == 'buffer' and
-            len(self.message_queue) > 0
-        ):
-            # take oldest message from queue and prep to send
-            next_message = self.message_queue.popleft()
-            self._osc_address = next_message[0]
-            self._osc_args = next_message[1]
-            if len(self.message_queue) > 0:
-                if self.tx_buffer_timer:
-                    self.tx_buffer_timer.cancel()
-                self._start_tx_timer()
+                osc_args = [osc_args]
+            # if rate limiting is set the limiter decides when it is sent
+            if self.rate_limiter:
+                # Encode up front so bad args raise on the caller
+                # thread, the limiter only ever holds ready datagrams
+                encoded = (osc_args, encode_message(osc_address, osc_args))
+                self.rate_limiter.submit(osc_address, encoded,
+                                         send=self._send_encoded)
             else:
-                if self.tx_buffer_timer:
-                    self.tx_buffer_timer.cancel()
-                self.tx_buffer_timer = None
-        # Check _osc_address again, as it might have been cleared by a
-        # rate-limit return
-        if self._osc_address is not None:
-            self.udp_client.send_message(self._osc_address, self._osc_args)
+                self._send_message(osc_address, osc_args)
+
+    def send_many(self, messages, bundle=True):
+        """
+        Send a batch of messages in one pass, much cheaper than calling
+        send_message in a loop.
+        messages # iterable of (osc_address, osc_args) tuples, args
+            follow the same rules as send_message
+        bundle # default True. Pack the messages into as few OSC bundle
+            datagrams as the batching mtu allows (see set_tx_batching).
+            False sends one datagram per message.
+        Rate limiting is applied once for the whole batch, and with
+        message logging on one log line is written instead of one per
+        message.
+        example:
+            stats = myosc.send_many(
+                (f'/eos/chan/{chan}/at', [50]) for chan in range(1, 101))
+        Returns a dict: messages, datagrams, bytes, seconds (encode and
+        send time), messages_per_sec, and status ('sent', 'queued' or
+        'dropped' by the rate limiter).
+        """
+        stats = {'messages': 0, 'datagrams': 0, 'bytes': 0, 'seconds': 0.0,
+                 'messages_per_sec': 0.0, 'status': 'sent'}
+        if 'tx' not in self.mode:
+            logger.error("OSCHandler is not set to transmit, cannot "
+                "send messages."
+            )
+            stats['status'] = 'dropped'
+            return stats
+        start = time.perf_counter()
+        dgrams = []
+        # (address, size) per message, counted once the batch goes out
+        sizes = []
+        packer = BundleBuilder(self._bundle.mtu)
+        for osc_address, osc_args in messages:
+            if osc_args is None:
+                osc_args = []
+            elif not isinstance(osc_args, (list, tuple)):
+                osc_args = [osc_args]
+            dgram = encode_message(osc_address, osc_args)
+            stats['messages'] += 1
+            sizes.append((osc_address, len(dgram)))
+            if not bundle:
+                dgrams.append(dgram)
+                continue
+            if not packer.fits(dgram):
+                if packer.count:
+                    dgrams.append(packer.take())
+                if not packer.fits(dgram):
+                    dgrams.append(dgram)
+                    continue
+            packer.add(dgram)
+        if packer.count:
+            dgrams.append(packer.take())
+        stats['datagrams'] = len(dgrams)
+        stats['bytes'] = sum(len(dgram) for dgram in dgrams)
+        if self.rate_limiter:
+            # The whole batch spends a single token, id() is unique while
+            # the batch is waiting so batches are never coalesced
+            stats['status'] = self.rate_limiter.submit(
+                id(dgrams), (dgrams, sizes), send=self._send_batch)
+        else:
+            self._send_batch(None, (dgrams, sizes))
+        stats['seconds'] = time.perf_counter() - start
+        if stats['seconds'] > 0:
+            stats['messages_per_sec'] = stats['messages'] / stats['seconds']
+        if self.message_logging:
             logger.log(
                 osc_logger(),
-                f"Sent OSC: '{self._osc_address}', '{self._osc_args}' "
-                f"to {self.tx_udp_ip}:{self.tx_port}"
+                "Sent OSC batch: %s messages in %s datagrams to %s:%s (%s)",
+                stats['messages'], stats['datagrams'], self.tx_udp_ip,
+                self.tx_port, stats['status']
             )
-            self._osc_address = None
-            self._osc_args = None
-
-    # starts the timer for managing min_send_interval if set
-    def _start_tx_timer(self):
-        if not self.tx_buffer_timer:
-            self.tx_buffer_timer = threading.Timer(
-                self.min_send_interval,
-                self._send_message
+        return stats
+
+    def _send_batch(self, _key, batch):
+        """
+        Write a (datagrams, [(address, size)]) batch from send_many,
+        anything waiting in the batching bundle goes first to keep
+        message order. The messages are counted in the traffic stats
+        only once written.
+        """
+        dgrams, sizes = batch
+        self.flush()
+        if self.tcp:
+            capture = self.capture
+            if capture:
+                for dgram in dgrams:
+                    capture.write(CAPTURE_TX, dgram)
+            self.tcp.send_many(dgrams)
+        else:
+            for dgram in dgrams:
+                self._send_datagram(dgram)
+        record = self.traffic.record
+        for osc_address, size in sizes:
+            record('tx', osc_address, size)
+
+    def prepare(self, osc_address, typetags=''):
+        """
+        Prepare a reusable sender for a hot path address. The address
+        and type tags are encoded once, each send only packs the values.
+        typetags is a string of OSC type tags without the leading ','
+            i int32, f float32, h int64, d float64, s string, b blob,
+            T true, F false, N nil (T, F and N take no value)
+        example:
+            pan = myosc.prepare('/eos/wheel/fine/pan', 'f')
+            pan.send(1.5)
+        Prepared sends go straight to the socket, they skip the rate
+        limiter and the per message osc_output log. They are counted in
+        the traffic stats.
+        """
+        if 'tx' not in self.mode:
+            logger.error("OSCHandler is not set to transmit, cannot "
+                "prepare message."
             )
-            self.tx_buffer_timer.start()
+            raise ValueError("OSCHandler mode must include 'tx' to prepare")
+        record = self.traffic.record
+        transmit = self._transmit
+        def counted_transmit(dgram):
+            transmit(dgram)
+            record('tx', osc_address, len(dgram))
+        return PreparedMessage(osc_address, typetags, counted_transmit)
 
-    # Start the server
-    def _run_server(self):
-        self.osc_receiver.serve_forever()
+    def _transmit(self, dgram):
+        """
+        Send an encoded OSC message, or add it to the pending bundle
+        when batching is enabled.
+        """
+        if not self.batching:
+            self._send_datagram(dgram)
+            return
+        # Sent while holding the lock so bundles leave in send order
+        with self._bundle_cond:
+            if not self._bundle.fits(dgram):
+                self._send_bundle()
+                if not self._bundle.fits(dgram):
+                    # Too big to share a datagram, send it by itself
+                    self._send_datagram(dgram)
+                    return
+            self._bundle.add(dgram)
+            if (self.batch_max_messages and
+                self._bundle.count >= self.batch_max_messages
+            ):
+                self._send_bundle()
+            elif self._bundle_deadline is None:
+                self._bundle_deadline = time.monotonic() + self.batch_window
+                if self._bundle_thread is None:
+                    self._bundle_thread = threading.Thread(
+                        target=self._run_bundle_deadlines,
+                        name='osc-tx-batch', daemon=True)
+                    self._bundle_thread.start()
+                self._bundle_cond.notify()
 
-    def _rx_batch(self, address, *args, enable=OSC_RECEIVE_DECLUTTER):
+    def _run_bundle_deadlines(self):
         """
-        Collects OSC messages for batch logging and sets timer
-        Items sent to log individually if disabled, or with batch when
-        timer expires. usage within this module:
-        self._rx_batch(address, *args)
+        Batching thread, sends the pending bundle once its window has
+        passed. One long lived thread instead of a timer per bundle.
         """
-        # If batch is Empty, load with first message, and count 1
-        if self.batch is None:
-            self.batch = [address, args, 1]
-        else:
-            self.batch[2] += 1 # We've already logged the first message,
-                               # so we will just increment the counter
-        # If timer isn't enabled we will send the message to be logged
-        if not enable:
-            self._OSC_rx_batch_logging()
+        with self._bundle_cond:
+            while not self._bundle_stopped:
+                if self._bundle_deadline is None:
+                    self._bundle_cond.wait()
+                    continue
+                delay = self._bundle_deadline - time.monotonic()
+                if delay > 0:
+                    self._bundle_cond.wait(delay)
+                    continue
+                try:
+                    self._send_bundle()
+                except Exception:
+                    logger.exception("Batched bundle send failed")
+
+    def _send_bundle(self):
+        """
+        Send the pending bundle and clear its deadline. Caller must
+        hold _bundle_cond.
+        """
+        self._bundle_deadline = None
+        dgram = self._bundle.take()
+        if dgram is not None:
+            self._send_datagram(dgram)
+
+    def _send_datagram(self, dgram):
+        """
+        Write an already encoded OSC datagram to the tx socket, or as
+        one frame on the TCP connection.
+        """
+        capture = self.capture
+        if capture:
+            capture.write(CAPTURE_TX, dgram)
+        if self.tcp:
+            self.tcp.send(dgram)
             return
-        if not self.batch_timer:
-            self.batch_timer = threading.Timer(
-                OSC_RECEIVE_DECLUTTER_TIME,
-                self._OSC_rx_batch_logging
-            )
-            self.batch_timer.start()
-
-    def _OSC_rx_batch_logging(self):
-        """
-        This method is intended to prevent filling the log file when
-        large number of OSC messages are received in a short period of
-        time. It will give a count of messages, and print the first
-        message and arguments.
-        """        
-        if self.batch:
-            logger.info(
-                f"Handler received {self.batch[2]} messages. "
-                f"First Msg: '{self.batch[0]}' args: {self.batch[1]}."
+        for destination, entry in self.destinations.items():
+            if not entry['enabled']:
+                continue
+            try:
+                self.tx_socket.sendto(dgram, destination)
+            except OSError as e:
+                entry['errors'] += 1
+                logger.error(f"Send to {destination[0]}:{destination[1]} "
+                             f"failed: {e}")
+                continue
+            entry['packets'] += 1
+            entry['bytes'] += len(dgram)
+
+    def _new_destination(self, ip, port):
+        # Replace rather than mutate, senders may be iterating the old dict
+        self.destinations = {**self.destinations, (ip, port): {
+            'enabled': True, 'packets': 0, 'bytes': 0, 'errors': 0}}
+
+    def add_destination(self, ip, port):
+        """
+        Start sending every message to another (ip, port) as well.
+        """
+        if (ip, port) not in self.destinations:
+            self._new_destination(ip, port)
+            logger.info(f"Added tx destination {ip}:{port}")
+
+    def remove_destination(self, ip, port):
+        """
+        Stop sending to (ip, port) and forget its stats.
+        """
+        if (ip, port) in self.destinations:
+            self.destinations = {key: entry for key, entry
+                                 in self.destinations.items()
+                                 if key != (ip, port)}
+            logger.info(f"Removed tx destination {ip}:{port}")
+
+    def set_destination_enabled(self, ip, port, enabled=True):
+        """
+        Pause or resume sending to one destination, its stats are kept.
+        """
+        try:
+            self.destinations[(ip, port)]['enabled'] = enabled
+        except KeyError:
+            logger.error(f"{ip}:{port} is not a tx destination")
+            return
+        logger.info(f"tx destination {ip}:{port} enabled={enabled}")
+
+    def get_destination_stats(self):
+        """
+        Returns a dict keyed by 'ip:port' with enabled, packets, bytes
+        and errors for each destination.
+        """
+        return {f"{ip}:{port}": dict(entry)
+                for (ip, port), entry in self.destinations.items()}
+
+    # Called from send_message when no rate limit is set
+    def _send_message(self, osc_address, osc_args):
+        self._send_encoded(osc_address,
+                           (osc_args, encode_message(osc_address, osc_args)))
+
+    def _send_encoded(self, osc_address, encoded):
+        """
+        Transmit an (osc_args, datagram) pair, the rate limiter calls
+        this once a token is free
+        """
+        osc_args, dgram = encoded
+        self._transmit(dgram)
+        self.traffic.record('tx', osc_address, len(dgram))
+        if self.message_logging:
+            logger.log(
+                osc_logger(),
+                "Sent OSC: '%s', '%s' to %s:%s", osc_address, osc_args,
+                self.tx_udp_ip, self.tx_port
             )
-        self.batch = None
-        if self.batch_timer:
-            self.batch_timer.cancel()
+
+    def start_capture(self, path):
+        """
+        Write every raw datagram sent and received to a binary capture
+        file with monotonic timestamps, until stop_capture(). Types and
+        timing are kept exactly, replay it without a console:
+            python -m osc.osccapture replay path --port 8001 --speed 4
+        Starting a new capture closes the current one.
+        """
+        self.stop_capture()
+        self.capture = CaptureWriter(path)
+        logger.info(f"OSC capture started: {path}")
+
+    def stop_capture(self):
+        """
+        Close the capture file, returns (packets, bytes) captured
+        """
+        capture, self.capture = self.capture, None
+        if capture is None:
+            return (0, 0)
+        capture.close()
+        logger.info(f"OSC capture stopped: {capture.path} "
+                    f"{capture.packets} packets {capture.bytes} B")
+        return (capture.packets, capture.bytes)
+
+    def set_message_logging(self, enabled=True):
+        """
+        Write every sent and received message to the osc_output log.
+        Meant for debugging, it costs a log record per message and
+        decodes received messages nobody listens to. The traffic
+        summary line is written either way.
+        """
+        self.message_logging = enabled
+        logger.info(f"OSC per message logging enabled={enabled}")
+
+    def get_traffic_stats(self):
+        """
+        Returns per address tx and rx counters: count, bytes,
+        first_seen, last_seen and rate. See TrafficStats.snapshot.
+        """
+        return self.traffic.snapshot()
+
+    def add_route(self, prefix, destinations, rewrite=None, consume=True):
+        """
+        Forward received messages whose address starts with prefix to
+        other devices without decoding them, e.g. to bridge console
+        output to another show control system.
+        prefix # address prefix to match on whole path segments,
+            '/eos/out' matches '/eos/out/ping' but not '/eos/outer'
+        destinations # list of (ip, port) tuples to forward to
+        rewrite # optional replacement for prefix, e.g. '/showctl/eos'
+            turns '/eos/out/ping' into '/showctl/eos/ping'. The type
+            tags and arguments are copied untouched.
+        consume # default True. The packet is only forwarded. False
+            also dispatches it to local listeners as usual.
+        Routes are checked in the order added, the first match wins.
+        Bundles are not routed, they are dispatched locally.
+        example:
+            myosc = OSCHandler(mode='rx', rx_port=8001)
+            myosc.add_route('/eos/out', [('10.101.100.50', 9000)],
+                rewrite='/showctl/eos')
+        """
+        if self._route_sock is None:
+            self._route_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        prefix_bytes = prefix.rstrip('/').encode('utf-8')
+        self.routes = self.routes + [{
+            'prefix': prefix_bytes,
+            'rewrite': (rewrite.rstrip('/').encode('utf-8')
+                        if rewrite is not None else None),
+            'destinations': [tuple(dest) for dest in destinations],
+            'consume': consume,
+            'packets': 0,
+            'bytes': 0,
+        }]
+        logger.info(f"Added route '{prefix}' -> {destinations} "
+                    f"rewrite={rewrite} consume={consume}")
+
+    def get_route_stats(self):
+        """
+        Returns a list with prefix, rewrite, destinations and forwarded
+        packets and bytes for each route.
+        """
+        return [{
+            'prefix': route['prefix'].decode('utf-8'),
+            'rewrite': (route['rewrite'].decode('utf-8')
+                        if route['rewrite'] is not None else None),
+            'destinations': list(route['destinations']),
+            'packets': route['packets'],
+            'bytes': route['bytes'],
+        } for route in self.routes]
+
+    def _route_packet(self, buf, end):
+        """
+        Match the raw address bytes in buf[:end] against the routes and
+        forward the packet. Returns True if a consuming route took the
+        packet.
+        """
+        if not self.routes or buf[:1] != b'/':
+            return False
+        address_end = buf.find(b'\x00', 0, end)
+        if address_end < 0:
+            return False
+        for route in self.routes:
+            prefix = route['prefix']
+            if not buf.startswith(prefix, 0, end):
+                continue
+            # Only match on a whole path segment
+            if address_end != len(prefix) and buf[len(prefix)] != 0x2F:
+                continue
+            with memoryview(buf) as view:
+                if route['rewrite'] is None:
+                    # Forward straight out of the receive buffer
+                    out = view[:end]
+                else:
+                    # Re-pad the new address, everything after it is copied
+                    out = (osc_string(route['rewrite'] +
+                                      bytes(view[len(prefix):address_end])) +
+                           view[(address_end // 4 + 1) * 4:end])
+                for destination in route['destinations']:
+                    try:
+                        self._route_sock.sendto(out, destination)
+                    except OSError as e:
+                        logger.error(
+                            f"Route forward to {destination} failed: {e}")
+                route['packets'] += 1
+                route['bytes'] += len(out)
+                if isinstance(out, memoryview):
+                    out.release()
+            return route['consume']
+        return False
+
+    def _receive_loop(self):
+        """
+        Receive thread. Each datagram is read into a pooled buffer, so
+        nothing is allocated per packet until a listener wants the
+        arguments.
+        """
+        sock = self.rx_socket
+        while not self._rx_stop.is_set():
+            buf = self._rx_buffers.acquire()
+            try:
+                nbytes, client_address = sock.recvfrom_into(buf)
+            except socket.timeout:
+                self._rx_buffers.release(buf)
+                continue
+            except OSError as e:
+                self._rx_buffers.release(buf)
+                # stop_receiving closes the socket under us, anything
+                # else is a dead link and must not look like silence
+                if not self._rx_stop.is_set():
+                    logger.error(f"OSC receive failed, receiving stopped: {e}")
+                break
+            try:
+                self._handle_packet(buf, nbytes, client_address)
+            except Exception:
+                logger.exception("OSC receive handler failed")
+            finally:
+                self._rx_buffers.release(buf)
+
+    def _handle_tcp_packet(self, packet, client_address):
+        self._handle_packet(packet, len(packet), client_address)
+
+    def _handle_packet(self, buf, end, client_address):
+        """
+        Route, then dispatch the message or bundle in buf[:end]. Only
+        the addresses are parsed here, see _dispatch_message.
+        """
+        capture = self.capture
+        if capture:
+            with memoryview(buf) as view:
+                capture.write(CAPTURE_RX, view[:end])
+        if self._route_packet(buf, end):
+            return
+        try:
+            if buf.startswith(BUNDLE_TAG, 0, end):
+                for start, stop in iter_bundle(buf, 0, end):
+                    self._dispatch_message(buf, start, stop, client_address)
+            elif buf[:1] == b'/':
+                self._dispatch_message(buf, 0, end, client_address)
+        except ParseError as e:
+            logger.warning(f"Dropped malformed OSC packet from "
+                           f"{client_address}: {e}")
+
+    def _dispatch_message(self, buf, start, end, client_address):
+        """
+        Parse the address of one message and decode its arguments only
+        if a listener or a substring listener wants them.
+        """
+        address, typetag_start = parse_address(buf, start, end)
+        self.traffic.record('rx', address, end - start)
+        handlers = self.address_index.match(address)
+        taps = None
+        for hook in self._rx_hooks:
+            tap = hook(address)
+            if tap is not None:
+                taps = [tap] if taps is None else taps + [tap]
+        if not handlers:
+            if not (taps or self.message_logging or
+                    self.substring_index.match(address)):
+                return
+            args = decode_args(buf, typetag_start, end)
+            self.default_handler(address, *args)
+        else:
+            args = decode_args(buf, typetag_start, end)
+            if self.message_logging:
+                self._log_received(address, args)
+            for handler in handlers:
+                handler(address, *args)
+        if taps:
+            for tap in taps:
+                tap(address, *args)
+
+    def _log_received(self, address, args):
+        logger.log(osc_logger(), "Received OSC: '%s', '%s'", address, args)
 
     # default when no OSC handler for a message
     def default_handler(self, address, *args):
@@ -295,23 +863,44 @@ class OSCHandler:
         Starts with check for substring listeners, if any registered
         """
         # Add received messages to log
-        self._rx_batch(address, *args)
+        if self.message_logging:
+            self._log_received(address, args)
         # Check if any registered substring listeners match the address
-        if hasattr(self, 'substring_listeners'):
-            for substring, handler in self.substring_listeners:
-                if substring in address:
-                    handler(address, *args)
+        for handler in self.substring_index.match(address):
+            handler(address, *args)
 
     def _handler_name(self, h):
         import functools
-        if hasattr(h, "name"):
-            return h.name
+        if hasattr(h, "__name__"):
+            return h.__name__
         if isinstance(h, functools.partial):
             base = h.func
-            return f"partial({getattr(base, 'name', repr(base))})"
-        return getattr(h, "class", type(h)).name
+            return f"partial({getattr(base, '__name__', repr(base))})"
+        return type(h).__name__
 
-    def register_osc_listener(self, address, handler):
+    def _queue_listener(self, address, handler, executor, queue_size,
+                        overflow):
+        """
+        Wrap handler for the chosen executor, returns what is registered
+        """
+        if executor not in EXECUTOR_MODES:
+            raise ValueError(f"executor must be one of {EXECUTOR_MODES}")
+        if executor == 'inline':
+            return handler
+        pool = None
+        if executor == 'pool':
+            if self._rx_pool is None:
+                self._rx_pool = new_listener_pool(OSC_RX_POOL_WORKERS)
+            pool = self._rx_pool
+        queued = QueuedListener(handler, queue_size=queue_size,
+                                overflow=overflow, pool=pool,
+                                name=self._handler_name(handler))
+        self.rx_queues.append((address, queued))
+        return queued
+
+    def register_osc_listener(self, address, handler, executor='inline',
+                              queue_size=OSC_RX_QUEUE_SIZE,
+                              overflow='drop_oldest'):
         """
         Handle incoming OSC messages
         Requires specific OSC Address (can use wildcards), and a handler
@@ -328,17 +917,31 @@ class OSCHandler:
         ? matches any single character
         [abc] matches any one character in brackets
         {foo, bar} matches either foo or bar
+        Wildcards match within one path segment. Lookups are indexed
+        and cached, so many registered patterns do not slow receiving.
+        executor # 'inline' (default), 'pool' or 'dedicated'. Inline
+            handlers run on the receive thread and must be quick.
+            'pool' queues messages for a thread pool shared by all pool
+            listeners, 'dedicated' gives the handler its own worker
+            thread. Use either for handlers that write files or wait.
+        queue_size # default 100, most messages waiting per queued
+            handler
+        overflow # 'block', 'drop_oldest' (default), 'drop_newest' or
+            'coalesce' when the queue is full. 'coalesce' keeps only the
+            newest args per address. See QueuedListener and
+            get_rx_queue_stats().
         """
-        # Add received messages to log
-        # self._rx_batch(address, *args)
         # Send to user message handler
-        self.dispatcher.map(address, handler)
+        self.address_index.add(address, self._queue_listener(
+            address, handler, executor, queue_size, overflow))
         logger.info(
-            "Registered rx address '%s' with handler %s", address,
-            self._handler_name(handler)
+            "Registered rx address '%s' with handler %s executor %s", address,
+            self._handler_name(handler), executor
         )
 
-    def register_osc_substring(self, substring, handler):
+    def register_osc_substring(self, substring, handler, executor='inline',
+                               queue_size=OSC_RX_QUEUE_SIZE,
+                               overflow='drop_oldest'):
         """
         register OSC listener for all OSC paths that contrain address
         '/eos/out' will include all sub-paths like '/eos/out/wheel/1'
@@ -349,17 +952,45 @@ class OSCHandler:
         ? matches any single character
         [abc] matches any one character in brackets
         {foo, bar} matches either foo or bar
+        executor, queue_size and overflow are the same as
+        register_osc_listener.
         """
-        # Creates a list to store tuples of declarations and handlers.
-        # Is used in default handler to check any starts with
-        if not hasattr(self, 'substring_listeners'):
-            self.substring_listeners = []
-        self.substring_listeners.append((substring, handler))
+        # All substrings are matched in one pass, see SubstringIndex.
+        # Is used in default handler for addresses with no listener
+        self.substring_index.add(substring, self._queue_listener(
+            substring, handler, executor, queue_size, overflow))
         logger.info(
-            "Registered rx address substring '%s' with handler '%s'", substring,
-            self._handler_name(handler)
+            "Registered rx address substring '%s' with handler '%s' "
+            "executor %s", substring, self._handler_name(handler), executor
         )
 
+    def add_rx_hook(self, hook):
+        """
+        See every received message, whatever listeners are registered.
+        hook(address) runs on the receive thread for each message and
+        returns None, or a callable(address, *args) to run after the
+        listeners. Keep the address check cheap, the arguments are only
+        decoded when a hook or listener wants them.
+        """
+        with self._rx_hooks_lock:
+            self._rx_hooks = self._rx_hooks + (hook,)
+
+    def remove_rx_hook(self, hook):
+        """
+        Remove a hook added with add_rx_hook, unknown hooks are ignored
+        """
+        with self._rx_hooks_lock:
+            self._rx_hooks = tuple(h for h in self._rx_hooks
+                                   if h != hook)
+
+    def get_rx_queue_stats(self):
+        """
+        Returns a list of queue depth and counter dicts, one for each
+        listener registered with executor 'pool' or 'dedicated'
+        """
+        return [dict(queued.stats(), address=address)
+                for address, queued in self.rx_queues]
+
     def start_receiving(self):
         """
         Start server to receive OSC messages if mode set to rx or txrx.
@@ -369,27 +1000,64 @@ class OSCHandler:
                 "OSCHandler is not set to receive, cannot start server."
             )
             return
-        # Create the server if it doesn't exist yet
-        if not hasattr(self, 'osc_receiver'):
-            self.osc_receiver = BlockingOSCUDPServer(
-                (self.rx_udp_ip,
-                 self.rx_port),
-                 self.dispatcher
-            )
-        # Start the server in a background thread to be non-blocking
+        # Restarts the traffic summaries after stop_receiving
+        self.traffic.start()
+        if self.tcp:
+            # The TCP reader thread already delivers received packets
+            return
+        # Create the socket if it doesn't exist yet
+        if self.rx_socket is None:
+            self.rx_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.rx_socket.bind((self.rx_udp_ip, self.rx_port))
+            self.rx_socket.settimeout(OSC_RX_POLL_TIME)
+        # Start the receive loop in a background thread to be non-blocking
         if not hasattr(self, '_server_thread') or not self._server_thread.is_alive():
+            self._rx_stop.clear()
             self._server_thread = threading.Thread(
-                target=self._run_server,
+                target=self._receive_loop,
+                name='osc-rx',
                 daemon=True
             )
             self._server_thread.start()
             logger.info("OSC server started in background thread.")
 
     def stop_receiving(self):
-        """Stops the OSC server."""
-        if hasattr(self, 'osc_receiver'):
-            self.osc_receiver.shutdown()
-            logger.info("OSC server shutdown requested.")
+        """Stops the OSC server, or closes the TCP connection."""
+        if self.tcp:
+            self.tcp.close()
+            logger.info("OSC TCP connection closed.")
+        self._rx_stop.set()
         if hasattr(self, '_server_thread') and self._server_thread.is_alive():
             self._server_thread.join(timeout=1.0)
             logger.info("OSC server thread stopped.")
+        if self.rx_socket is not None:
+            self.rx_socket.close()
+            self.rx_socket = None
+            logger.info("OSC server socket closed.")
+        self.traffic.stop()
+
+    def close(self):
+        """
+        Stop receiving, send anything waiting in the batching bundle,
+        discard rate limited and queued rx messages, stop the listener
+        worker threads and close the tx socket.
+        """
+        with self._bundle_cond:
+            self._send_bundle()
+            self._bundle_stopped = True
+            self._bundle_cond.notify_all()
+        if self._bundle_thread:
+            self._bundle_thread.join(timeout=1.0)
+        if self.rate_limiter:
+            self.rate_limiter.stop()
+            self.rate_limiter = None
+        self.stop_receiving()
+        # Queued listeners and the shared pool keep threads of their own
+        for _address, queued in self.rx_queues:
+            queued.stop()
+        if self._rx_pool is not None:
+            self._rx_pool.shutdown(wait=False, cancel_futures=True)
+            self._rx_pool = None
+        if self.tx_socket is not None:
+            self.tx_socket.close()
+            self.tx_socket = None
@@ -0,0 +1,298 @@
+"""
+This script was created with the help of AI.
+Address matching for received OSC messages. python-osc's Dispatcher
+tries a regex for every mapped pattern on every message, AddressIndex
+looks exact addresses up in a dict, walks a trie of path segments for
+wildcard patterns, and remembers recent results in a small LRU so the
+steady state is one dict lookup per message.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+# Characters that make a registered address a pattern
+WILDCARD_CHARS = '*?[{'
+ADDRESS_CACHE_SIZE = 1024
+
+
+def has_wildcards(address):
+    """
+    True if address uses any OSC pattern syntax
+    """
+    return any(char in address for char in WILDCARD_CHARS)
+
+
+def segment_regex(segment):
+    """
+    Translate one OSC address pattern segment to a compiled regex.
+    * any run of characters, ? one character, [abc] / [a-z] / [!abc]
+    character sets, {foo,bar} alternatives.
+    """
+    out = []
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        if char == '*':
+            out.append('.*')
+        elif char == '?':
+            out.append('.')
+        elif char == '[':
+            close = segment.find(']', i + 1)
+            if close < 0:
+                raise ValueError(f"Unclosed '[' in OSC pattern '{segment}'")
+            chars = segment[i + 1:close]
+            negate = chars.startswith('!')
+            if negate:
+                chars = chars[1:]
+            chars = chars.replace('\\', '\\\\').replace('^', '\\^')
+            out.append(f"[{'^' if negate else ''}{chars}]")
+            i = close
+        elif char == '{':
+            close = segment.find('}', i + 1)
+            if close < 0:
+                raise ValueError(f"Unclosed '{{' in OSC pattern '{segment}'")
+            options = segment[i + 1:close].split(',')
+            out.append('(?:' + '|'.join(re.escape(option.strip())
+                                        for option in options) + ')')
+            i = close
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return re.compile(''.join(out), re.DOTALL)
+
+
+class _Node:
+    """
+    One trie level, literal segments in a dict, pattern segments in a
+    list checked in order
+    """
+    __slots__ = ('children', 'wild', 'handlers')
+
+    def __init__(self):
+        self.children = {}
+        self.wild = []      # (pattern segment, compiled regex, _Node)
+        self.handlers = []  # (registration order, handler)
+
+
+class AddressIndex:
+    """
+    Maps OSC address patterns to handlers, wildcard syntax as described
+    in OSCHandler.register_osc_listener. Wildcards match inside one
+    path segment, '/eos/out/chan/*' matches '/eos/out/chan/1' but not
+    '/eos/out/chan/1/param'.
+    add() may be called from any thread while another thread calls
+    match(), the result cache is replaced rather than edited on change.
+    """
+
+    def __init__(self, cache_size=ADDRESS_CACHE_SIZE):
+        """
+        cache_size: how many received addresses to remember, 0 disables
+            the cache
+        """
+        self.cache_size = cache_size
+        self._exact = {}
+        self._root = _Node()
+        self._patterns = 0
+        self._order = 0
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self._order
+
+    def add(self, pattern, handler):
+        """
+        Register handler for an address or address pattern
+        """
+        with self._lock:
+            entry = (self._order, handler)
+            self._order += 1
+            if not has_wildcards(pattern):
+                self._exact.setdefault(pattern, []).append(entry)
+            else:
+                node = self._root
+                for segment in pattern.split('/'):
+                    if not has_wildcards(segment):
+                        node = node.children.setdefault(segment, _Node())
+                        continue
+                    for existing, _regex, child in node.wild:
+                        if existing == segment:
+                            node = child
+                            break
+                    else:
+                        child = _Node()
+                        node.wild.append((segment, segment_regex(segment),
+                                          child))
+                        node = child
+                node.handlers.append(entry)
+                self._patterns += 1
+            # Results cached so far may be missing the new handler
+            self._cache = OrderedDict()
+
+    def match(self, address):
+        """
+        Returns a tuple of the handlers registered for address, in the
+        order they were added
+        """
+        cache = self._cache
+        handlers = cache.get(address)
+        if handlers is not None:
+            self.hits += 1
+            cache.move_to_end(address)
+            return handlers
+        self.misses += 1
+        handlers = self._lookup(address)
+        if self.cache_size:
+            cache[address] = handlers
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return handlers
+
+    def _lookup(self, address):
+        entries = list(self._exact.get(address, ()))
+        if self._patterns:
+            nodes = [self._root]
+            for segment in address.split('/'):
+                next_nodes = []
+                for node in nodes:
+                    child = node.children.get(segment)
+                    if child is not None:
+                        next_nodes.append(child)
+                    for _pattern, regex, child in node.wild:
+                        if regex.fullmatch(segment):
+                            next_nodes.append(child)
+                nodes = next_nodes
+                if not nodes:
+                    break
+            for node in nodes:
+                entries.extend(node.handlers)
+            entries.sort(key=lambda entry: entry[0])
+        return tuple(handler for _order, handler in entries)
+
+    def stats(self):
+        """
+        Returns pattern counts and cache hit counters
+        """
+        return {
+            'exact': len(self._exact),
+            'patterns': self._patterns,
+            'cached': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+class SubstringIndex:
+    """
+    Finds every registered substring contained in an address with one
+    pass of an Aho-Corasick automaton, so the cost does not grow with
+    the number of substring listeners. The automaton is rebuilt on
+    add(), results are cached per address like AddressIndex.
+    """
+
+    def __init__(self, cache_size=ADDRESS_CACHE_SIZE):
+        """
+        cache_size: how many received addresses to remember, 0 disables
+            the cache
+        """
+        self.cache_size = cache_size
+        self.listeners = []  # (substring, handler) in registration order
+        self._lock = threading.Lock()
+        # goto, fail, out tables, swapped as one tuple on rebuild
+        self._automaton = None
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.listeners)
+
+    def add(self, substring, handler):
+        """
+        Register handler for every address that contains substring
+        """
+        with self._lock:
+            self.listeners.append((substring, handler))
+            self._automaton = self._build(self.listeners)
+            self._cache = OrderedDict()
+
+    @staticmethod
+    def _build(listeners):
+        """
+        Build the automaton, out[state] holds the listener numbers of
+        every substring that ends at state, fail links included
+        """
+        goto = [{}]
+        out = [[]]
+        for number, (substring, _handler) in enumerate(listeners):
+            state = 0
+            for char in substring:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    out.append([])
+                state = next_state
+            out[state].append(number)
+        # Breadth first, depth one states keep their fail link to root
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, child in goto[state].items():
+                queue.append(child)
+                target = fail[state]
+                while target and char not in goto[target]:
+                    target = fail[target]
+                fail[child] = goto[target].get(char, 0)
+                out[child] = out[child] + out[fail[child]]
+        return goto, fail, out
+
+    def match(self, address):
+        """
+        Returns a tuple of the handlers whose substring is in address,
+        in the order they were added
+        """
+        cache = self._cache
+        handlers = cache.get(address)
+        if handlers is not None:
+            self.hits += 1
+            cache.move_to_end(address)
+            return handlers
+        self.misses += 1
+        handlers = self._search(address, self._automaton, self.listeners)
+        if self.cache_size:
+            cache[address] = handlers
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return handlers
+
+    @staticmethod
+    def _search(address, automaton, listeners):
+        if automaton is None:
+            return ()
+        goto, fail, out = automaton
+        # Empty substrings end at the root and match every address
+        found = set(out[0])
+        state = 0
+        for char in address:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return tuple(listeners[number][1] for number in sorted(found))
+
+    def stats(self):
+        """
+        Returns listener count and cache hit counters
+        """
+        return {
+            'substrings': len(self.listeners),
+            'cached': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
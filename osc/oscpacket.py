@@ -0,0 +1,382 @@
+"""
+This script was created with the help of AI.
+Low level OSC 1.0 packet encoding used by the OSCHandler fast paths.
+python-osc rebuilds the address and type tag strings for every message,
+these helpers let callers encode once and reuse the bytes.
+"""
+
+import struct
+
+# Struct codes for the type tags that carry a fixed size value
+FIXED_TYPETAGS = {
+    'i': 'i',   # int32
+    'f': 'f',   # float32
+    'h': 'q',   # int64
+    'd': 'd',   # float64
+}
+# Type tags that are only a tag and carry no argument data
+NO_DATA_TYPETAGS = 'TFN'
+# Type tags that carry a variable length value
+VARIABLE_TYPETAGS = 'sb'
+SUPPORTED_TYPETAGS = ''.join(FIXED_TYPETAGS) + NO_DATA_TYPETAGS + VARIABLE_TYPETAGS
+
+
+def osc_string(value):
+    """
+    Encode a python string (or bytes) as an OSC string, null terminated
+    and padded to a multiple of 4 bytes.
+    """
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    return value + b'\x00' * (4 - (len(value) % 4))
+
+
+def osc_blob(value):
+    """
+    Encode bytes as an OSC blob, int32 size followed by the data padded
+    to a multiple of 4 bytes.
+    """
+    return struct.pack('>i', len(value)) + value + b'\x00' * (-len(value) % 4)
+
+
+def arg_typetag(value):
+    """
+    Guess the OSC type tag for a python value, same rules python-osc
+    uses so both send paths produce identical datagrams. A list is an
+    OSC array and returns its bracketed tags, a 4-tuple is a MIDI
+    message (port id, status, data1, data2).
+    """
+    if isinstance(value, str):
+        return 's'
+    if isinstance(value, bytes):
+        return 'b'
+    if value is True:
+        return 'T'
+    if value is False:
+        return 'F'
+    if isinstance(value, int):
+        return 'h' if value.bit_length() > 32 else 'i'
+    if isinstance(value, float):
+        return 'f'
+    if isinstance(value, tuple) and len(value) == 4:
+        return 'm'
+    if isinstance(value, list):
+        return '[' + ''.join(arg_typetag(item) for item in value) + ']'
+    if value is None:
+        return 'N'
+    raise ValueError(f"OSC argument type not supported: {value!r}")
+
+
+def _encode_value(tag, value):
+    if tag == 's':
+        return osc_string(str(value))
+    if tag == 'b':
+        return osc_blob(value)
+    if tag == 'm':
+        return struct.pack('>4B', *(byte & 0xFF for byte in value))
+    return struct.pack('>' + FIXED_TYPETAGS[tag], value)
+
+
+def encode_args(typetags, args):
+    """
+    Encode argument values for the given type tags. args only contains
+    values for tags that carry data, T/F/N are implied by the tag.
+    """
+    chunks = []
+    values = iter(args)
+    for tag in typetags:
+        if tag in NO_DATA_TYPETAGS:
+            continue
+        chunks.append(_encode_value(tag, next(values)))
+    return b''.join(chunks)
+
+
+def _encode_values(values, typetags, chunks):
+    """
+    Append the type tags and encoded data of values, lists are walked
+    as nested OSC arrays
+    """
+    for value in values:
+        if isinstance(value, list):
+            typetags.append('[')
+            _encode_values(value, typetags, chunks)
+            typetags.append(']')
+            continue
+        tag = arg_typetag(value)
+        typetags.append(tag)
+        if tag not in NO_DATA_TYPETAGS:
+            chunks.append(_encode_value(tag, value))
+
+
+def encode_message(address, args=()):
+    """
+    Encode a full OSC message datagram, type tags are guessed from the
+    python argument types. List arguments become OSC arrays and 4-tuples
+    MIDI messages.
+    """
+    typetags = []
+    chunks = []
+    _encode_values(args, typetags, chunks)
+    return (osc_string(address) + osc_string(',' + ''.join(typetags)) +
+            b''.join(chunks))
+
+
+class PreparedMessage:
+    """
+    A reusable sender for one OSC address with fixed type tags. The
+    address and type tag strings are encoded once when prepared, each
+    send only packs the argument values and hands the datagram to the
+    transmit callable.
+    Created with OSCHandler.prepare(), example:
+        pan = myosc.prepare('/eos/wheel/fine/pan', 'f')
+        pan.send(1.5)
+    """
+
+    def __init__(self, address, typetags, transmit):
+        """
+        address: OSC address string
+        typetags: string of OSC type tags, without the leading ','.
+            Supported: i, f, h, d, s, b, and T, F, N which take no value
+        transmit: callable receiving the datagram bytes. It must not
+            keep a reference to the buffer, it is reused on next send.
+        """
+        unsupported = set(typetags) - set(SUPPORTED_TYPETAGS)
+        if unsupported:
+            raise ValueError(
+                f"Unsupported OSC type tags {''.join(sorted(unsupported))}, "
+                f"must be from '{SUPPORTED_TYPETAGS}'"
+            )
+        self.address = address
+        self.typetags = typetags
+        self._transmit = transmit
+        self._head = osc_string(address) + osc_string(',' + typetags)
+        self._fixed = not any(tag in VARIABLE_TYPETAGS for tag in typetags)
+        if self._fixed:
+            # All values fixed size, pack straight into a reused buffer
+            codes = ''.join(FIXED_TYPETAGS[tag] for tag in typetags
+                            if tag in FIXED_TYPETAGS)
+            self._struct = struct.Struct('>' + codes)
+            self._buffer = bytearray(len(self._head) + self._struct.size)
+            self._buffer[:len(self._head)] = self._head
+            self._offset = len(self._head)
+        self.arg_count = sum(1 for tag in typetags
+                             if tag not in NO_DATA_TYPETAGS)
+
+    def encode(self, *args):
+        """
+        Return the datagram for the given argument values. For fixed
+        size type tags this is the internal buffer, copy it if it needs
+        to outlive the next call.
+        """
+        if len(args) != self.arg_count:
+            raise ValueError(
+                f"{self.address} ,{self.typetags} takes {self.arg_count} "
+                f"arguments, {len(args)} given"
+            )
+        if self._fixed:
+            self._struct.pack_into(self._buffer, self._offset, *args)
+            return self._buffer
+        return self._head + encode_args(self.typetags, args)
+
+    def send(self, *args):
+        """
+        Pack the argument values and transmit the message.
+        """
+        self._transmit(self.encode(*args))
+
+
+# Bundle header with the 'immediately' time tag
+BUNDLE_HEADER = b'#bundle\x00' + b'\x00' * 7 + b'\x01'
+# Each bundle element is prefixed with its int32 size
+BUNDLE_ELEMENT_OVERHEAD = 4
+
+
+class BundleBuilder:
+    """
+    Packs encoded OSC messages into a single bundle datagram that stays
+    under a size limit. take() returns the datagram to send, a lone
+    message is returned as-is instead of wrapped in a bundle.
+    """
+
+    def __init__(self, mtu):
+        """
+        mtu: maximum datagram size in bytes the bundle may grow to
+        """
+        self.mtu = mtu
+        self._buffer = bytearray(BUNDLE_HEADER)
+        self._first = None
+        self.count = 0
+
+    def fits(self, dgram):
+        """
+        True if dgram can be added without going over the mtu
+        """
+        return (len(self._buffer) + BUNDLE_ELEMENT_OVERHEAD + len(dgram)
+                <= self.mtu)
+
+    def add(self, dgram):
+        """
+        Add an encoded message, the bytes are copied so callers may
+        reuse their buffer.
+        """
+        if self.count == 0:
+            self._first = bytes(dgram)
+        self._buffer += struct.pack('>i', len(dgram))
+        self._buffer += dgram
+        self.count += 1
+
+    def take(self):
+        """
+        Return the pending datagram and reset, None if nothing pending
+        """
+        if self.count == 0:
+            return None
+        dgram = self._first if self.count == 1 else bytes(self._buffer)
+        del self._buffer[len(BUNDLE_HEADER):]
+        self._first = None
+        self.count = 0
+        return dgram
+
+
+class ParseError(ValueError):
+    """
+    Raised when a received datagram is not valid OSC
+    """
+
+
+BUNDLE_TAG = b'#bundle\x00'
+# Fixed size argument decoders: struct format and size
+_DECODERS = {
+    'i': struct.Struct('>i'),
+    'f': struct.Struct('>f'),
+    'h': struct.Struct('>q'),
+    'd': struct.Struct('>d'),
+    'r': struct.Struct('>I'),
+    't': struct.Struct('>Q'),
+}
+_NO_DATA_VALUES = {'T': True, 'F': False, 'N': None, 'I': None}
+# Seconds between the NTP epoch (1900) and the unix epoch (1970)
+_NTP_DELTA = 2208988800
+
+
+def parse_string(buf, start, end):
+    """
+    Read an OSC string from buf between start and end, returns
+    (string, offset just past its padding). buf must be bytes or a
+    bytearray, nothing is copied except the string itself.
+    """
+    nul = buf.find(b'\x00', start, end)
+    if nul < 0:
+        raise ParseError("OSC string is not null terminated")
+    return buf[start:nul].decode('utf-8', 'replace'), (nul // 4 + 1) * 4
+
+
+def parse_address(buf, start=0, end=None):
+    """
+    Read only the address of a message, returns (address, offset of
+    the type tag string). Cheap, the arguments are left undecoded.
+    """
+    end = len(buf) if end is None else end
+    if buf[start:start + 1] != b'/':
+        raise ParseError("OSC address must start with '/'")
+    return parse_string(buf, start, end)
+
+
+def decode_args(buf, start, end):
+    """
+    Decode the type tag string at start and the arguments after it,
+    returns a list of python values. Arrays come back as nested lists.
+    """
+    if start >= end:
+        # Very old senders omit the type tag string for no arguments
+        return []
+    typetags, offset = parse_string(buf, start, end)
+    if not typetags.startswith(','):
+        raise ParseError("OSC type tag string must start with ','")
+    args = []
+    stack = [args]
+    try:
+        for tag in typetags[1:]:
+            decoder = _DECODERS.get(tag)
+            if decoder:
+                value = decoder.unpack_from(buf, offset)[0]
+                offset += decoder.size
+                if tag == 't':
+                    value = (value >> 32) - _NTP_DELTA + (value & 0xFFFFFFFF) / 2**32
+            elif tag == 's' or tag == 'S':
+                value, offset = parse_string(buf, offset, end)
+            elif tag == 'b':
+                size = _DECODERS['i'].unpack_from(buf, offset)[0]
+                value = bytes(buf[offset + 4:offset + 4 + size])
+                offset += 4 + size + (-size % 4)
+            elif tag == 'c':
+                value = chr(_DECODERS['i'].unpack_from(buf, offset)[0])
+                offset += 4
+            elif tag == 'm':
+                value = tuple(buf[offset:offset + 4])
+                offset += 4
+            elif tag in _NO_DATA_VALUES:
+                value = _NO_DATA_VALUES[tag]
+            elif tag == '[':
+                stack.append([])
+                continue
+            elif tag == ']':
+                value = stack.pop()
+            else:
+                raise ParseError(f"Unsupported OSC type tag '{tag}'")
+            stack[-1].append(value)
+    except (struct.error, IndexError) as e:
+        raise ParseError(f"Truncated OSC arguments: {e}")
+    if offset > end:
+        raise ParseError("OSC arguments run past the end of the datagram")
+    return args
+
+
+def iter_bundle(buf, start, end):
+    """
+    Yield (start, end) of every message inside a bundle, nested
+    bundles are flattened. Time tags are ignored.
+    """
+    offset = start + len(BUNDLE_TAG) + 8
+    while offset + 4 <= end:
+        size = _DECODERS['i'].unpack_from(buf, offset)[0]
+        offset += 4
+        if size <= 0 or offset + size > end:
+            raise ParseError("Bundle element size out of range")
+        if buf.startswith(BUNDLE_TAG, offset):
+            yield from iter_bundle(buf, offset, offset + size)
+        else:
+            yield offset, offset + size
+        offset += size
+
+
+class RxBufferPool:
+    """
+    A fixed set of preallocated receive buffers. The receive loop reads
+    each datagram into a pooled buffer with recv_into, so no new bytes
+    object is allocated per packet.
+    """
+
+    def __init__(self, count=8, size=65536):
+        """
+        count: number of buffers, a new one is only allocated if all of
+            them are in use at once
+        size: bytes per buffer, 65536 holds any UDP datagram
+        """
+        self.size = size
+        self._free = [bytearray(size) for _ in range(count)]
+
+    def acquire(self):
+        """
+        Take a buffer from the pool
+        """
+        try:
+            return self._free.pop()
+        except IndexError:
+            return bytearray(self.size)
+
+    def release(self, buf):
+        """
+        Give a buffer back once nothing refers to its contents
+        """
+        self._free.append(buf)
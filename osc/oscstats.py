@@ -0,0 +1,165 @@
+"""
+This script was created with the help of AI.
+Per address OSC traffic counters. Recording a message only updates a
+few numbers, one flush thread per aggregator writes a single summary
+log line every interval, so heavy console output no longer costs a
+log record per message.
+"""
+
+import logging
+import threading
+import time
+from osc.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+TRAFFIC_DIRECTIONS = ('tx', 'rx')
+# Seconds between summary log lines
+TRAFFIC_LOG_INTERVAL = 10.0
+# Addresses named in each summary line
+TRAFFIC_TOP_ADDRESSES = 3
+
+# Counter slots, a list per address is cheaper to update than a dict
+_COUNT, _BYTES, _FIRST, _LAST, _WINDOW_COUNT, _WINDOW_BYTES = range(6)
+
+
+class TrafficStats:
+    """
+    Counts messages and bytes per address for tx and rx. Each address
+    keeps count, bytes, first and last seen, and a rate over the last
+    flush interval. record() may be called from any thread.
+    """
+
+    def __init__(self, name='osc', interval=TRAFFIC_LOG_INTERVAL):
+        """
+        name: used in the summary log line and the flush thread name
+        interval: seconds between summary lines, 0 or None keeps the
+            counters without a flush thread
+        """
+        self.name = name
+        self.interval = interval
+        self._counters = {direction: {} for direction in TRAFFIC_DIRECTIONS}
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._last_rates = {direction: 0.0 for direction in TRAFFIC_DIRECTIONS}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, direction, address, nbytes, now=None):
+        """
+        Count one message of nbytes for address, direction 'tx' or 'rx'
+        """
+        now = time.monotonic() if now is None else now
+        counters = self._counters[direction]
+        with self._lock:
+            entry = counters.get(address)
+            if entry is None:
+                counters[address] = [1, nbytes, now, now, 1, nbytes]
+                return
+            entry[_COUNT] += 1
+            entry[_BYTES] += nbytes
+            entry[_LAST] = now
+            entry[_WINDOW_COUNT] += 1
+            entry[_WINDOW_BYTES] += nbytes
+
+    def start(self):
+        """
+        Start the flush thread if an interval is set
+        """
+        if not self.interval or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name=f'{self.name}-stats',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the flush thread, the counters are kept
+        """
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            line = self.flush()
+            if line:
+                logger.info(line)
+
+    def flush(self, now=None):
+        """
+        Close the current rate window. Returns the summary line for the
+        window, or None if nothing was sent or received in it.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            elapsed = max(now - self._window_start, 1e-9)
+            self._window_start = now
+            parts = []
+            for direction, counters in self._counters.items():
+                window = [(entry[_WINDOW_COUNT], entry[_WINDOW_BYTES], address)
+                          for address, entry in counters.items()
+                          if entry[_WINDOW_COUNT]]
+                for entry in counters.values():
+                    entry[_WINDOW_COUNT] = 0
+                    entry[_WINDOW_BYTES] = 0
+                count = sum(item[0] for item in window)
+                self._last_rates[direction] = count / elapsed
+                if not count:
+                    continue
+                window.sort(reverse=True)
+                top = ", ".join(f"{address} x{n}" for n, _b, address
+                                in window[:TRAFFIC_TOP_ADDRESSES])
+                parts.append(
+                    f"{direction} {count} msgs "
+                    f"{sum(item[1] for item in window)} B "
+                    f"({count / elapsed:.1f}/s, {len(window)} addresses, "
+                    f"top: {top})"
+                )
+        if not parts:
+            return None
+        return f"{self.name} traffic last {elapsed:.1f}s: " + "; ".join(parts)
+
+    def snapshot(self, now=None):
+        """
+        Returns {'tx': {...}, 'rx': {...}}. Each direction has total
+        count and bytes, last_window_rate (messages per second in the
+        last flushed window) and 'addresses', keyed by address with
+        count, bytes, first_seen and last_seen (unix time) and rate
+        (messages per second since the last flush).
+        """
+        # Convert monotonic stamps to wall clock for display
+        wall_offset = time.time() - time.monotonic()
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            elapsed = max(now - self._window_start, 1e-9)
+            snapshot = {}
+            for direction, counters in self._counters.items():
+                addresses = {}
+                for address, entry in counters.items():
+                    addresses[address] = {
+                        'count': entry[_COUNT],
+                        'bytes': entry[_BYTES],
+                        'first_seen': entry[_FIRST] + wall_offset,
+                        'last_seen': entry[_LAST] + wall_offset,
+                        'rate': entry[_WINDOW_COUNT] / elapsed,
+                    }
+                snapshot[direction] = {
+                    'addresses': addresses,
+                    'count': sum(e['count'] for e in addresses.values()),
+                    'bytes': sum(e['bytes'] for e in addresses.values()),
+                    'last_window_rate': self._last_rates[direction],
+                }
+        return snapshot
+
+    def reset(self):
+        """
+        Forget all counters
+        """
+        with self._lock:
+            for counters in self._counters.values():
+                counters.clear()
+            self._window_start = time.monotonic()
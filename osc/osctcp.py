@@ -0,0 +1,223 @@
+"""
+This script was created with the help of AI.
+OSC over TCP for OSCHandler. EOS accepts both TCP framings:
+OSC 1.0 prefixes each packet with its int32 size, OSC 1.1 uses SLIP
+(RFC 1055) with an END byte on both sides of the packet.
+"""
+
+import logging
+import socket
+import struct
+import threading
+from osc.logging_config import setup_logging
+from osc.oscpacket import ParseError
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+TCP_FRAMINGS = ('slip', 'length')
+TCP_RECV_SIZE = 65536
+# Largest packet a decoder accepts, a bigger or negative size means the
+# stream is corrupt and the connection is dropped
+TCP_MAX_PACKET = 1 << 20
+
+# SLIP special bytes
+SLIP_END = 0xC0
+SLIP_ESC = 0xDB
+SLIP_ESC_END = 0xDC
+SLIP_ESC_ESC = 0xDD
+_SLIP_ESCAPES = {SLIP_END: bytes((SLIP_ESC, SLIP_ESC_END)),
+                 SLIP_ESC: bytes((SLIP_ESC, SLIP_ESC_ESC))}
+
+
+def slip_encode(packet):
+    """
+    Frame a packet with OSC 1.1 SLIP, END + escaped packet + END
+    """
+    packet = bytes(packet)
+    if SLIP_END in packet or SLIP_ESC in packet:
+        packet = (packet.replace(b'\xdb', b'\xdb\xdd')
+                  .replace(b'\xc0', b'\xdb\xdc'))
+    return b'\xc0' + packet + b'\xc0'
+
+
+def length_encode(packet):
+    """
+    Frame a packet with the OSC 1.0 int32 size prefix
+    """
+    return struct.pack('>i', len(packet)) + packet
+
+
+class SlipDecoder:
+    """
+    Streaming SLIP decoder, feed() it bytes as they arrive and it
+    returns every packet completed by them.
+    """
+
+    def __init__(self, max_packet=TCP_MAX_PACKET):
+        self.max_packet = max_packet
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """
+        Add received bytes, returns a list of complete packets. Raises
+        ParseError if a frame grows past max_packet.
+        """
+        self._buffer += data
+        packets = []
+        while True:
+            end = self._buffer.find(SLIP_END)
+            if end < 0:
+                if len(self._buffer) > self.max_packet:
+                    raise ParseError(f"SLIP frame longer than "
+                                     f"{self.max_packet} bytes")
+                break
+            frame = bytes(self._buffer[:end])
+            del self._buffer[:end + 1]
+            # Empty frames are the back to back END bytes between packets
+            if frame:
+                packets.append(frame.replace(b'\xdb\xdc', b'\xc0')
+                               .replace(b'\xdb\xdd', b'\xdb'))
+        return packets
+
+
+class LengthDecoder:
+    """
+    Streaming OSC 1.0 size prefix decoder, feed() it bytes as they
+    arrive and it returns every packet completed by them.
+    """
+
+    def __init__(self, max_packet=TCP_MAX_PACKET):
+        self.max_packet = max_packet
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """
+        Add received bytes, returns a list of complete packets. Raises
+        ParseError on a negative size or one over max_packet.
+        """
+        self._buffer += data
+        packets = []
+        offset = 0
+        while len(self._buffer) - offset >= 4:
+            size = struct.unpack_from('>i', self._buffer, offset)[0]
+            if size < 0 or size > self.max_packet:
+                raise ParseError(f"OSC TCP packet size {size} out of range")
+            if len(self._buffer) - offset - 4 < size:
+                break
+            packets.append(bytes(self._buffer[offset + 4:offset + 4 + size]))
+            offset += 4 + size
+        del self._buffer[:offset]
+        return packets
+
+
+class TCPTransport:
+    """
+    One persistent TCP connection to a console. Writes are framed and
+    sent with a single sendall, received bytes are decoded by a reader
+    thread and every packet handed to on_packet.
+    """
+
+    def __init__(self, host, port, framing='slip', on_packet=None,
+                 connect_timeout=5.0):
+        """
+        host, port: console address
+        framing: 'slip' (OSC 1.1) or 'length' (OSC 1.0)
+        on_packet: callable(packet_bytes, (host, port)) run on the reader
+            thread for every received packet, None to ignore received data
+        """
+        if framing not in TCP_FRAMINGS:
+            raise ValueError(f"tcp_framing must be one of {TCP_FRAMINGS}")
+        self.host = host
+        self.port = port
+        self.framing = framing
+        self.on_packet = on_packet
+        self.connect_timeout = connect_timeout
+        self._encode = slip_encode if framing == 'slip' else length_encode
+        self._decoder_class = SlipDecoder if framing == 'slip' else LengthDecoder
+        self._write_lock = threading.Lock()
+        self._sock = None
+        self._reader = None
+        self._closed = False
+        self.connect()
+
+    def connect(self):
+        """
+        Open the connection and start the reader thread
+        """
+        self._sock = socket.create_connection((self.host, self.port),
+                                              timeout=self.connect_timeout)
+        self._sock.settimeout(None)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = threading.Thread(target=self._read_loop,
+                                        args=(self._sock,),
+                                        name='osc-tcp-reader', daemon=True)
+        self._reader.start()
+        logger.info(f"OSC TCP connected to {self.host}:{self.port} "
+                    f"framing={self.framing}")
+
+    def send(self, packet):
+        """
+        Frame and send one packet
+        """
+        self.send_many((packet,))
+
+    def send_many(self, packets):
+        """
+        Frame several packets into one buffer and write it with a single
+        sendall. Reconnects once if the connection was lost.
+        """
+        data = b''.join(self._encode(packet) for packet in packets)
+        with self._write_lock:
+            try:
+                self._sock.sendall(data)
+            except OSError as e:
+                if self._closed:
+                    raise
+                logger.error(f"OSC TCP send failed ({e}), reconnecting")
+                self._sock.close()
+                self.connect()
+                self._sock.sendall(data)
+
+    def _read_loop(self, sock):
+        """
+        Reader thread, decodes the byte stream into packets
+        """
+        decoder = self._decoder_class()
+        while True:
+            try:
+                data = sock.recv(TCP_RECV_SIZE)
+            except OSError:
+                break
+            if not data:
+                break
+            try:
+                packets = decoder.feed(data)
+            except ParseError as e:
+                # Framing is lost, nothing after this can be trusted.
+                # The next send reconnects.
+                logger.error(f"OSC TCP stream from {self.host}:{self.port} "
+                             f"is corrupt, closing connection: {e}")
+                sock.close()
+                return
+            for packet in packets:
+                if self.on_packet:
+                    try:
+                        self.on_packet(packet, (self.host, self.port))
+                    except Exception:
+                        logger.exception("OSC TCP packet handler failed")
+        if not self._closed:
+            logger.warning(f"OSC TCP connection to {self.host}:{self.port} "
+                           f"closed by peer")
+
+    def close(self):
+        """
+        Close the connection, the reader thread exits on its own
+        """
+        self._closed = True
+        if self._sock:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
@@ -0,0 +1,386 @@
+"""
+This script was created with the help of AI.
+TX rate limiting for OSCHandler. A token bucket decides when a message
+may go out, a single long lived sender thread drains anything that had
+to wait.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from osc.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_MODES = ('buffer', 'drop', 'coalesce')
+
+
+class TokenBucket:
+    """
+    Classic token bucket. Tokens refill at rate per second up to burst,
+    each message spends one token.
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        rate: tokens added per second, must be greater than 0
+        burst: most tokens that can be saved up, 1 means no bursting
+        """
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.last = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def try_acquire(self, now=None):
+        """
+        Spend a token if one is available, returns True if spent.
+        """
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def time_until_token(self, now=None):
+        """
+        Seconds until a token is available, 0.0 if one is ready now.
+        """
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class RateLimitedSender:
+    """
+    Applies a token bucket to outgoing messages. Messages that find a
+    token are sent right away on the caller thread, the rest are either
+    dropped or queued for the sender thread depending on mode.
+    Counters:
+        accepted: sent immediately
+        delayed: queued for the sender thread
+        dropped: discarded, either in 'drop' mode or pushed out of a
+            full buffer
+        coalesced: replaced by a newer message to the same address
+    """
+
+    def __init__(self, send, rate, burst=1, mode='buffer', max_size=50):
+        """
+        send: callable(address, args) that actually transmits
+        rate: messages per second allowed
+        burst: messages that may be sent back to back after idle time
+        mode: 'buffer' queue messages until a token is free,
+              'drop' discard messages sent without a token,
+              'coalesce' keep only the newest args per address, for
+              absolute values like /eos/chan/N/at where stale
+              intermediate values are useless
+        max_size: buffer length, oldest messages are dropped when full.
+            Not used by 'coalesce', its size is bounded by the number
+            of distinct addresses.
+        """
+        if mode not in RATE_LIMIT_MODES:
+            raise ValueError(f"rate_limit_mode must be one of {RATE_LIMIT_MODES}")
+        self._send = send
+        self.bucket = TokenBucket(rate, burst)
+        self.mode = mode
+        self.queue = deque(maxlen=max_size)
+        # Used by coalesce mode, dicts keep insertion order so addresses
+        # still go out oldest first
+        self.pending = {}
+        self.accepted = 0
+        self.delayed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        # Sends happen while holding the lock to keep messages in order
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def submit(self, address, args, send=None):
+        """
+        Send now if a token is free, otherwise queue or drop by mode.
+        send overrides the sending callable for this one item, used to
+        push a whole batch through the limiter as a single entry.
+        Returns 'sent', 'queued' or 'dropped'.
+        """
+        send = send or self._send
+        with self._cond:
+            status = self._admit(address, args, send)
+            if status == 'sent':
+                send(address, args)
+            if status != 'queued':
+                return status
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='osc-tx-ratelimit', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+            return status
+
+    def _admit(self, address, args, send):
+        """
+        Returns 'sent' if the message has a token and should be sent
+        now, otherwise queues ('queued') or drops ('dropped') it by mode
+        and updates the counters.
+        """
+        if not self._waiting() and self.bucket.try_acquire():
+            self.accepted += 1
+            return 'sent'
+        if self.mode == 'drop':
+            self.dropped += 1
+            return 'dropped'
+        if self.mode == 'coalesce':
+            if address in self.pending:
+                self.coalesced += 1
+            else:
+                self.delayed += 1
+            self.pending[address] = (args, send)
+        else:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append((address, args, send))
+            self.delayed += 1
+        return 'queued'
+
+    def _pop_next(self):
+        """
+        Remove and return the oldest waiting (address, args, send)
+        """
+        if self.pending:
+            address = next(iter(self.pending))
+            args, send = self.pending.pop(address)
+            return address, args, send
+        return self.queue.popleft()
+
+    def _run(self):
+        """
+        Sender thread, waits for a token then sends the oldest message.
+        """
+        with self._cond:
+            while not self._stopped:
+                if not self._waiting():
+                    self._cond.wait()
+                    continue
+                delay = self.bucket.time_until_token()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                self.bucket.try_acquire()
+                address, args, send = self._pop_next()
+                try:
+                    send(address, args)
+                except Exception:
+                    # One bad message must not kill the sender thread
+                    logger.exception(f"Rate limited send of {address} failed")
+
+    def _waiting(self):
+        """
+        Number of messages waiting for the sender thread
+        """
+        return len(self.queue) + len(self.pending)
+
+    def stats(self):
+        """
+        Returns a dict of the counters and current queue depth
+        """
+        with self._cond:
+            return {
+                'accepted': self.accepted,
+                'delayed': self.delayed,
+                'dropped': self.dropped,
+                'coalesced': self.coalesced,
+                'queued': self._waiting(),
+            }
+
+    def stop(self):
+        """
+        Stop the sender thread, anything still queued is discarded.
+        """
+        with self._cond:
+            self._stopped = True
+            self.queue.clear()
+            self.pending.clear()
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+
+class AsyncRateLimitedSender(RateLimitedSender):
+    """
+    asyncio flavour of RateLimitedSender for AsyncOSCHandler. Waiting
+    messages are drained by a loop.call_later callback instead of a
+    thread. Must only be used from the event loop thread.
+    """
+
+    def __init__(self, send, rate, burst=1, mode='buffer', max_size=50):
+        """
+        Same arguments as RateLimitedSender
+        """
+        super().__init__(send, rate, burst, mode, max_size)
+        self._drain_handle = None
+
+    def submit(self, address, args, send=None):
+        """
+        Send now if a token is free, otherwise queue or drop by mode.
+        Returns 'sent', 'queued' or 'dropped'.
+        """
+        send = send or self._send
+        status = self._admit(address, args, send)
+        if status == 'sent':
+            send(address, args)
+        elif status == 'queued':
+            self._schedule_drain()
+        return status
+
+    def _schedule_drain(self):
+        if self._drain_handle is None and self._waiting() and not self._stopped:
+            self._drain_handle = asyncio.get_running_loop().call_later(
+                self.bucket.time_until_token(), self._drain)
+
+    def _drain(self):
+        """
+        Send waiting messages while tokens last, then reschedule.
+        """
+        self._drain_handle = None
+        while self._waiting() and self.bucket.try_acquire():
+            address, args, send = self._pop_next()
+            try:
+                send(address, args)
+            except Exception:
+                logger.exception(f"Rate limited send of {address} failed")
+        self._schedule_drain()
+
+    def stop(self):
+        """
+        Cancel the pending drain, anything still queued is discarded.
+        """
+        self._stopped = True
+        if self._drain_handle:
+            self._drain_handle.cancel()
+            self._drain_handle = None
+        self.queue.clear()
+        self.pending.clear()
+
+
+class AIMDController:
+    """
+    Additive increase, multiplicative decrease control of the send rate
+    to one console, driven by ping round trips and losses. While the
+    smoothed round trip stays near the best seen the rate climbs by
+    increase messages per second on every reply. A loss, or a smoothed
+    round trip past rtt_tolerance times the baseline plus rtt_margin,
+    cuts the rate by
+    decrease, at most once per hold time so one slow burst is not
+    punished repeatedly. on_rtt and on_loss may be called from any
+    thread.
+    """
+
+    def __init__(self, min_interval=0.01, max_interval=0.25,
+                 initial_interval=0.05, increase=1.0, decrease=0.5,
+                 rtt_tolerance=2.0, rtt_margin=0.005, hold=0.5,
+                 smoothing=0.125):
+        """
+        min_interval, max_interval: bounds of the send interval in
+            seconds, the rate stays between 1 / max_interval and
+            1 / min_interval messages per second
+        initial_interval: interval before any feedback
+        increase: messages per second added per good round trip
+        decrease: factor the rate is multiplied by on congestion
+        rtt_tolerance, rtt_margin: a smoothed round trip over
+            rtt_tolerance * baseline + rtt_margin seconds counts as
+            congestion, the margin keeps sub millisecond noise on a
+            fast link from triggering it
+        hold: seconds after a decrease before another one
+        smoothing: weight of each new round trip in the smoothed value
+        """
+        if not 0 < min_interval <= initial_interval <= max_interval:
+            raise ValueError("need 0 < min_interval <= initial_interval "
+                             "<= max_interval")
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+        self.min_rate = 1.0 / max_interval
+        self.max_rate = 1.0 / min_interval
+        self.rate = 1.0 / initial_interval
+        self.increase = increase
+        self.decrease = decrease
+        self.rtt_tolerance = rtt_tolerance
+        self.rtt_margin = rtt_margin
+        self.hold = hold
+        self.smoothing = smoothing
+        self.srtt = None
+        # Lowest round trip seen, relaxed slowly so a route change that
+        # raises the floor for good is eventually accepted
+        self.base_rtt = None
+        self.increases = 0
+        self.decreases = 0
+        self._last_decrease = float('-inf')
+        self._lock = threading.Lock()
+
+    def get_interval(self):
+        """
+        Current seconds between sends
+        """
+        return 1.0 / self.rate
+
+    def on_rtt(self, rtt, now=None):
+        """
+        Feed one measured round trip in seconds
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.srtt is None:
+                self.srtt = rtt
+                self.base_rtt = rtt
+            else:
+                self.srtt += (rtt - self.srtt) * self.smoothing
+                if rtt < self.base_rtt:
+                    self.base_rtt = rtt
+                else:
+                    self.base_rtt += (rtt - self.base_rtt) * \
+                        self.smoothing * 0.01
+            if self.srtt > (self.base_rtt * self.rtt_tolerance +
+                            self.rtt_margin):
+                self._decrease(now)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+                self.increases += 1
+
+    def on_loss(self, count=1, now=None):
+        """
+        Feed pings that were never answered
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._decrease(now)
+
+    def _decrease(self, now):
+        """
+        Call with the lock held
+        """
+        if now - self._last_decrease < self.hold:
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.decreases += 1
+
+    def stats(self):
+        """
+        Returns the current rate and interval and the controller inputs
+        """
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'interval': 1.0 / self.rate,
+                'srtt': self.srtt,
+                'base_rtt': self.base_rtt,
+                'increases': self.increases,
+                'decreases': self.decreases,
+            }
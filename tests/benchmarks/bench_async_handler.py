@@ -0,0 +1,139 @@
+### Created with the help of AI ###
+
+"""
+Compare the threaded OSCHandler against AsyncOSCHandler over loopback.
+Measures send throughput, and receive throughput by blasting messages
+at each handler's rx port and timing until the listener has seen them.
+use command:
+python -m tests.benchmarks.bench_async_handler
+"""
+
+import asyncio
+import logging
+import socket
+import threading
+import time
+from osc.asyncoschandler import AsyncOSCHandler
+from osc.logging_config import setup_logging
+from osc.oschandler import OSCHandler
+from osc.oscpacket import encode_message
+
+LOOPBACK = '127.0.0.1'
+SINK_PORT = 9100
+ITERATIONS = 50000
+RX_ITERATIONS = 20000
+RX_TIMEOUT = 10.0
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+def _free_port():
+    """
+    Ask the OS for a free UDP port on loopback
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind((LOOPBACK, 0))
+        return sock.getsockname()[1]
+
+
+def _blast(port, count):
+    """
+    Send count pre-encoded messages to port from a raw socket, paced in
+    small bursts so the kernel receive buffer does not overflow.
+    """
+    dgram = encode_message('/eos/out/active/wheel/1', ['Pan [0]', 2, 0.5])
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for i in range(count):
+            sock.sendto(dgram, (LOOPBACK, port))
+            if i % 20 == 0:
+                time.sleep(0.001)
+
+
+def bench_threaded_send(iterations):
+    osc_handler = OSCHandler(mode='tx', tx_udp_ip=LOOPBACK, tx_port=SINK_PORT)
+    start = time.perf_counter()
+    for i in range(iterations):
+        osc_handler.send_message('/eos/wheel/pan', [i * 0.001])
+    return iterations / (time.perf_counter() - start)
+
+
+async def bench_async_send(iterations):
+    osc_handler = AsyncOSCHandler(mode='tx', tx_udp_ip=LOOPBACK,
+                                  tx_port=SINK_PORT)
+    await osc_handler.start()
+    start = time.perf_counter()
+    for i in range(iterations):
+        osc_handler.send_message('/eos/wheel/pan', [i * 0.001])
+        if i % 1000 == 0:
+            # Let the transport drain its buffer
+            await asyncio.sleep(0)
+    rate = iterations / (time.perf_counter() - start)
+    osc_handler.close()
+    return rate
+
+
+def bench_threaded_receive(count):
+    port = _free_port()
+    osc_handler = OSCHandler(mode='rx', rx_udp_ip=LOOPBACK, rx_port=port)
+    seen = [0]
+    done = threading.Event()
+
+    def handler(address, *args):
+        seen[0] += 1
+        if seen[0] >= count:
+            done.set()
+
+    osc_handler.register_osc_listener('/eos/out/active/wheel/1', handler)
+    start = time.perf_counter()
+    _blast(port, count)
+    done.wait(RX_TIMEOUT)
+    elapsed = time.perf_counter() - start
+    osc_handler.stop_receiving()
+    return seen[0] / elapsed, seen[0]
+
+
+async def bench_async_receive(count):
+    port = _free_port()
+    osc_handler = AsyncOSCHandler(mode='rx', rx_udp_ip=LOOPBACK, rx_port=port)
+    await osc_handler.start()
+    seen = [0]
+    done = asyncio.Event()
+
+    def handler(address, *args):
+        seen[0] += 1
+        if seen[0] >= count:
+            done.set()
+
+    osc_handler.register_osc_listener('/eos/out/active/wheel/1', handler)
+    start = time.perf_counter()
+    await asyncio.to_thread(_blast, port, count)
+    try:
+        await asyncio.wait_for(done.wait(), RX_TIMEOUT)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - start
+    osc_handler.close()
+    return seen[0] / elapsed, seen[0]
+
+
+def main():
+    """
+    Run each benchmark and print the results side by side
+    """
+    # Keep per message logging out of the measurement
+    logging.disable(logging.CRITICAL)
+    threaded_tx = bench_threaded_send(ITERATIONS)
+    async_tx = asyncio.run(bench_async_send(ITERATIONS))
+    threaded_rx, threaded_seen = bench_threaded_receive(RX_ITERATIONS)
+    async_rx, async_seen = asyncio.run(bench_async_receive(RX_ITERATIONS))
+    logging.disable(logging.NOTSET)
+    print(f"send     threaded: {threaded_tx:10.0f} msg/s  "
+          f"async: {async_tx:10.0f} msg/s")
+    print(f"receive  threaded: {threaded_rx:10.0f} msg/s "
+          f"({threaded_seen}/{RX_ITERATIONS})  "
+          f"async: {async_rx:10.0f} msg/s ({async_seen}/{RX_ITERATIONS})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+### Created with the help of AI ###
+
+"""
+Compare python-osc's Dispatcher against the AddressIndex used by
+OSCHandler for finding the listeners of a received address, with
+hundreds of registered patterns. The address stream repeats a few
+hundred console addresses, like a busy show, so the cached and
+uncached index are both reported. Substring listeners are compared
+the same way, a loop of 'in' checks against SubstringIndex.
+use command:
+python -m tests.benchmarks.bench_dispatch
+"""
+
+import logging
+import time
+from pythonosc.dispatcher import Dispatcher
+from osc.logging_config import setup_logging
+from osc.oscmatch import AddressIndex, SubstringIndex
+
+PATTERN_COUNTS = (10, 100, 500)
+SUBSTRING_COUNTS = (5, 50, 200)
+LOOKUPS = 20000
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+def _handler(address, *args):
+    pass
+
+
+def _patterns(count):
+    """
+    A mix of exact addresses and wildcard patterns, one in four wild
+    """
+    patterns = []
+    for i in range(count):
+        if i % 4 == 0:
+            patterns.append(f'/eos/out/user/{i}/*')
+        elif i % 4 == 1:
+            patterns.append(f'/eos/out/active/wheel/{i}')
+        elif i % 4 == 2:
+            patterns.append(f'/eos/out/get/cp/{i}/list/?/[0-9]')
+        else:
+            patterns.append(f'/eos/out/fader/{{1,2}}/{i}')
+    return patterns
+
+
+def _addresses():
+    """
+    The received address stream, 400 distinct addresses
+    """
+    distinct = ([f'/eos/out/active/wheel/{i}' for i in range(200)] +
+                [f'/eos/out/user/{i}/cmd' for i in range(100)] +
+                [f'/eos/out/fader/1/{i}' for i in range(100)])
+    return [distinct[i % len(distinct)] for i in range(LOOKUPS)]
+
+
+def _substrings(count):
+    """
+    Substrings that mostly miss, like listeners for other users
+    """
+    return [f'/user/{i + 2}/' if i % 2 else f'/eos/out/get/cp/{i}/'
+            for i in range(count)]
+
+
+def _time_lookups(lookup, addresses):
+    start = time.perf_counter()
+    for address in addresses:
+        lookup(address)
+    return len(addresses) / (time.perf_counter() - start)
+
+
+def main():
+    """
+    Print lookups per second for each registered pattern count
+    """
+    logging.disable(logging.CRITICAL)
+    addresses = _addresses()
+    results = []
+    for count in PATTERN_COUNTS:
+        dispatcher = Dispatcher()
+        cached = AddressIndex()
+        uncached = AddressIndex(cache_size=0)
+        for pattern in _patterns(count):
+            dispatcher.map(pattern, _handler)
+            cached.add(pattern, _handler)
+            uncached.add(pattern, _handler)
+        results.append((
+            count,
+            _time_lookups(lambda a: list(dispatcher.handlers_for_address(a)),
+                          addresses),
+            _time_lookups(uncached.match, addresses),
+            _time_lookups(cached.match, addresses),
+        ))
+    substring_results = []
+    for count in SUBSTRING_COUNTS:
+        listeners = [(substring, _handler) for substring in _substrings(count)]
+        cached = SubstringIndex()
+        uncached = SubstringIndex(cache_size=0)
+        for substring, handler in listeners:
+            cached.add(substring, handler)
+            uncached.add(substring, handler)
+        substring_results.append((
+            count,
+            _time_lookups(lambda a: [h for s, h in listeners if s in a],
+                          addresses),
+            _time_lookups(uncached.match, addresses),
+            _time_lookups(cached.match, addresses),
+        ))
+    logging.disable(logging.NOTSET)
+    for count, python_osc, uncached, cached in results:
+        print(f"{count:4d} patterns  python-osc: {python_osc:10.0f}/s  "
+              f"index: {uncached:10.0f}/s  cached: {cached:10.0f}/s")
+    for count, loop, uncached, cached in substring_results:
+        print(f"{count:4d} substrings   'in' loop: {loop:10.0f}/s  "
+              f"index: {uncached:10.0f}/s  cached: {cached:10.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+### Created with the help of AI ###
+
+"""
+Measure send_message throughput with per message logging turned on,
+through the queued logging pipeline and with the file handlers called
+directly on the sending thread as setup_logging used to do. The
+messages go to the osc_output log in the user cache directory.
+use command:
+python -m tests.benchmarks.bench_logging
+"""
+
+import logging
+import time
+from osc import logging_config
+from osc.logging_config import setup_logging, stop_logging
+from osc.oschandler import OSCHandler
+
+TX_IP = '127.0.0.1'
+TX_PORT = 9100
+ITERATIONS = 20000
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+def _send_rate(osc_handler, iterations):
+    """
+    Returns (messages per second, p99 and max single send in ms)
+    """
+    times = []
+    clock = time.perf_counter
+    start = clock()
+    for i in range(iterations):
+        before = clock()
+        osc_handler.send_message('/eos/wheel/pan', [i * 0.001])
+        times.append(clock() - before)
+    rate = iterations / (clock() - start)
+    times.sort()
+    return rate, times[int(len(times) * 0.99)] * 1000, times[-1] * 1000
+
+
+def main(iterations=ITERATIONS):
+    """
+    Print messages per second for each logging setup
+    """
+    osc_handler = OSCHandler(mode='tx', tx_udp_ip=TX_IP, tx_port=TX_PORT)
+    root_logger = logging.getLogger('')
+    queued_handlers = list(root_logger.handlers)
+    file_handlers = list(logging_config._queue_listener.handlers)
+
+    osc_handler.set_message_logging(False)
+    off = _send_rate(osc_handler, iterations)
+    osc_handler.set_message_logging(True)
+    queued = _send_rate(osc_handler, iterations)
+    # Let the listener catch up before the next run
+    drain_start = time.perf_counter()
+    stop_logging()
+    drain = time.perf_counter() - drain_start
+    # Old setup, every handler runs on the sending thread
+    root_logger.handlers = file_handlers
+    direct = _send_rate(osc_handler, iterations)
+    root_logger.handlers = queued_handlers
+    for name, (rate, p99, worst) in (('message logging off', off),
+                                     ('queued pipeline', queued),
+                                     ('handlers on send thread', direct)):
+        print(f"{name:24s} {rate:10.0f} msg/s  p99 {p99:6.3f} ms  "
+              f"max {worst:7.3f} ms")
+    print(f"queued records written {drain:.2f}s after the last send")
+
+
+if __name__ == "__main__":
+    main()
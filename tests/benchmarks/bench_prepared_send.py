@@ -0,0 +1,54 @@
+### Created with the help of AI ###
+
+"""
+Compare OSCHandler.send_message against a prepared sender for the
+joystick wheel hot path. Sends over loopback to a port nobody listens
+on, so only the python side and the sendto syscall are measured.
+use command:
+python -m tests.benchmarks.bench_prepared_send
+"""
+
+import logging
+import time
+from osc.logging_config import setup_logging
+from osc.oschandler import OSCHandler
+
+TX_IP = '127.0.0.1'
+TX_PORT = 9100
+ITERATIONS = 100000
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+def _time_loop(send, iterations):
+    """
+    Run send(value) iterations times, returns messages per second
+    """
+    start = time.perf_counter()
+    for i in range(iterations):
+        send(i * 0.001)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed
+
+
+def main(iterations=ITERATIONS):
+    """
+    Run both send paths and print messages per second for each
+    """
+    # Keep the per message osc_output log out of the measurement
+    logging.disable(logging.CRITICAL)
+    osc_handler = OSCHandler(mode='tx', tx_udp_ip=TX_IP, tx_port=TX_PORT)
+    address = '/eos/wheel/fine/pan'
+    current = _time_loop(
+        lambda value: osc_handler.send_message(address, [value]), iterations)
+    pan = osc_handler.prepare(address, 'f')
+    prepared = _time_loop(pan.send, iterations)
+    logging.disable(logging.NOTSET)
+    print(f"send_message : {current:12.0f} msg/s")
+    print(f"prepared send: {prepared:12.0f} msg/s "
+          f"({prepared / current:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
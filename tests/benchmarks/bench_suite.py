@@ -0,0 +1,319 @@
+### Created with the help of AI ###
+
+"""
+Benchmark suite for the osc package over loopback sockets, no console
+required. Results are printed as JSON, one entry per measurement, so
+runs can be saved and compared for regressions.
+Covers:
+    send      OSCHandler.send_message with and without rate limiting,
+              and prepared sends
+    dispatch  receive dispatch rate against the number of registered
+              listeners and substring listeners, plus a loopback run
+              through the receive socket
+    ping      etcosc ping round trip percentiles against a loopback
+              responder standing in for the console
+    palette   parse_cp_reply on color palette replies
+use command:
+python -m tests.benchmarks.bench_suite
+python -m tests.benchmarks.bench_suite --quick --output bench_output.txt
+python -m tests.benchmarks.bench_suite --only send dispatch
+"""
+
+import argparse
+import json
+import logging
+import platform
+import socket
+import threading
+import time
+from osc.etc_parsers.palettes import parse_cp_reply
+from osc.etcosc import etcosc
+from osc.logging_config import setup_logging
+from osc.oschandler import OSCHandler
+from osc.oscpacket import decode_args, encode_message, parse_address
+
+LOOPBACK = '127.0.0.1'
+SINK_PORT = 9100
+LISTENER_COUNTS = (1, 10, 100, 500)
+SUBSTRING_COUNTS = (0, 10, 100)
+PING_INTERVAL = 0.005
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+def _free_port():
+    """
+    Ask the OS for a free UDP port on loopback
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind((LOOPBACK, 0))
+        return sock.getsockname()[1]
+
+
+def _result(group, name, value, unit, **params):
+    return {'group': group, 'name': name, 'value': round(value, 3),
+            'unit': unit, 'params': params}
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def bench_send(iterations):
+    """
+    Messages per second through send_message, the rate limiter and a
+    prepared sender
+    """
+    results = []
+    osc_handler = OSCHandler(mode='tx', tx_udp_ip=LOOPBACK, tx_port=SINK_PORT)
+    cases = (('send_message', None), ('send_message_rate_limited', 'buffer'),
+             ('send_message_coalesce', 'coalesce'))
+    for name, mode in cases:
+        if mode:
+            # Far above the send rate, measures the limiter bookkeeping
+            osc_handler.set_tx_rate_limit(min_send_interval=1e-6,
+                                          rate_limit_mode=mode, burst=100)
+        start = time.perf_counter()
+        for i in range(iterations):
+            osc_handler.send_message('/eos/wheel/pan', [i * 0.001])
+        elapsed = time.perf_counter() - start
+        osc_handler.set_tx_rate_limit(min_send_interval=0.0)
+        results.append(_result('send', name, iterations / elapsed, 'msg/s',
+                               iterations=iterations))
+    pan = osc_handler.prepare('/eos/wheel/pan', 'f')
+    start = time.perf_counter()
+    for i in range(iterations):
+        pan.send(i * 0.001)
+    elapsed = time.perf_counter() - start
+    results.append(_result('send', 'prepared', iterations / elapsed, 'msg/s',
+                           iterations=iterations))
+    return results
+
+
+def _console_stream():
+    """
+    Console output the receive path sees, mostly addresses nobody
+    listens to
+    """
+    dgrams = []
+    for i in range(200):
+        dgrams.append(encode_message(f'/eos/out/active/wheel/{i % 40}',
+                                     [f'Pan [{i}]', 2, i * 0.5]))
+        dgrams.append(encode_message(f'/eos/out/user/{i % 5}/cmd',
+                                     [f'Chan {i}']))
+    dgrams.append(encode_message('/eos/out/ping', ['1.0']))
+    return dgrams
+
+
+def bench_dispatch(iterations):
+    """
+    Packets per second through the OSCHandler receive path, fed
+    straight from memory so only parsing and dispatch are measured
+    """
+    results = []
+    stream = _console_stream()
+    client = (LOOPBACK, 0)
+    def handler(address, *args):
+        pass
+    for substrings in SUBSTRING_COUNTS:
+        for listeners in LISTENER_COUNTS:
+            osc_handler = OSCHandler(mode='rx', rx_port=0, rx_autostart=False)
+            for i in range(listeners):
+                pattern = (f'/eos/out/fader/{i}/*' if i % 2
+                           else f'/eos/out/get/cp/{i}')
+                osc_handler.register_osc_listener(pattern, handler)
+            osc_handler.register_osc_listener('/eos/out/ping', handler)
+            for i in range(substrings):
+                osc_handler.register_osc_substring(f'/user/{i + 10}/', handler)
+            packets = [(dgram, len(dgram)) for dgram in stream]
+            count = 0
+            start = time.perf_counter()
+            while count < iterations:
+                for dgram, size in packets:
+                    osc_handler._handle_packet(dgram, size, client)
+                count += len(packets)
+            elapsed = time.perf_counter() - start
+            results.append(_result('dispatch', 'handle_packet',
+                                   count / elapsed, 'pkt/s',
+                                   listeners=listeners + 1,
+                                   substrings=substrings))
+    # Reference: decoding every message, the cost lazy decoding avoids
+    start = time.perf_counter()
+    count = 0
+    while count < iterations:
+        for dgram in stream:
+            address, offset = parse_address(dgram)
+            decode_args(dgram, offset, len(dgram))
+        count += len(stream)
+    elapsed = time.perf_counter() - start
+    results.append(_result('dispatch', 'decode_everything', count / elapsed,
+                           'pkt/s'))
+    results.append(bench_loopback_receive(iterations))
+    return results
+
+
+def bench_loopback_receive(iterations):
+    """
+    Packets per second through the real receive socket
+    """
+    port = _free_port()
+    osc_handler = OSCHandler(mode='rx', rx_udp_ip=LOOPBACK, rx_port=port)
+    seen = [0]
+    done = threading.Event()
+    def handler(address, *args):
+        seen[0] += 1
+        if seen[0] >= iterations:
+            done.set()
+    osc_handler.register_osc_listener('/eos/out/active/wheel/1', handler)
+    dgram = encode_message('/eos/out/active/wheel/1', ['Pan [0]', 2, 0.5])
+    start = time.perf_counter()
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for i in range(iterations):
+            sock.sendto(dgram, (LOOPBACK, port))
+            if i % 20 == 0:
+                # Small bursts so the kernel buffer does not overflow
+                time.sleep(0.0005)
+    done.wait(10.0)
+    elapsed = time.perf_counter() - start
+    osc_handler.stop_receiving()
+    return _result('dispatch', 'loopback_receive', seen[0] / elapsed,
+                   'pkt/s', received=seen[0], sent=iterations)
+
+
+def _ping_responder(sock, reply_port, stop):
+    """
+    Console stand-in, answers /eos/ping with /eos/out/ping and the
+    same argument
+    """
+    while not stop.is_set():
+        try:
+            data = sock.recv(1024)
+        except socket.timeout:
+            continue
+        except OSError:
+            return
+        address, offset = parse_address(data)
+        if address == '/eos/ping':
+            args = decode_args(data, offset, len(data))
+            sock.sendto(encode_message('/eos/out/ping', args),
+                        (LOOPBACK, reply_port))
+
+
+def bench_ping(samples):
+    """
+    Round trip percentiles in milliseconds through etcosc ping
+    """
+    console = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    console.bind((LOOPBACK, 0))
+    console.settimeout(0.2)
+    rx_port = _free_port()
+    stop = threading.Event()
+    threading.Thread(target=_ping_responder,
+                     args=(console, rx_port, stop), daemon=True).start()
+    osc = etcosc(mode='txrx', tx_udp_ip=LOOPBACK,
+                 tx_port=console.getsockname()[1], rx_udp_ip=LOOPBACK,
+                 rx_port=rx_port, ping_frequency=PING_INTERVAL)
+    latencies = []
+    done = threading.Event()
+    def collect(address, *args):
+        # Registered after etcosc's ping listener, so it runs second
+        if osc.ping_latency >= 0:
+            latencies.append(osc.ping_latency * 1000)
+        if len(latencies) >= samples:
+            done.set()
+    time.sleep(0.05)
+    osc.osc_handler.register_osc_listener('/eos/out/ping', collect)
+    done.wait(samples * PING_INTERVAL * 10 + 5)
+    stop.set()
+    osc.osc_handler.stop_receiving()
+    console.close()
+    ordered = sorted(latencies)
+    if not ordered:
+        return [_result('ping', 'rtt_samples', 0, 'count')]
+    return [_result('ping', f'rtt_{name}', _percentile(ordered, fraction),
+                    'ms', samples=len(ordered))
+            for name, fraction in (('p50', 0.5), ('p90', 0.9),
+                                   ('p99', 0.99), ('max', 1.0))]
+
+
+def _palette_replies(count):
+    replies = []
+    for cp in range(1, count + 1):
+        uid = f'4992522F-2884-4DF1-BFF2-{cp:012d}'
+        replies.append((f'/eos/out/get/cp/{cp}/list/0/6',
+                        (cp, uid, f'Color {cp}', False, False, 0)))
+        replies.append((f'/eos/out/get/cp/{cp}/channels/list/0/7',
+                        (cp, uid, '31-47', '151-166', '201-204', 211,
+                         '401-423')))
+        replies.append((f'/eos/out/get/cp/{cp}/byType/list/0/7',
+                        (cp, uid, 31, 151, 201, 211, 401)))
+    return replies
+
+
+def bench_palette(iterations):
+    """
+    Color palette replies parsed per second
+    """
+    replies = _palette_replies(100)
+    count = 0
+    start = time.perf_counter()
+    while count < iterations:
+        for address, args in replies:
+            parse_cp_reply(address, args)
+        count += len(replies)
+    elapsed = time.perf_counter() - start
+    return [_result('palette', 'parse_cp_reply', count / elapsed, 'msg/s')]
+
+
+BENCHMARKS = {
+    'send': (bench_send, 50000),
+    'dispatch': (bench_dispatch, 20000),
+    'ping': (bench_ping, 200),
+    'palette': (bench_palette, 100000),
+}
+
+
+def run(groups=None, scale=1.0):
+    """
+    Run the chosen benchmark groups, returns the JSON ready report
+    """
+    # Keep log writes out of the measurements
+    logging.disable(logging.CRITICAL)
+    try:
+        results = []
+        for group, (bench, iterations) in BENCHMARKS.items():
+            if groups and group not in groups:
+                continue
+            results.extend(bench(max(1, int(iterations * scale))))
+    finally:
+        logging.disable(logging.NOTSET)
+    return {
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': scale,
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m tests.benchmarks.bench_suite',
+        description='Run the osc benchmark suite and print JSON results.')
+    parser.add_argument('--only', nargs='+', choices=tuple(BENCHMARKS),
+                        help='benchmark groups to run, default all')
+    parser.add_argument('--quick', action='store_true',
+                        help='a tenth of the iterations, for smoke runs')
+    parser.add_argument('--output', help='also write the JSON to this file')
+    args = parser.parse_args(argv)
+    report = run(args.only, 0.1 if args.quick else 1.0)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+
+if __name__ == "__main__":
+    main()
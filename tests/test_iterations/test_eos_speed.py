@@ -30,7 +30,11 @@ osc_manager = OSCHandler(mode='txrx', tx_udp_ip=TX_IP, tx_port=TX_PORT, rx_port=
 # logger.info("receiver started")
 
 while True:
-    for i in range(0, 101):
-        my_args = [i]
-        osc_manager.send_message(OSC_TX_STRING, my_args)
-        # time.sleep(0.01)
\ No newline at end of file
+    # One encode pass and one log line per sweep, instead of per message
+    stats = osc_manager.send_many(
+        (OSC_TX_STRING, [i]) for i in range(0, 101))
+    logger.info(
+        "sweep: %d messages in %d datagrams, %.0f msg/s",
+        stats['messages'], stats['datagrams'], stats['messages_per_sec']
+    )
+    # time.sleep(0.01)
\ No newline at end of file
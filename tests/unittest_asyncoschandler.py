@@ -0,0 +1,78 @@
+"""
+This file was created with the help of AI.
+
+Unit tests for the AsyncOSCHandler module using Python's built-in unittest framework.
+"""
+
+import asyncio
+import unittest
+import logging
+from osc.asyncoschandler import AsyncOSCHandler
+from osc.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class TestAsyncOSCHandler(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # Receiver on an ephemeral port, sender pointed at it
+        self.receiver = AsyncOSCHandler(mode='rx', rx_udp_ip='127.0.0.1',
+                                        rx_port=0)
+        await self.receiver.start()
+        port = self.receiver._rx_transport.get_extra_info('sockname')[1]
+        self.sender = AsyncOSCHandler(mode='tx', tx_udp_ip='127.0.0.1',
+                                      tx_port=port)
+        await self.sender.start()
+        self.received = asyncio.Queue()
+
+    async def asyncTearDown(self):
+        self.sender.close()
+        self.receiver.close()
+
+    def _handler(self, address, *args):
+        self.received.put_nowait((address, list(args)))
+
+    async def _next(self):
+        return await asyncio.wait_for(self.received.get(), timeout=1.0)
+
+    def test_invalid_mode(self):
+        """Test that invalid mode raises ValueError."""
+        with self.assertRaises(ValueError):
+            AsyncOSCHandler(mode='invalid')
+
+    async def test_listener_and_substring(self):
+        """Test exact listeners and substring listeners both fire."""
+        self.receiver.register_osc_listener('/eos/out/ping', self._handler)
+        self.receiver.register_osc_substring('/user/1', self._handler)
+        self.sender.send_message('/eos/out/ping', ['1'])
+        self.sender.send_message('/eos/out/user/1/cmd', ['Chan 1'])
+        self.assertEqual(await self._next(), ('/eos/out/ping', ['1']))
+        self.assertEqual(await self._next(),
+                         ('/eos/out/user/1/cmd', ['Chan 1']))
+
+    async def test_prepared_send(self):
+        """Test a prepared sender on the event loop transport."""
+        self.receiver.register_osc_listener('/eos/wheel/pan', self._handler)
+        pan = self.sender.prepare('/eos/wheel/pan', 'f')
+        pan.send(1.5)
+        pan.send(2.5)
+        self.assertEqual(await self._next(), ('/eos/wheel/pan', [1.5]))
+        self.assertEqual(await self._next(), ('/eos/wheel/pan', [2.5]))
+
+    async def test_rate_limit_coalesce(self):
+        """Test coalesce rate limiting drains through the event loop."""
+        self.receiver.register_osc_listener('/eos/chan/1/at', self._handler)
+        self.sender.set_tx_rate_limit(min_send_interval=0.02,
+                                      rate_limit_mode='coalesce')
+        for value in range(10):
+            self.sender.send_message('/eos/chan/1/at', [value])
+        self.assertEqual(await self._next(), ('/eos/chan/1/at', [0]))
+        self.assertEqual(await self._next(), ('/eos/chan/1/at', [9]))
+        stats = self.sender.get_tx_stats()
+        self.assertEqual(stats['coalesced'], 8)
+        self.assertEqual(stats['queued'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
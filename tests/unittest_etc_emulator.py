@@ -0,0 +1,129 @@
+"""
+This file was created with the help of AI.
+
+Unit tests for the etc_emulator module using Python's built-in unittest
+framework.
+"""
+
+import socket
+import threading
+import time
+import unittest
+import logging
+from osc.logging_config import setup_logging
+from osc.etc_emulator import ConsoleEmulator, EmulatedShow
+from osc.etc_parsers.palettes import parse_cp_reply
+from osc.oscpacket import decode_args, encode_message, parse_address
+from osc.osctcp import TCPTransport
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class TestConsoleEmulator(unittest.TestCase):
+    def setUp(self):
+        self.host = '127.0.0.1'
+        self.client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.client.bind((self.host, 0))
+        self.client.settimeout(1.0)
+        self.addCleanup(self.client.close)
+
+    def _start(self, **kwargs):
+        """Start an emulator on a free port that replies to the sender."""
+        kwargs.setdefault('show', EmulatedShow(palettes=5, channels=64))
+        emulator = ConsoleEmulator(host=self.host, port=0, **kwargs).start()
+        self.addCleanup(emulator.stop)
+        return emulator
+
+    def _request(self, emulator, address, *args, replies=1):
+        """Send one request, returns the decoded replies."""
+        self.client.sendto(encode_message(address, args),
+                           (self.host, emulator.port))
+        received = []
+        for _ in range(replies):
+            data = self.client.recv(65536)
+            reply_address, offset = parse_address(data)
+            received.append((reply_address,
+                             decode_args(data, offset, len(data))))
+        return received
+
+    def test_ping_and_count(self):
+        """Test ping echoes its args and counts come from the show."""
+        emulator = self._start()
+        self.assertEqual(self._request(emulator, '/eos/ping', '12.5'),
+                         [('/eos/out/ping', ['12.5'])])
+        self.assertEqual(self._request(emulator, '/eos/get/cp/count'),
+                         [('/eos/out/get/cp/count', [5])])
+
+    def test_palette_index_replies_parse(self):
+        """Test a palette answers with list, channels and byType."""
+        emulator = self._start()
+        replies = self._request(emulator, '/eos/get/cp/index/0', replies=3)
+        parsed = [parse_cp_reply(address, args) for address, args in replies]
+        uids = {uid for uid, _fields in parsed}
+        self.assertEqual(len(uids), 1)
+        fields = {}
+        for _uid, part in parsed:
+            fields.update(part)
+        self.assertEqual(fields['palette_num'], '1')
+        self.assertEqual(fields['chan_ranges'],
+                         emulator.show.palettes[0]['ranges'])
+
+    def test_select_active(self):
+        """Test a palette selection reports channels, wheels and hue."""
+        emulator = self._start()
+        cp = emulator.show.palettes[1]
+        self.client.sendto(encode_message('/eos/user/3/cmd/color_palette/2/#'),
+                           (self.host, emulator.port))
+        replies = self._request(emulator, '/eos/user/3/cmd/select_active/#',
+                                replies=8)
+        self.assertEqual(replies[0][0], '/eos/out/active/chan')
+        # Adjacent fixture blocks may be merged into one range
+        active_ranges = replies[0][1][0].split()[0].split(',')
+        self.assertEqual(ConsoleEmulator._channels(active_ranges),
+                         ConsoleEmulator._channels(cp['ranges']))
+        self.assertEqual(replies[1][0], '/eos/out/active/wheel/1')
+        self.assertEqual(replies[-1][0], '/eos/out/color/hs')
+        self.assertAlmostEqual(replies[-1][1][0], cp['hue'], places=2)
+
+    def test_latency_and_loss(self):
+        """Test replies are delayed by latency and dropped by loss."""
+        emulator = self._start(latency=0.05)
+        start = time.monotonic()
+        self._request(emulator, '/eos/ping', '1')
+        self.assertGreaterEqual(time.monotonic() - start, 0.045)
+        emulator.loss = 1.0
+        self.client.settimeout(0.2)
+        with self.assertRaises(socket.timeout):
+            self._request(emulator, '/eos/ping', '2')
+        self.assertEqual(emulator.stats()['lost'], 1)
+
+    def test_rate_limit(self):
+        """Test requests are spread out to the processing rate."""
+        emulator = self._start(rate=100)
+        for i in range(10):
+            self.client.sendto(encode_message('/eos/ping', [str(i)]),
+                               (self.host, emulator.port))
+        start = time.monotonic()
+        for _ in range(10):
+            self.client.recv(65536)
+        self.assertGreaterEqual(time.monotonic() - start, 0.08)
+
+    def test_tcp(self):
+        """Test a SLIP framed TCP client gets its replies on the stream."""
+        emulator = self._start(tcp=True)
+        received = []
+        done = threading.Event()
+        def on_packet(packet, client):
+            received.append(parse_address(packet)[0])
+            done.set()
+        transport = TCPTransport(self.host, emulator.port,
+                                 on_packet=on_packet)
+        self.addCleanup(transport.close)
+        transport.send(encode_message('/eos/ping', ['1']))
+        self.assertTrue(done.wait(1.0))
+        self.assertEqual(received, ['/eos/out/ping'])
+
+
+if __name__ == '__main__':
+    unittest.main()
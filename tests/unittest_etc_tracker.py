@@ -0,0 +1,202 @@
+"""
+This file was created with the help of AI.
+
+Unit tests for the etc_tracker module using Python's built-in unittest
+framework.
+"""
+
+import asyncio
+import socket
+import threading
+import time
+import unittest
+import logging
+from osc.etc_emulator import ConsoleEmulator
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from osc.etc_tracker import ConfirmationTracker
+from osc.etcosc import etcosc
+from osc.logging_config import setup_logging
+from osc.oschandler import OSCHandler
+from osc.oscpacket import encode_message
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class TestConfirmationTracker(unittest.TestCase):
+    def setUp(self):
+        # Replies are fed straight into the receive path
+        self.handler = OSCHandler(mode='rx', rx_port=0, rx_autostart=False)
+        self.tracker = ConfirmationTracker(self.handler, timeout=0.2)
+        self.addCleanup(self.tracker.stop)
+
+    def _reply(self, address, *args):
+        dgram = encode_message(address, args)
+        self.handler._handle_packet(dgram, len(dgram), ('127.0.0.1', 0))
+
+    def test_confirm_in_order_with_match(self):
+        """Test replies resolve the oldest matching command."""
+        first = self.tracker.track('cmd', '/eos/out/user/*/cmd',
+                                   match=lambda a, args: 'Chan 1' in args[0])
+        second = self.tracker.track('cmd', '/eos/out/user/*/cmd')
+        self._reply('/eos/out/user/1/cmd', 'LIVE: Chan 2')
+        self.assertTrue(second.done())
+        self.assertFalse(first.done())
+        self._reply('/eos/out/user/1/cmd', 'LIVE: Chan 1 Full')
+        self.assertTrue(first.wait(0))
+        self.assertEqual(first.replies,
+                         [('/eos/out/user/1/cmd', ('LIVE: Chan 1 Full',))])
+        self.assertEqual(self.tracker.pending(), 0)
+        stats = self.tracker.stats()['cmd']
+        self.assertEqual((stats['confirmed'], stats['timed_out']), (2, 0))
+        self.assertGreaterEqual(stats['max'], first.latency)
+
+    def test_expect_several_replies(self):
+        """Test expect waits for that many matching replies."""
+        entry = self.tracker.track('get', '/eos/out/get/cp/*/*', expect=2)
+        self._reply('/eos/out/get/cp/1/list', 0)
+        self.assertFalse(entry.done())
+        self._reply('/eos/out/get/cp/1/channels', 0)
+        self.assertTrue(entry.confirmed)
+
+    def test_timeout_calls_back(self):
+        """Test unanswered commands time out in deadline order."""
+        resolved = []
+        done = threading.Event()
+        def callback(entry):
+            resolved.append((entry.command_type, entry.state))
+            if len(resolved) == 2:
+                done.set()
+        self.tracker.track('slow', '/eos/out/a', timeout=0.15,
+                           callback=callback)
+        self.tracker.track('fast', '/eos/out/b', timeout=0.05,
+                           callback=callback)
+        self.assertTrue(done.wait(1.0))
+        self.assertEqual(resolved, [('fast', 'timeout'), ('slow', 'timeout')])
+        self.assertEqual(self.tracker.stats()['fast']['timed_out'], 1)
+        # A reply after the timeout is ignored
+        self._reply('/eos/out/a')
+        self.assertEqual(self.tracker.stats()['slow']['confirmed'], 0)
+
+    def test_prefix_and_callable_expect(self):
+        """Test prefix tracking only takes addresses starting with it."""
+        entry = self.tracker.track(
+            'get', '/eos/out/get/cp/', prefix=True,
+            expect=lambda replies: replies[-1][0].endswith('/byType'))
+        self._reply('/other/eos/out/get/cp/1/list')
+        self._reply('/eos/out/get/cp/1/list')
+        self.assertFalse(entry.done())
+        self._reply('/eos/out/get/cp/1/byType')
+        self.assertEqual([address for address, _args in entry.replies],
+                         ['/eos/out/get/cp/1/list', '/eos/out/get/cp/1/byType'])
+
+    def test_prefix_reply_with_listener_on_address(self):
+        """Test prefix replies arrive when a listener has the address."""
+        seen = []
+        self.handler.register_osc_listener(
+            '/eos/out/get/cp/count', lambda address, *args: seen.append(args))
+        exact = self.tracker.track('count', '/eos/out/get/cp/count')
+        prefixed = self.tracker.track('get', '/eos/out/get/cp/', prefix=True)
+        self._reply('/eos/out/get/cp/count', 40)
+        self.assertTrue(exact.confirmed)
+        self.assertTrue(prefixed.confirmed)
+        self.assertEqual(seen, [(40,)])
+
+    def test_routes_removed_when_nothing_pending(self):
+        """Test keys and the rx hook go once their commands resolve."""
+        for index in range(20):
+            self.tracker.track('get', f'/eos/out/get/cp/{index}/', prefix=True)
+            self._reply(f'/eos/out/get/cp/{index}/list')
+        timed_out = self.tracker.track('cmd', '/eos/out/user/*/cmd',
+                                       timeout=0.05)
+        self.assertTrue(self.handler._rx_hooks)
+        self.assertFalse(timed_out.wait(1.0))
+        self.assertEqual(self.tracker._pending, {})
+        self.assertEqual(self.handler._rx_hooks, ())
+
+
+class TestEtcOSCRequests(unittest.TestCase):
+    def setUp(self):
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        probe.bind(('127.0.0.1', 0))
+        rx_port = probe.getsockname()[1]
+        probe.close()
+        self.emulator = ConsoleEmulator(port=0, reply_port=rx_port,
+                                        latency=0.05).start()
+        self.addCleanup(self.emulator.stop)
+        self.osc = etcosc(mode='txrx', tx_udp_ip='127.0.0.1',
+                          tx_port=self.emulator.port, rx_udp_ip='127.0.0.1',
+                          rx_port=rx_port, ping=False)
+        self.addCleanup(self.osc.stop)
+
+    def test_etcosc_send_confirmed(self):
+        """Test pipelined etcosc queries against the emulator."""
+        osc = self.osc
+        start = time.monotonic()
+        entries = [osc.send_confirmed(f'/eos/get/{target}/count',
+                                      reply=f'/eos/out/get/{target}/count',
+                                      command_type='count')
+                   for target in ('cp', 'fp', 'bp', 'ip')]
+        self.assertTrue(all(entry.wait(1.0) for entry in entries))
+        # All four were in flight together, not one latency each
+        self.assertLess(time.monotonic() - start, 0.15)
+        self.assertEqual(entries[0].replies[0][1], (40,))
+        self.assertEqual(osc.get_confirmation_stats()['count']['confirmed'], 4)
+
+    def test_request_after_send_confirmed_on_same_address(self):
+        """Test a prefix request is answered after an exact tracked one."""
+        done = self.osc.send_confirmed('/eos/get/cp/count',
+                                       reply='/eos/out/get/cp/count')
+        count = self.osc.request('/eos/get/cp/count')
+        self.assertTrue(done.wait(1.0))
+        self.assertEqual(count.result(timeout=1.0),
+                         [('/eos/out/get/cp/count', (40,))])
+
+    def test_needs_txrx_mode(self):
+        """Test tracked sends fail at once when not in txrx mode."""
+        for mode, kwargs in (('tx', {'tx_udp_ip': '127.0.0.1',
+                                     'tx_port': self.emulator.port}),
+                             ('rx', {'rx_udp_ip': '127.0.0.1', 'rx_port': 0})):
+            osc = etcosc(mode=mode, ping=False, **kwargs)
+            self.addCleanup(osc.stop)
+            with self.assertRaises(ValueError):
+                osc.request('/eos/get/cp/count')
+            with self.assertRaises(ValueError):
+                osc.send_confirmed('/eos/get/cp/count',
+                                   reply='/eos/out/get/cp/count')
+
+    def test_request_futures(self):
+        """Test concurrent index requests each get their own replies."""
+        futures = {
+            index: self.osc.request(
+                f'/eos/get/cp/index/{index}', reply_prefix='/eos/out/get/cp/',
+                expect=3, match=lambda a, args, index=index: args[0] == index)
+            for index in range(10)
+        }
+        for index, future in futures.items():
+            replies = future.result(timeout=1.0)
+            self.assertEqual(len(replies), 3)
+            self.assertTrue(all(args[0] == index for _a, args in replies))
+            self.assertTrue(replies[0][0].startswith(
+                f'/eos/out/get/cp/{index + 1}/list'))
+        count = self.osc.request('/eos/get/cp/count').result(timeout=1.0)
+        self.assertEqual(count, [('/eos/out/get/cp/count', (40,))])
+        missing = self.osc.request('/eos/get/cp/index/999',
+                                   reply_prefix='/eos/out/get/cp/',
+                                   match=lambda a, args: args[0] == 999,
+                                   timeout=0.1)
+        with self.assertRaises(FutureTimeoutError):
+            missing.result(timeout=1.0)
+
+    def test_request_async(self):
+        """Test the awaitable variant gathers concurrent requests."""
+        async def gather():
+            return await asyncio.gather(*(
+                self.osc.request_async(f'/eos/get/{target}/count')
+                for target in ('cp', 'macro')))
+        results = asyncio.run(gather())
+        self.assertEqual([replies[0][1] for replies in results], [(40,), (50,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
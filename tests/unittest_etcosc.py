@@ -0,0 +1,171 @@
+"""
+This file was created with the help of AI.
+
+Unit tests for the etcosc module using Python's built-in unittest framework.
+Runs over loopback sockets, no console required.
+"""
+
+import socket
+import time
+import unittest
+import logging
+from pythonosc.osc_message import OscMessage
+from osc.etc_emulator import ConsoleEmulator
+from osc.etcosc import etcosc
+from osc.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class TestEtcOSC(unittest.TestCase):
+    def setUp(self):
+        # Raw UDP socket standing in for the console
+        self.tx_ip = '127.0.0.1'
+        self.console = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.console.bind((self.tx_ip, 0))
+        self.console.settimeout(1.0)
+        self.tx_port = self.console.getsockname()[1]
+        self.osc = etcosc(mode='tx', tx_udp_ip=self.tx_ip, tx_port=self.tx_port)
+
+    def tearDown(self):
+        self.osc.stop()
+        self.console.close()
+
+    def _receive(self):
+        """Receive one message from the console socket as (address, params)."""
+        msg = OscMessage(self.console.recv(1024))
+        return msg.address, msg.params
+
+    def test_wheel_ticks_are_integrated(self):
+        """Test ticks between send slots are summed, not dropped."""
+        for _ in range(10):
+            self.osc.eos_send_wheel(param='pan', ticks=1.0, send_interval=0.1)
+        total = 0.0
+        packets = 0
+        while total < 10.0:
+            address, params = self._receive()
+            self.assertEqual(address, '/eos/wheel/pan')
+            total += params[0]
+            packets += 1
+        self.assertAlmostEqual(total, 10.0, places=3)
+        self.assertLessEqual(packets, 2)
+
+    def test_wheel_ticks_clamped_and_carried(self):
+        """Test max_ticks clamps each packet and carries the excess."""
+        for _ in range(5):
+            self.osc.eos_send_wheel(param='tilt', ticks=2.0, fine=True,
+                                    send_interval=0.02, max_ticks=3.0)
+        total = 0.0
+        while total < 10.0:
+            address, params = self._receive()
+            self.assertEqual(address, '/eos/wheel/fine/tilt')
+            self.assertLessEqual(abs(params[0]), 3.0)
+            total += params[0]
+        self.assertAlmostEqual(total, 10.0, places=3)
+
+    def test_wheel_send_interval_zero_sends_directly(self):
+        """Test send_interval=0 bypasses the integrator."""
+        self.osc.eos_send_wheel(wheel_type='index', index=2, ticks=-1.5,
+                                send_interval=0)
+        address, params = self._receive()
+        self.assertEqual(address, '/eos/active/wheel/2')
+        self.assertEqual(params, [-1.5])
+        self.assertIsNone(self.osc.wheel_integrator)
+
+    def test_wheel_adaptive_interval(self):
+        """Test send_interval='adaptive' sends at the controller interval."""
+        self.osc.send_control.rate = 1.0 / 0.2
+        self.osc.eos_send_wheel(param='pan', ticks=1.0,
+                                send_interval='adaptive')
+        self.assertEqual(self._receive(), ('/eos/wheel/pan', [1.0]))
+        self.osc.eos_send_wheel(param='pan', ticks=2.0,
+                                send_interval='adaptive')
+        self.console.settimeout(0.1)
+        with self.assertRaises(socket.timeout):
+            self._receive()
+        self.console.settimeout(1.0)
+        self.assertEqual(self._receive(), ('/eos/wheel/pan', [2.0]))
+        self.assertAlmostEqual(self.osc.get_send_rate()['interval'], 0.2)
+
+
+class TestEtcOSCPing(unittest.TestCase):
+    def setUp(self):
+        self.tx_ip = '127.0.0.1'
+        # Free port for the etcosc receive socket
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        probe.bind((self.tx_ip, 0))
+        self.rx_port = probe.getsockname()[1]
+        probe.close()
+
+    def _etcosc(self, console_port, **kwargs):
+        osc = etcosc(mode='txrx', tx_udp_ip=self.tx_ip, tx_port=console_port,
+                     rx_udp_ip=self.tx_ip, rx_port=self.rx_port,
+                     link_stats_interval=0, **kwargs)
+        self.addCleanup(osc.stop)
+        return osc
+
+    def test_reordered_replies_are_not_lost(self):
+        """Test replies answered out of order all match their ping."""
+        console = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        console.bind((self.tx_ip, 0))
+        console.settimeout(1.0)
+        self.addCleanup(console.close)
+        osc = self._etcosc(console.getsockname()[1], ping_frequency=0.02)
+        first = OscMessage(console.recv(1024))
+        second = OscMessage(console.recv(1024))
+        self.assertEqual(first.address, '/eos/ping')
+        self.assertEqual(second.params[0], first.params[0] + 1)
+        reply = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(reply.close)
+        for message in (second, first):
+            reply.sendto(message.dgram.replace(b'/eos/ping\x00\x00\x00',
+                                               b'/eos/out/ping\x00\x00\x00'),
+                         (self.tx_ip, self.rx_port))
+        deadline = time.monotonic() + 1.0
+        while (osc.get_link_stats()['received'] < 2
+               and time.monotonic() < deadline):
+            time.sleep(0.01)
+        stats = osc.get_link_stats()
+        self.assertEqual((stats['received'], stats['lost']), (2, 0))
+        self.assertGreater(osc.get_latency(), 0)
+
+    def test_restart_registers_ping_listener_once(self):
+        """Test stop_ping and start_ping cycles keep one reply listener."""
+        console = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        console.bind((self.tx_ip, 0))
+        self.addCleanup(console.close)
+        osc = self._etcosc(console.getsockname()[1], ping_frequency=0.05)
+        for _ in range(2):
+            osc.stop_ping()
+            osc.start_ping()
+        handlers = osc.osc_handler.address_index.match('/eos/out/ping')
+        self.assertEqual(handlers, (osc._ping_handler,))
+
+    def test_unanswered_pings_expire(self):
+        """Test lost replies are counted once their deadline passes."""
+        emulator = ConsoleEmulator(host=self.tx_ip, port=0,
+                                   reply_port=self.rx_port, loss=0.5,
+                                   seed=3).start()
+        self.addCleanup(emulator.stop)
+        osc = self._etcosc(emulator.port, ping_frequency=0.01,
+                           ping_timeout=0.1)
+        deadline = time.monotonic() + 10.0
+        while time.monotonic() < deadline:
+            stats = osc.get_link_stats()
+            if stats['received'] >= 10 and stats['lost'] >= 5:
+                break
+            time.sleep(0.02)
+        osc.stop_ping()
+        stats = osc.get_link_stats()
+        self.assertGreaterEqual(stats['received'], 10)
+        self.assertGreaterEqual(stats['lost'], 5)
+        # Pings still inside their deadline at stop are neither
+        self.assertLessEqual(stats['received'] + stats['lost'],
+                             emulator.stats()['handled'])
+        self.assertGreater(stats['loss_rate'], 0)
+        self.assertGreater(osc.get_send_rate()['decreases'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
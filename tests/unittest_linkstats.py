@@ -0,0 +1,64 @@
+"""
+This file was created with the help of AI.
+
+Unit tests for the linkstats module using Python's built-in unittest framework.
+"""
+
+import unittest
+import logging
+from osc.linkstats import HISTOGRAM_EDGES, LinkStats
+from osc.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class TestLinkStats(unittest.TestCase):
+    def setUp(self):
+        # No log thread, the tests read snapshot() directly
+        self.stats = LinkStats('test', window=100, interval=None)
+
+    def test_empty(self):
+        """Test a new link reports no latency and no loss."""
+        snapshot = self.stats.snapshot()
+        self.assertIsNone(snapshot['p50'])
+        self.assertEqual(snapshot['loss_rate'], 0.0)
+        self.assertIsNone(self.stats.summary())
+
+    def test_percentiles_follow_the_window(self):
+        """Test percentiles are within one bucket and old samples roll off."""
+        for step in range(100):
+            self.stats.record_rtt(0.001 * (step + 1))
+        snapshot = self.stats.snapshot()
+        ratio = HISTOGRAM_EDGES[1] / HISTOGRAM_EDGES[0]
+        for key, exact in (('p50', 0.050), ('p90', 0.090), ('p99', 0.099)):
+            self.assertGreaterEqual(snapshot[key], exact)
+            self.assertLessEqual(snapshot[key], exact * ratio)
+        self.assertAlmostEqual(snapshot['max'], 0.100)
+        self.assertAlmostEqual(snapshot['mean'], 0.0505)
+        # A full window of fast replies pushes the slow ones out
+        for _ in range(100):
+            self.stats.record_rtt(0.002)
+        snapshot = self.stats.snapshot()
+        self.assertAlmostEqual(snapshot['p99'], 0.002)
+        self.assertAlmostEqual(snapshot['max'], 0.002)
+        self.assertAlmostEqual(snapshot['max_ever'], 0.100)
+        self.assertEqual(snapshot['received'], 200)
+
+    def test_jitter_and_loss(self):
+        """Test alternating latency raises jitter and losses roll off."""
+        for step in range(100):
+            self.stats.record_rtt(0.010 if step % 2 else 0.020)
+        self.assertGreater(self.stats.snapshot()['jitter'], 0.009)
+        self.stats.record_loss(10)
+        snapshot = self.stats.snapshot()
+        self.assertAlmostEqual(snapshot['loss_rate'], 0.10)
+        self.assertEqual(snapshot['lost'], 10)
+        for _ in range(100):
+            self.stats.record_rtt(0.010)
+        self.assertEqual(self.stats.snapshot()['loss_rate'], 0.0)
+        self.assertIn('loss 0.0%', self.stats.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
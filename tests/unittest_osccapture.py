@@ -0,0 +1,91 @@
+"""
+This file was created with the help of AI.
+
+Unit tests for the osccapture module using Python's built-in unittest framework.
+"""
+
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import logging
+from pythonosc.osc_message_builder import build_msg
+from osc.logging_config import setup_logging
+from osc.osccapture import (CAPTURE_RX, CAPTURE_TX, CaptureReader,
+                            CaptureWriter, replay)
+from osc.oschandler import OSCHandler
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class TestOSCCapture(unittest.TestCase):
+    def setUp(self):
+        self.tx_ip = '127.0.0.1'
+        handle, self.path = tempfile.mkstemp(suffix='.osccap')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def _sink(self):
+        """Raw UDP socket on an ephemeral port, returns (socket, port)."""
+        sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sink.bind((self.tx_ip, 0))
+        sink.settimeout(1.0)
+        self.addCleanup(sink.close)
+        return sink, sink.getsockname()[1]
+
+    def test_handler_captures_tx_and_rx(self):
+        """Test OSCHandler records sent and received datagrams in order."""
+        receiver = OSCHandler(mode='rx', rx_udp_ip=self.tx_ip, rx_port=0)
+        self.addCleanup(receiver.stop_receiving)
+        rx_port = receiver.rx_socket.getsockname()[1]
+        done = threading.Event()
+        receiver.register_osc_listener('/eos/out/ping',
+                                       lambda address, *args: done.set())
+        sender = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip, tx_port=rx_port)
+        sender.start_capture(self.path)
+        receiver.start_capture(self.path + '.rx')
+        self.addCleanup(os.remove, self.path + '.rx')
+        sender.send_message('/eos/out/ping', ['1', 2.5])
+        self.assertTrue(done.wait(1.0))
+        self.assertEqual(sender.stop_capture(), (1, 28))
+        receiver.stop_capture()
+        expected = build_msg('/eos/out/ping', ['1', 2.5]).dgram
+        with CaptureReader(self.path) as reader:
+            records = [(direction, bytes(dgram))
+                       for _seconds, direction, dgram in reader.records()]
+        self.assertEqual(records, [(CAPTURE_TX, expected)])
+        with CaptureReader(self.path + '.rx') as reader:
+            self.assertEqual(reader.summary()['rx_packets'], 1)
+
+    def test_replay_speed_and_direction(self):
+        """Test replay keeps the capture timing scaled by speed."""
+        writer = CaptureWriter(self.path)
+        for index in range(5):
+            writer.write(CAPTURE_RX, build_msg('/eos/out/chan', [index]).dgram)
+            writer.write(CAPTURE_TX, build_msg('/eos/ping', [index]).dgram)
+            time.sleep(0.02)
+        writer.close()
+        sink, port = self._sink()
+        stats = replay(self.path, self.tx_ip, port, speed=2.0)
+        self.assertEqual(stats['packets'], 5)
+        # 80 ms of capture at double speed
+        self.assertGreaterEqual(stats['seconds'], 0.035)
+        received = [sink.recv(1024) for _ in range(5)]
+        self.assertEqual(received[4], build_msg('/eos/out/chan', [4]).dgram)
+        stats = replay(self.path, self.tx_ip, port, speed=0, direction='both')
+        self.assertEqual(stats['packets'], 10)
+        self.assertLess(stats['seconds'], 0.035)
+
+    def test_rejects_other_files(self):
+        """Test a file without the capture header raises ValueError."""
+        with open(self.path, 'wb') as f:
+            f.write(b'not a capture')
+        with self.assertRaises(ValueError):
+            CaptureReader(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
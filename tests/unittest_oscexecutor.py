@@ -0,0 +1,87 @@
+"""
+This file was created with the help of AI.
+
+Unit tests for the oscexecutor module using Python's built-in unittest framework.
+"""
+
+import threading
+import unittest
+import logging
+from osc.logging_config import setup_logging
+from osc.oscexecutor import QueuedListener, new_listener_pool
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class TestQueuedListener(unittest.TestCase):
+    def setUp(self):
+        # The handler waits on gate so tests can fill the queue
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.received = []
+        self.done = threading.Event()
+        self.expected = 0
+
+    def _handler(self, address, *args):
+        self.started.set()
+        self.gate.wait(1.0)
+        self.received.append((address, args))
+        if len(self.received) == self.expected:
+            self.done.set()
+
+    def _listener(self, overflow, pool=None):
+        listener = QueuedListener(self._handler, queue_size=2,
+                                  overflow=overflow, pool=pool)
+        self.addCleanup(listener.stop)
+        # First message is taken by the worker, which then waits
+        listener('/busy', 0)
+        self.assertTrue(self.started.wait(1.0))
+        return listener
+
+    def test_drop_oldest_and_newest(self):
+        """Test both drop policies keep the queue at queue_size."""
+        for overflow, kept in (('drop_oldest', [2, 3]),
+                               ('drop_newest', [1, 2])):
+            self.setUp()
+            self.expected = 3
+            listener = self._listener(overflow)
+            for value in (1, 2, 3):
+                listener('/eos/out/ping', value)
+            self.assertEqual(listener.stats()['depth'], 2)
+            self.gate.set()
+            self.assertTrue(self.done.wait(1.0))
+            self.assertEqual([args[0] for _, args in self.received[1:]], kept)
+            self.assertEqual(listener.stats()['dropped'], 1)
+
+    def test_coalesce_keeps_place_and_newest(self):
+        """Test coalesce replaces args for a waiting address."""
+        self.expected = 3
+        listener = self._listener('coalesce')
+        listener('/wheel/1', 1.0)
+        listener('/wheel/2', 5.0)
+        listener('/wheel/1', 2.0)
+        self.gate.set()
+        self.assertTrue(self.done.wait(1.0))
+        self.assertEqual(self.received[1:], [('/wheel/1', (2.0,)),
+                                             ('/wheel/2', (5.0,))])
+        stats = listener.stats()
+        self.assertEqual((stats['coalesced'], stats['dropped']), (1, 0))
+
+    def test_block_on_pool_loses_nothing(self):
+        """Test block waits for room and the pool runs messages in order."""
+        pool = new_listener_pool(2)
+        self.addCleanup(pool.shutdown)
+        self.expected = 6
+        listener = self._listener('block', pool=pool)
+        threading.Timer(0.05, self.gate.set).start()
+        for value in range(1, 6):
+            listener('/eos/out/get/cp/1', value)
+        self.assertTrue(self.done.wait(1.0))
+        self.assertEqual([args[0] for _, args in self.received],
+                         [0, 1, 2, 3, 4, 5])
+        self.assertEqual(listener.stats()['max_depth'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
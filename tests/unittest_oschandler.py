@@ -4,14 +4,34 @@ This file was created with the help of AI.
 Unit tests for the OSCHandler module using Python's built-in unittest framework.
 """
 
+import socket
+import socketserver
+import struct
+import threading
 import unittest
+from pythonosc.osc_bundle import OscBundle
+from pythonosc.osc_message import OscMessage
+from pythonosc.osc_message_builder import build_msg
 from osc.oschandler import OSCHandler
+from osc.oscpacket import ParseError
+from osc.osctcp import (LengthDecoder, SlipDecoder, TCPTransport,
+                        length_encode, slip_encode)
 import logging
 from osc.logging_config import setup_logging
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
+class _EchoHandler(socketserver.BaseRequestHandler):
+    """TCP console stand-in, echoes the framed byte stream back."""
+    def handle(self):
+        while True:
+            data = self.request.recv(4096)
+            if not data:
+                break
+            self.request.sendall(data)
+
+
 class TestOSCHandler(unittest.TestCase):
     def setUp(self):
         # Called before each test method
@@ -86,6 +106,420 @@ class TestOSCHandler(unittest.TestCase):
         self.osc_handler.default_handler('/test/abc', 456)
         self.assertTrue(self.called)
 
+    def _loopback_receiver(self):
+        """Bind a raw UDP socket on an ephemeral port, returns (socket, port)."""
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind((self.tx_ip, 0))
+        receiver.settimeout(1.0)
+        self.addCleanup(receiver.close)
+        return receiver, receiver.getsockname()[1]
+
+    def test_prepared_message_matches_send_message(self):
+        """Test that a prepared sender puts the same datagram on the wire."""
+        receiver, port = self._loopback_receiver()
+        osc_handler = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip, tx_port=port)
+        pan = osc_handler.prepare('/eos/wheel/fine/pan', 'f')
+        pan.send(1.5)
+        pan.send(-2.25)
+        self.assertEqual(receiver.recv(1024),
+                         build_msg('/eos/wheel/fine/pan', [1.5]).dgram)
+        self.assertEqual(receiver.recv(1024),
+                         build_msg('/eos/wheel/fine/pan', [-2.25]).dgram)
+
+    def test_send_message_array_and_midi_args(self):
+        """Test that list (array) and 4-tuple (MIDI) args match python-osc."""
+        receiver, port = self._loopback_receiver()
+        osc_handler = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip, tx_port=port)
+        args = [1, [2.5, 'red', [True, None]], (0, 144, 60, 100)]
+        osc_handler.send_message('/eos/test', args)
+        self.assertEqual(receiver.recv(1024),
+                         build_msg('/eos/test', args).dgram)
+
+    def test_prepare_invalid_typetag(self):
+        """Test that unsupported type tags raise ValueError."""
+        with self.assertRaises(ValueError):
+            self.osc_handler.prepare('/test/address', 'x')
+
+    def test_batching_packs_bundle(self):
+        """Test that batched messages share one bundle datagram."""
+        receiver, port = self._loopback_receiver()
+        osc_handler = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip, tx_port=port)
+        osc_handler.set_tx_batching(window=10.0, max_messages=3)
+        for value in (1, 2, 3):
+            osc_handler.send_message('/eos/chan/1/at', [value])
+        bundle = OscBundle(receiver.recv(2048))
+        self.assertEqual([msg.params for msg in bundle], [[1], [2], [3]])
+
+    def test_batching_flush_and_mtu(self):
+        """Test explicit flush, lone messages, and the MTU size cap."""
+        receiver, port = self._loopback_receiver()
+        osc_handler = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip, tx_port=port)
+        osc_handler.set_tx_batching(window=10.0, mtu=64)
+        osc_handler.send_message('/eos/ping', ['single'])
+        osc_handler.flush()
+        self.assertEqual(receiver.recv(2048),
+                         build_msg('/eos/ping', ['single']).dgram)
+        # Each message is 20 bytes, the 64 byte bundle fits only two
+        for value in (1, 2, 3):
+            osc_handler.send_message('/eos/chan/1', [value])
+        first = receiver.recv(2048)
+        self.assertLessEqual(len(first), 64)
+        self.assertEqual(OscBundle(first).num_contents, 2)
+        osc_handler.set_tx_batching(enabled=False)
+        self.assertEqual(receiver.recv(2048),
+                         build_msg('/eos/chan/1', [3]).dgram)
+
+    def test_batching_window_uses_one_thread(self):
+        """Test bundle windows are closed by one long lived thread."""
+        receiver, port = self._loopback_receiver()
+        osc_handler = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip, tx_port=port)
+        self.addCleanup(osc_handler.close)
+        osc_handler.set_tx_batching(window=0.005)
+        def batch_threads():
+            return {thread.ident for thread in threading.enumerate()
+                    if thread.name == 'osc-tx-batch'}
+        before = batch_threads()
+        threads = set()
+        for value in range(5):
+            osc_handler.send_message('/eos/chan/1', [value])
+            # Each message waits out its own window
+            self.assertEqual(OscMessage(receiver.recv(1024)).params, [value])
+            threads.update(batch_threads() - before)
+        self.assertEqual(len(threads), 1)
+
+    def test_rate_limit_buffer_counters(self):
+        """Test the token bucket buffers a burst and sends it in order."""
+        receiver, port = self._loopback_receiver()
+        osc_handler = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip, tx_port=port)
+        osc_handler.set_tx_rate_limit(min_send_interval=0.01,
+                                      rate_limit_mode='buffer')
+        for value in range(5):
+            osc_handler.send_message('/eos/chan/1/at', [value])
+        received = [OscMessage(receiver.recv(1024)).params[0]
+                    for _ in range(5)]
+        self.assertEqual(received, [0, 1, 2, 3, 4])
+        stats = osc_handler.get_tx_stats()
+        self.assertEqual(stats['accepted'], 1)
+        self.assertEqual(stats['delayed'], 4)
+        self.assertEqual(stats['dropped'], 0)
+        osc_handler.set_tx_rate_limit(min_send_interval=0.0)
+
+    def test_rate_limit_drop_counters(self):
+        """Test drop mode discards messages sent without a token."""
+        osc_handler = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip,
+                                 tx_port=self.tx_port)
+        osc_handler.set_tx_rate_limit(min_send_interval=10.0,
+                                      rate_limit_mode='drop', burst=2)
+        for value in range(5):
+            osc_handler.send_message('/test/address', [value])
+        stats = osc_handler.get_tx_stats()
+        self.assertEqual(stats['accepted'], 2)
+        self.assertEqual(stats['dropped'], 3)
+
+    def test_rate_limit_bad_args_raise_on_caller(self):
+        """Test unencodable args raise before reaching the limiter queue."""
+        osc_handler = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip,
+                                 tx_port=self.tx_port)
+        osc_handler.set_tx_rate_limit(min_send_interval=10.0,
+                                      rate_limit_mode='buffer')
+        self.addCleanup(osc_handler.set_tx_rate_limit, min_send_interval=0.0)
+        with self.assertRaises(ValueError):
+            osc_handler.send_message('/eos/cmd', [{'not': 'osc'}])
+        self.assertEqual(osc_handler.get_tx_stats()['queued'], 0)
+
+    def test_rate_limit_coalesce_keeps_newest(self):
+        """Test coalesce mode sends only the newest args per address."""
+        receiver, port = self._loopback_receiver()
+        osc_handler = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip, tx_port=port)
+        osc_handler.set_tx_rate_limit(min_send_interval=0.02,
+                                      rate_limit_mode='coalesce')
+        for value in range(10):
+            osc_handler.send_message('/eos/chan/1/at', [value])
+            osc_handler.send_message('/eos/chan/2/at', [value * 2])
+        received = []
+        for _ in range(3):
+            msg = OscMessage(receiver.recv(1024))
+            received.append((msg.address, msg.params[0]))
+        # chan 2 was queued before chan 1's second value
+        self.assertEqual(received, [('/eos/chan/1/at', 0),
+                                    ('/eos/chan/2/at', 18),
+                                    ('/eos/chan/1/at', 9)])
+        stats = osc_handler.get_tx_stats()
+        self.assertEqual(stats['delayed'], 2)
+        self.assertEqual(stats['coalesced'], 17)
+        osc_handler.set_tx_rate_limit(min_send_interval=0.0)
+
+    def test_tcp_decoders_stream(self):
+        """Test both TCP framings survive arbitrary chunking."""
+        packets = [build_msg('/eos/ping', ['1']).dgram,
+                   b'\xc0\xdb' + build_msg('/eos/ping', ['2']).dgram]
+        for encode, decoder in ((slip_encode, SlipDecoder()),
+                                (length_encode, LengthDecoder())):
+            stream = b''.join(encode(packet) for packet in packets)
+            decoded = []
+            for i in range(len(stream)):
+                decoded.extend(decoder.feed(stream[i:i + 1]))
+            self.assertEqual(decoded, packets)
+
+    def test_tcp_decoders_reject_bad_sizes(self):
+        """Test negative and oversized frames raise instead of looping."""
+        with self.assertRaises(ParseError):
+            LengthDecoder().feed(struct.pack('>i', -4) + b'abcd')
+        with self.assertRaises(ParseError):
+            LengthDecoder(max_packet=64).feed(struct.pack('>i', 65))
+        with self.assertRaises(ParseError):
+            SlipDecoder(max_packet=64).feed(b'\xc0' + b'x' * 65)
+
+    def test_tcp_corrupt_stream_closes_connection(self):
+        """Test the reader thread drops a connection with a bad size."""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind((self.tx_ip, 0))
+        server.listen(1)
+        self.addCleanup(server.close)
+        def serve():
+            conn, _client = server.accept()
+            conn.sendall(struct.pack('>i', -4) + b'abcd')
+            conn.recv(1)
+            conn.close()
+        threading.Thread(target=serve, daemon=True).start()
+        with self.assertLogs('osc.osctcp', level='ERROR') as logs:
+            transport = TCPTransport(self.tx_ip, server.getsockname()[1],
+                                     framing='length',
+                                     on_packet=lambda packet, client: None)
+            transport._reader.join(1.0)
+        self.addCleanup(transport.close)
+        self.assertFalse(transport._reader.is_alive())
+        self.assertIn('corrupt', logs.output[0])
+
+    def test_tcp_transport_round_trip(self):
+        """Test send and receive over one TCP connection, both framings."""
+        server = socketserver.ThreadingTCPServer((self.tx_ip, 0), _EchoHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        port = server.server_address[1]
+        for framing in ('slip', 'length'):
+            received = []
+            done = threading.Event()
+            def handler(address, *args):
+                received.append((address, args))
+                if len(received) == 2:
+                    done.set()
+            osc_handler = OSCHandler(mode='txrx', tx_udp_ip=self.tx_ip,
+                                     tx_port=port, transport='tcp',
+                                     tcp_framing=framing)
+            osc_handler.register_osc_listener('/eos/out/get/cp/count',
+                                              handler)
+            osc_handler.send_message('/eos/out/get/cp/count', [500])
+            osc_handler.send_message('/eos/out/get/cp/count', [501])
+            self.assertTrue(done.wait(1.0))
+            self.assertEqual(received, [('/eos/out/get/cp/count', (500,)),
+                                        ('/eos/out/get/cp/count', (501,))])
+            osc_handler.stop_receiving()
+
+    def test_send_many_bundles_and_stats(self):
+        """Test send_many packs a batch into MTU sized bundles."""
+        receiver, port = self._loopback_receiver()
+        osc_handler = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip, tx_port=port)
+        stats = osc_handler.send_many(
+            (f'/eos/chan/{chan}/at', [chan]) for chan in range(100))
+        self.assertEqual(stats['messages'], 100)
+        self.assertEqual(stats['status'], 'sent')
+        self.assertLess(stats['datagrams'], 100)
+        values = []
+        for _ in range(stats['datagrams']):
+            dgram = receiver.recv(2048)
+            self.assertLessEqual(len(dgram), 1472)
+            values.extend(msg.params[0] for msg in OscBundle(dgram))
+        self.assertEqual(values, list(range(100)))
+
+    def test_send_many_rate_limited_once(self):
+        """Test a batch spends one rate limit token."""
+        osc_handler = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip,
+                                 tx_port=self.tx_port)
+        osc_handler.set_tx_rate_limit(min_send_interval=10.0,
+                                      rate_limit_mode='drop')
+        batch = [('/test/address', [value]) for value in range(10)]
+        self.assertEqual(osc_handler.send_many(batch)['status'], 'sent')
+        self.assertEqual(osc_handler.send_many(batch)['status'], 'dropped')
+        stats = osc_handler.get_tx_stats()
+        self.assertEqual((stats['accepted'], stats['dropped']), (1, 1))
+        # Only the batch that went out is counted as sent
+        tx = osc_handler.get_traffic_stats()['tx']
+        self.assertEqual(tx['addresses']['/test/address']['count'], 10)
+
+    def test_traffic_thread_lifecycle(self):
+        """Test a failed constructor leaves no stats thread, close stops it."""
+        def stats_threads():
+            return [thread for thread in threading.enumerate()
+                    if thread.name == 'OSCHandler-stats']
+        before = len(stats_threads())
+        with self.assertRaises(ValueError):
+            OSCHandler(mode='txrx', tx_udp_ip=None, rx_udp_ip=self.tx_ip,
+                       rx_port=0)
+        self.assertEqual(len(stats_threads()), before)
+        osc_handler = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip,
+                                 tx_port=self.tx_port)
+        self.assertEqual(len(stats_threads()), before + 1)
+        osc_handler.close()
+        self.assertEqual(len(stats_threads()), before)
+
+    def test_fan_out_destinations(self):
+        """Test one send reaches every enabled destination."""
+        primary, primary_port = self._loopback_receiver()
+        backup, backup_port = self._loopback_receiver()
+        osc_handler = OSCHandler(mode='tx', tx_destinations=[
+            (self.tx_ip, primary_port), (self.tx_ip, backup_port)])
+        osc_handler.send_message('/eos/cue/1/fire')
+        expected = build_msg('/eos/cue/1/fire', "").dgram
+        self.assertEqual(primary.recv(1024), expected)
+        self.assertEqual(backup.recv(1024), expected)
+        osc_handler.set_destination_enabled(self.tx_ip, backup_port, False)
+        osc_handler.send_message('/eos/cue/2/fire')
+        self.assertEqual(primary.recv(1024),
+                         build_msg('/eos/cue/2/fire', "").dgram)
+        stats = osc_handler.get_destination_stats()
+        self.assertEqual(stats[f"{self.tx_ip}:{primary_port}"]['packets'], 2)
+        self.assertEqual(stats[f"{self.tx_ip}:{backup_port}"]['packets'], 1)
+        self.assertFalse(stats[f"{self.tx_ip}:{backup_port}"]['enabled'])
+
+    def test_rx_only_has_no_destinations(self):
+        """Test an rx handler has no tx socket or destination entries."""
+        receiver = OSCHandler(mode='rx', rx_port=0, rx_autostart=False)
+        self.assertEqual(receiver.get_destination_stats(), {})
+        self.assertIsNone(receiver.tx_socket)
+
+    def test_router_forwards_raw_and_rewrites(self):
+        """Test routes forward undecoded packets with prefix rewrite."""
+        bridge, bridge_port = self._loopback_receiver()
+        router = OSCHandler(mode='rx', rx_udp_ip=self.tx_ip, rx_port=0)
+        self.addCleanup(router.stop_receiving)
+        rx_port = router.rx_socket.getsockname()[1]
+        local = []
+        local_done = threading.Event()
+        def listener(address, *args):
+            local.append(address)
+            local_done.set()
+        router.register_osc_listener('/eos/out/ping', listener)
+        router.register_osc_listener('/eos/out/cmd', listener)
+        router.add_route('/eos/out/ping', [(self.tx_ip, bridge_port)],
+                         rewrite='/showctl/eos/ping')
+        router.add_route('/eos/out/cmd', [(self.tx_ip, bridge_port)],
+                         consume=False)
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(sender.close)
+        sender.sendto(build_msg('/eos/out/ping', ['12', 3.5]).dgram,
+                      (self.tx_ip, rx_port))
+        self.assertEqual(bridge.recv(1024),
+                         build_msg('/showctl/eos/ping', ['12', 3.5]).dgram)
+        sender.sendto(build_msg('/eos/out/cmd', ['Chan 1']).dgram,
+                      (self.tx_ip, rx_port))
+        self.assertEqual(bridge.recv(1024),
+                         build_msg('/eos/out/cmd', ['Chan 1']).dgram)
+        # Only the non consuming route reached the local listener
+        self.assertTrue(local_done.wait(1.0))
+        self.assertEqual(local, ['/eos/out/cmd'])
+        stats = router.get_route_stats()
+        self.assertEqual([route['packets'] for route in stats], [1, 1])
+
+    def test_receive_bundle_decodes_only_matched(self):
+        """Test bundled messages dispatch and unmatched args stay undecoded."""
+        receiver = OSCHandler(mode='rx', rx_udp_ip=self.tx_ip, rx_port=0)
+        self.addCleanup(receiver.stop_receiving)
+        rx_port = receiver.rx_socket.getsockname()[1]
+        received = []
+        done = threading.Event()
+        def handler(address, *args):
+            received.append((address, args))
+            done.set()
+        receiver.register_osc_listener('/eos/out/active/chan', handler)
+        decoded = []
+        import osc.oschandler as oschandler_module
+        real_decode = oschandler_module.decode_args
+        def counting_decode(buf, start, end):
+            decoded.append(start)
+            return real_decode(buf, start, end)
+        oschandler_module.decode_args = counting_decode
+        self.addCleanup(setattr, oschandler_module, 'decode_args', real_decode)
+        sender = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip, tx_port=rx_port)
+        sender.send_many([('/eos/out/wheel/1', ['Pan [0]', 2, 0.5]),
+                          ('/eos/out/active/chan', ['1 [1] Fixture']),
+                          ('/eos/out/wheel/2', ['Tilt [0]', 2, 0.5])])
+        self.assertTrue(done.wait(1.0))
+        self.assertEqual(received,
+                         [('/eos/out/active/chan', ('1 [1] Fixture',))])
+        self.assertEqual(len(decoded), 1)
+        # Unmatched messages are still counted in the traffic stats
+        rx = receiver.get_traffic_stats()['rx']
+        self.assertEqual(rx['addresses']['/eos/out/active/chan']['count'], 1)
+
+    def test_receive_socket_error_is_logged(self):
+        """Test a socket error stops the receive thread with an error log."""
+        receiver = OSCHandler(mode='rx', rx_udp_ip=self.tx_ip, rx_port=0)
+        self.addCleanup(receiver.stop_receiving)
+        with self.assertLogs('osc.oschandler', level='ERROR') as logs:
+            # Closed behind the handler's back, not through stop_receiving
+            receiver.rx_socket.close()
+            receiver._server_thread.join(1.0)
+        self.assertFalse(receiver._server_thread.is_alive())
+        self.assertIn('receiving stopped', logs.output[0])
+
+    def test_close_stops_listener_threads(self):
+        """Test close ends dedicated workers and the listener pool."""
+        receiver = OSCHandler(mode='rx', rx_udp_ip=self.tx_ip, rx_port=0)
+        done = threading.Event()
+        receiver.register_osc_listener('/eos/out/ping',
+                                       lambda address, *args: done.set(),
+                                       executor='dedicated')
+        receiver.register_osc_listener('/eos/out/cmd', lambda *args: None,
+                                       executor='pool')
+        for address in ('/eos/out/ping', '/eos/out/cmd'):
+            dgram = build_msg(address, [1]).dgram
+            receiver._handle_packet(dgram, len(dgram), (self.tx_ip, 0))
+        self.assertTrue(done.wait(1.0))
+        pool = receiver._rx_pool
+        receiver.close()
+        self.assertIsNone(receiver._rx_pool)
+        self.assertTrue(pool._shutdown)
+        for _address, queued in receiver.rx_queues:
+            self.assertFalse(queued.submit('/eos/out/ping', (1,)))
+            if queued.pool is None:
+                queued._thread.join(1.0)
+                self.assertFalse(queued._thread.is_alive())
+
+    def test_dedicated_executor_keeps_receiving(self):
+        """Test a slow queued listener does not stall inline listeners."""
+        receiver = OSCHandler(mode='rx', rx_udp_ip=self.tx_ip, rx_port=0)
+        self.addCleanup(receiver.stop_receiving)
+        rx_port = receiver.rx_socket.getsockname()[1]
+        gate = threading.Event()
+        slow_started = threading.Event()
+        fast_done = threading.Event()
+        def slow(address, *args):
+            slow_started.set()
+            gate.wait(1.0)
+        def fast(address, *args):
+            fast_done.set()
+        receiver.register_osc_substring('/eos/out/get/cp', slow,
+                                        executor='dedicated', queue_size=3,
+                                        overflow='drop_newest')
+        receiver.register_osc_listener('/eos/out/ping', fast)
+        sender = OSCHandler(mode='tx', tx_udp_ip=self.tx_ip, tx_port=rx_port)
+        sender.send_message('/eos/out/get/cp/0/list/0/1', [0])
+        self.assertTrue(slow_started.wait(1.0))
+        for index in range(1, 6):
+            sender.send_message(f'/eos/out/get/cp/{index}/list/0/1', [index])
+        sender.send_message('/eos/out/ping', ['1'])
+        self.assertTrue(fast_done.wait(1.0))
+        stats = receiver.get_rx_queue_stats()
+        gate.set()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['address'], '/eos/out/get/cp')
+        self.assertEqual(stats[0]['executor'], 'dedicated')
+        # One message running, three waiting, two dropped
+        self.assertEqual((stats[0]['depth'], stats[0]['dropped']), (3, 2))
+
 if __name__ == '__main__':
     # Optionally, configure logging for test output
     # logger.basicConfig(level=logging.CRITICAL)  # Suppress logs during tests
@@ -0,0 +1,81 @@
+"""
+This file was created with the help of AI.
+
+Unit tests for the oscmatch module using Python's built-in unittest framework.
+"""
+
+import unittest
+import logging
+from osc.logging_config import setup_logging
+from osc.oscmatch import AddressIndex, SubstringIndex, segment_regex
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class TestAddressIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = AddressIndex(cache_size=4)
+
+    def test_exact_and_pattern_order(self):
+        """Test exact and wildcard matches come back in registration order."""
+        self.index.add('/eos/out/chan/*', 'any_chan')
+        self.index.add('/eos/out/chan/1', 'chan_1')
+        self.index.add('/eos/out/{chan,group}/?', 'single_digit')
+        self.assertEqual(self.index.match('/eos/out/chan/1'),
+                         ('any_chan', 'chan_1', 'single_digit'))
+        self.assertEqual(self.index.match('/eos/out/group/5'),
+                         ('single_digit',))
+        self.assertEqual(self.index.match('/eos/out/chan/12'), ('any_chan',))
+        # Wildcards stay inside one path segment
+        self.assertEqual(self.index.match('/eos/out/chan/1/param'), ())
+
+    def test_character_sets(self):
+        """Test [abc], ranges and [!abc] negation."""
+        self.assertTrue(segment_regex('wheel[1-3]').fullmatch('wheel2'))
+        self.assertFalse(segment_regex('wheel[1-3]').fullmatch('wheel4'))
+        self.assertTrue(segment_regex('[!a]x').fullmatch('bx'))
+        self.assertFalse(segment_regex('[!a]x').fullmatch('ax'))
+        with self.assertRaises(ValueError):
+            segment_regex('[abc')
+
+    def test_cache_is_bounded_and_invalidated(self):
+        """Test the LRU stays bounded and add() drops stale results."""
+        self.index.add('/eos/out/chan/*', 'any_chan')
+        for chan in range(10):
+            self.index.match(f'/eos/out/chan/{chan}')
+        self.index.match('/eos/out/chan/9')
+        stats = self.index.stats()
+        self.assertEqual(stats['cached'], 4)
+        self.assertEqual((stats['hits'], stats['misses']), (1, 10))
+        self.index.add('/eos/out/chan/9', 'chan_9')
+        self.assertEqual(self.index.match('/eos/out/chan/9'),
+                         ('any_chan', 'chan_9'))
+
+
+class TestSubstringIndex(unittest.TestCase):
+    def test_matches_same_as_in_checks(self):
+        """Test overlapping substrings fire like a loop of 'in' checks."""
+        index = SubstringIndex()
+        substrings = ['/eos/out', '/user/1', '/eos/out/get/cp', 'cp/1',
+                      '/user/10', 'p/']
+        for number, substring in enumerate(substrings):
+            index.add(substring, number)
+        for address in ('/eos/out/get/cp/1/list/0/2', '/eos/out/user/10/cmd',
+                        '/eos/in/ping', '/user/1', ''):
+            expected = tuple(number for number, substring
+                             in enumerate(substrings) if substring in address)
+            self.assertEqual(index.match(address), expected)
+
+    def test_rebuild_drops_cached_results(self):
+        """Test a new substring is seen by addresses already cached."""
+        index = SubstringIndex()
+        index.add('/eos/out', 'out')
+        self.assertEqual(index.match('/eos/out/user/1/cmd'), ('out',))
+        index.add('/user/1', 'user')
+        self.assertEqual(index.match('/eos/out/user/1/cmd'), ('out', 'user'))
+        self.assertEqual(index.stats()['hits'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+This file was created with the help of AI.
+
+Unit tests for the oscstats module using Python's built-in unittest framework.
+"""
+
+import unittest
+import logging
+from osc.logging_config import setup_logging
+from osc.oscstats import TrafficStats
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class TestTrafficStats(unittest.TestCase):
+    def setUp(self):
+        # No flush thread, the tests drive flush() with their own clock
+        self.stats = TrafficStats('test', interval=None)
+
+    def test_counters_and_rate(self):
+        """Test per address counts, bytes, seen times and window rate."""
+        self.stats.flush(now=100.0)
+        for step in range(10):
+            self.stats.record('rx', '/eos/out/active/wheel/1', 32,
+                              now=100.0 + step * 0.1)
+        self.stats.record('tx', '/eos/ping', 16, now=100.5)
+        snapshot = self.stats.snapshot(now=102.0)
+        wheel = snapshot['rx']['addresses']['/eos/out/active/wheel/1']
+        self.assertEqual((wheel['count'], wheel['bytes']), (10, 320))
+        self.assertAlmostEqual(wheel['last_seen'] - wheel['first_seen'], 0.9,
+                               places=3)
+        self.assertAlmostEqual(wheel['rate'], 5.0)
+        self.assertEqual(snapshot['tx']['count'], 1)
+
+    def test_flush_summary_line(self):
+        """Test one summary line per window, None when idle."""
+        self.stats.flush(now=0.0)
+        for chan in range(5):
+            self.stats.record('tx', f'/eos/chan/{chan}/at', 20, now=1.0)
+        self.stats.record('tx', '/eos/chan/1/at', 20, now=1.0)
+        line = self.stats.flush(now=2.0)
+        self.assertIn('tx 6 msgs 120 B (3.0/s, 5 addresses', line)
+        self.assertIn('/eos/chan/1/at x2', line)
+        self.assertIsNone(self.stats.flush(now=4.0))
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot['tx']['count'], 6)
+        self.assertEqual(snapshot['tx']['last_window_rate'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+This file was created with the help of AI.
+
+Unit tests for the etc_parsers.palettes module using Python's built-in
+unittest framework.
+"""
+
+import socket
+import time
+import unittest
+import logging
+from osc.etc_emulator import ConsoleEmulator, EmulatedShow
+from osc.etc_parsers.palettes import PaletteExporter, parse_cp_reply
+from osc.etcosc import etcosc
+from osc.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+UID = '4992522F-2884-4DF1-BFF2-4AD6E4C5A7E1'
+
+
+class TestParseCpReply(unittest.TestCase):
+    def test_list_reply(self):
+        """Test the label and flags of a list reply."""
+        uid, fields = parse_cp_reply('/eos/out/get/cp/2/list/0/6',
+                                     [1, UID, 'Red', False, True, 0])
+        self.assertEqual(uid, UID)
+        self.assertEqual(fields['palette_num'], '2')
+        self.assertEqual(fields['cp_label'], 'Red')
+        self.assertTrue(fields['cp_locked'])
+
+    def test_channels_reply(self):
+        """Test channel ranges come back as strings, single ints included."""
+        uid, fields = parse_cp_reply(
+            '/eos/out/get/cp/2/channels/list/0/7',
+            [1, UID, '31-47', '151-166', 201, '211-212', '401-423'])
+        self.assertEqual(fields['chan_ranges'],
+                         ['31-47', '151-166', '201', '211-212', '401-423'])
+
+    def test_other_addresses(self):
+        """Test unknown reply types and non palette addresses."""
+        self.assertEqual(parse_cp_reply('/eos/out/get/cp/2/fx/list/0/3',
+                                        [1, UID, 0]), (UID, {}))
+        self.assertIsNone(parse_cp_reply('/eos/out/get/cp/count', [12]))
+        self.assertIsNone(parse_cp_reply('/eos/out/ping', ['1.0']))
+
+
+class TestPaletteExporter(unittest.TestCase):
+    def _console(self, **kwargs):
+        """Emulator with 60 palettes and an etcosc talking to it."""
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        probe.bind(('127.0.0.1', 0))
+        rx_port = probe.getsockname()[1]
+        probe.close()
+        emulator = ConsoleEmulator(port=0, reply_port=rx_port,
+                                   show=EmulatedShow(palettes=60), **kwargs)
+        emulator.start()
+        self.addCleanup(emulator.stop)
+        osc = etcosc(mode='txrx', tx_udp_ip='127.0.0.1', tx_port=emulator.port,
+                     rx_udp_ip='127.0.0.1', rx_port=rx_port, ping=False)
+        self.addCleanup(osc.stop)
+        return emulator, osc
+
+    def test_windowed_export(self):
+        """Test every palette is reassembled in far fewer round trips."""
+        emulator, osc = self._console(latency=0.02)
+        exporter = PaletteExporter(osc, window=20)
+        start = time.monotonic()
+        palettes = exporter.export()
+        # One request at a time would take 60 round trips, over 1.2s
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(len(palettes), 60)
+        cp = emulator.show.palettes[7]
+        self.assertEqual(palettes[cp['uid']]['chan_ranges'], cp['ranges'])
+        self.assertEqual(palettes[cp['uid']]['cp_label'], cp['label'])
+        self.assertEqual(exporter.stats['requests'], 60)
+        self.assertIn('60/60', exporter.report())
+
+    def test_lost_replies_are_retried(self):
+        """Test only the indexes with lost replies are asked again."""
+        emulator, osc = self._console(loss=0.05, seed=5)
+        exporter = PaletteExporter(osc, window=20, timeout=0.2, retries=5)
+        palettes = exporter.export(count=60)
+        self.assertEqual(len(palettes), 60)
+        self.assertGreater(exporter.stats['retried'], 0)
+        self.assertEqual(exporter.stats['requests'],
+                         60 + exporter.stats['retried'])
+        self.assertEqual(exporter.stats['failed'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
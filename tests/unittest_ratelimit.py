@@ -0,0 +1,74 @@
+"""
+This file was created with the help of AI.
+
+Unit tests for the ratelimit module using Python's built-in unittest framework.
+"""
+
+import threading
+import unittest
+import logging
+from osc.logging_config import setup_logging
+from osc.ratelimit import AIMDController, RateLimitedSender
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class TestRateLimitedSender(unittest.TestCase):
+    def test_failed_send_does_not_stop_the_sender_thread(self):
+        """Test a message that raises is logged and the queue still drains."""
+        sent = []
+        done = threading.Event()
+        def send(address, args):
+            if args == ['bad']:
+                raise ValueError("cannot encode")
+            sent.append(args)
+            if len(sent) == 3:
+                done.set()
+        limiter = RateLimitedSender(send, rate=200, mode='buffer')
+        self.addCleanup(limiter.stop)
+        for args in (['first'], ['bad'], ['second'], ['third']):
+            limiter.submit('/eos/cmd', args)
+        self.assertTrue(done.wait(2.0))
+        self.assertEqual(sent, [['first'], ['second'], ['third']])
+        self.assertEqual(limiter.stats()['queued'], 0)
+
+
+class TestAIMDController(unittest.TestCase):
+    def setUp(self):
+        self.control = AIMDController(min_interval=0.01, max_interval=0.2,
+                                      initial_interval=0.05, increase=5.0,
+                                      decrease=0.5, hold=0.5)
+
+    def test_flat_rtt_increases_to_the_bound(self):
+        """Test steady round trips raise the rate up to min_interval."""
+        for step in range(10):
+            self.control.on_rtt(0.004, now=step)
+        self.assertAlmostEqual(self.control.rate, 70.0)
+        for step in range(100):
+            self.control.on_rtt(0.004, now=step)
+        self.assertAlmostEqual(self.control.get_interval(), 0.01)
+
+    def test_loss_and_rising_rtt_decrease(self):
+        """Test loss halves the rate once per hold time, rising rtt too."""
+        self.control.on_rtt(0.004, now=0.0)
+        self.control.on_loss(now=1.0)
+        self.control.on_loss(now=1.1)
+        self.assertAlmostEqual(self.control.rate, 12.5)
+        self.assertEqual(self.control.decreases, 1)
+        for step in range(40):
+            self.control.on_rtt(0.100, now=2.0 + step)
+        stats = self.control.stats()
+        self.assertAlmostEqual(stats['interval'], 0.2)
+        self.assertGreater(stats['srtt'], 0.05)
+        self.assertGreater(stats['decreases'], 1)
+
+    def test_bounds_checked(self):
+        """Test an initial interval outside the bounds is rejected."""
+        with self.assertRaises(ValueError):
+            AIMDController(min_interval=0.1, max_interval=0.2,
+                           initial_interval=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()